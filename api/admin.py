@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdempotencyKey
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("key", "user", "method", "path", "status_code", "created_at", "completed_at")
+    search_fields = ("key", "user__username", "path")
+    readonly_fields = ("request_hash", "response_body", "created_at", "completed_at")
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+POLL_INTERVAL_SECONDS = 0.1
+RETRY_AFTER_SECONDS = 1
+
+# Returned by _wait_for_result when the original request failed and released the key.
+_RELEASED = object()
+
+
+def _file_digest(upload: UploadedFile) -> str:
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def _request_hash(request: Request) -> str:
+    data = request.data
+    if hasattr(data, "lists"):  # QueryDict from form/multipart bodies
+        # Uploaded files count by content, not by name.
+        data = {
+            key: [_file_digest(value) if isinstance(value, UploadedFile) else value for value in values]
+            for key, values in data.lists()
+        }
+    payload = json.dumps(data, sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.sha256(f"{request.method} {request.path} {payload}".encode()).hexdigest()
+
+
+def _claim(request: Request, key: str, request_hash: str) -> Tuple[Optional[IdempotencyKey], bool]:
+    """Insert an in-progress row for ``key``; return ``(row, created)``."""
+    now = timezone.now()
+    ttl = timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    lock_timeout = timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+    # Expired results and claims abandoned by a crashed worker free the key.
+    IdempotencyKey.objects.filter(user=request.user, key=key).filter(
+        Q(created_at__lt=now - ttl) | Q(completed_at__isnull=True, created_at__lt=now - lock_timeout)
+    ).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=request.user,
+                key=key,
+                method=request.method,
+                path=request.path,
+                request_hash=request_hash,
+            )
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=request.user, key=key).first(), False
+
+
+def _wait_for_result(record: IdempotencyKey):
+    """Poll until the original request stores its response.
+
+    Returns the completed row, ``_RELEASED`` if the original request failed,
+    or ``None`` once ``IDEMPOTENCY_WAIT_TIMEOUT`` has passed. The wait holds
+    a worker, so the timeout is kept short (1 second by default).
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while record.completed_at is None:
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_INTERVAL_SECONDS)
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return _RELEASED
+    return record
+
+
+def _in_progress() -> Response:
+    response = Response(
+        {"detail": f"A request with this {IDEMPOTENCY_HEADER} is still in progress."},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response["Retry-After"] = str(RETRY_AFTER_SECONDS)
+    return response
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    response = Response(record.response_body, status=record.status_code)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(view_func: Callable) -> Callable:
+    """Make a DRF function view safe to retry with an ``Idempotency-Key`` header.
+
+    The first request with a key runs the view and stores its response. Later
+    requests with the same key replay that response without running the view;
+    if the first request is still running they wait for its result. Requests
+    without the header, or from anonymous users, run unchanged. Apply it below
+    ``@api_view``/``@permission_classes`` and above ``@transaction.atomic`` so
+    the claim is committed before the view's transaction starts.
+    """
+    @wraps(view_func)
+    def wrapper(request: Request, *args, **kwargs) -> Response:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"detail": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = _request_hash(request)
+        for _ in range(3):
+            record, created = _claim(request, key, request_hash)
+            if record is None:
+                continue
+            if created:
+                break
+            if (record.method, record.path, record.request_hash) != (request.method, request.path, request_hash):
+                return Response(
+                    {"detail": f"{IDEMPOTENCY_HEADER} was already used for a different request."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            result = _wait_for_result(record)
+            if result is None:
+                return _in_progress()
+            if result is not _RELEASED:
+                return _replay(result)
+        else:
+            return _in_progress()
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except APIException as exc:
+            if exc.status_code >= 500:
+                record.delete()
+                raise
+            # Rendered now, so a raised 4xx is stored and replayed like a returned one.
+            response = api_settings.EXCEPTION_HANDLER(
+                exc, {"view": None, "args": args, "kwargs": kwargs, "request": request}
+            )
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            # Server errors are not final; let the client retry with the same key.
+            record.delete()
+            return response
+
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code,
+            response_body=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+            completed_at=timezone.now(),
+        )
+        return response
+
+    return wrapper
@@ -0,0 +1,15 @@
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+@shared_task
+def purge_idempotency_keys_task():
+    """Delete stored idempotent responses older than IDEMPOTENCY_KEY_TTL."""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -1,9 +1,10 @@
 from django.urls import path
-from .views import health, readiness_probe
+from .views import cache_stats, health, readiness_probe
 
 urlpatterns = [
     path("health/", health, name="health"),
     path("readiness/", readiness_probe, name="readiness"),
+    path("cache-stats/", cache_stats, name="cache-stats"),
 ]
 
 
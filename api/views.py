@@ -1,5 +1,5 @@
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import connection
@@ -7,6 +7,8 @@ from django.core.cache import cache
 import redis
 from django.conf import settings
 
+from farmfresh.cache import CacheStats
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def health(request):
@@ -54,4 +56,9 @@ def readiness_probe(request):
         "checks": checks
     }, status=status_code)
 
-# Create your views here.
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit, stale, miss and rebuild counters of CacheManager.get_or_set and the response cache."""
+    return Response(CacheStats.snapshot())
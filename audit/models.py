@@ -8,3 +8,9 @@ class AuditLog(models.Model):
     object_id = models.CharField(max_length=100)
     metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['created_at', 'id']),
+        ]
@@ -6,6 +6,9 @@ from .models import (
     ContractOrder,
     ContractOrderItem,
     BusinessInvoice,
+    ContractRun,
+    ContractRunItem,
+    BulkOrderUpload,
 )
 
 
@@ -41,3 +44,27 @@ class BusinessInvoiceAdmin(admin.ModelAdmin):
     list_display = ("business", "order", "status", "due_date", "total_amount")
     list_filter = ("status",)
     search_fields = ("business__company", "order__id")
+
+
+class ContractRunItemInline(admin.TabularInline):
+    model = ContractRunItem
+    extra = 0
+    fields = ("contract", "due_date", "status", "order", "skipped_lines", "error", "processed_at")
+    readonly_fields = fields
+    can_delete = False
+
+
+@admin.register(ContractRun)
+class ContractRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "run_date", "status", "total_contracts", "started_by", "started_at", "finished_at")
+    list_filter = ("status", "run_date")
+    readonly_fields = ("started_by", "created_at", "started_at", "finished_at")
+    inlines = [ContractRunItemInline]
+
+
+@admin.register(BulkOrderUpload)
+class BulkOrderUploadAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "file_name", "status", "line_count", "order", "created_at", "finished_at")
+    list_filter = ("status",)
+    search_fields = ("user__username", "file_name")
+    readonly_fields = ("errors", "created_at", "finished_at")
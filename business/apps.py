@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BusinessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'business'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+        return super().ready()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import BusinessInvoice, InvoiceStatus
+from .pdf import RENDERER_VERSION, try_render_invoice_pdf
+
+logger = logging.getLogger(__name__)
+
+INVOICE_PDF_DIR = "invoices"
+INVOICE_RENDER_BATCH_SIZE = 200
+
+
+def invoice_document(invoice: BusinessInvoice) -> dict:
+    """Everything printed on the invoice, as plain data the render workers can pickle."""
+    business = invoice.business
+    return {
+        "renderer": RENDERER_VERSION,
+        "number": invoice.pk,
+        "order": invoice.order_id,
+        "business": business.company or business.name,
+        "address": ", ".join(part for part in (business.address, business.city, business.country) if part),
+        "tax_id": f"Tax ID: {business.tax_id}" if business.tax_id else "",
+        "issued": invoice.issued_at.date().isoformat(),
+        "due": invoice.due_date.isoformat(),
+        "terms": invoice.payment_terms_days,
+        "status": invoice.status,
+        "lines": [
+            [item.product_name, item.quantity, item.unit, str(item.price_per_unit), str(item.subtotal)]
+            for item in invoice.order.items.all()
+        ],
+        "total": str(invoice.total_amount),
+    }
+
+
+def document_digest(document: dict) -> str:
+    return hashlib.sha256(json.dumps(document, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def invoice_pdf_name(digest: str) -> str:
+    """Storage path of the PDF for a document digest; also used as its ETag."""
+    return f"{INVOICE_PDF_DIR}/{digest[:2]}/{digest}.pdf"
+
+
+def invoice_pdf_etag(pdf_path: str) -> str:
+    return pdf_path.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+def _pool_size(workers: int) -> int:
+    # Celery's prefork children are daemonic and may not start processes; the
+    # invoice tasks are routed to the "invoices" queue for a solo/threads worker.
+    if multiprocessing.current_process().daemon:
+        if workers > 1:
+            logger.warning(
+                "Rendering invoice PDFs inline: a daemonic worker cannot start a pool of %s processes; "
+                "run the invoices queue with --pool=solo or --pool=threads", workers,
+            )
+        return 1
+    return max(1, workers)
+
+
+def _render_all(documents: List[dict], workers: int) -> List[Tuple[Optional[bytes], Optional[str]]]:
+    workers = min(_pool_size(workers), len(documents))
+    if workers <= 1:
+        return [try_render_invoice_pdf(document) for document in documents]
+    # The renderer has no Django imports, so spawned workers start cheaply and
+    # never inherit database connections.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return list(pool.map(try_render_invoice_pdf, documents, chunksize=max(1, len(documents) // (workers * 4))))
+
+
+def render_invoices(invoices: Iterable[BusinessInvoice], workers: int = 1) -> Dict[str, int]:
+    """Render PDFs for ``invoices`` whose content changed since the last render.
+
+    Files are content-addressed by the digest of the invoice data and the
+    renderer version, so an unchanged invoice is skipped without rendering
+    and identical invoices share one file. Returns ``rendered`` and
+    ``skipped`` counts, and ``failed`` for invoices with text the renderer
+    cannot print; those are logged and keep their previous PDF, if any.
+    """
+    if hasattr(invoices, "select_related"):
+        invoices = invoices.select_related("business").prefetch_related("order__items")
+    changed, skipped = [], 0
+    for invoice in invoices:
+        document = invoice_document(invoice)
+        name = invoice_pdf_name(document_digest(document))
+        if invoice.pdf_path == name and default_storage.exists(name):
+            skipped += 1
+            continue
+        changed.append((invoice, document, name))
+
+    missing = [(document, name) for _, document, name in changed if not default_storage.exists(name)]
+    failed = set()
+    for (document, name), (pdf, error) in zip(missing, _render_all([document for document, _ in missing], workers)):
+        if error:
+            logger.error("Could not render the PDF of invoice %s: %s", document["number"], error)
+            failed.add(name)
+        elif not default_storage.exists(name):
+            default_storage.save(name, ContentFile(pdf))
+
+    changed = [(invoice, document, name) for invoice, document, name in changed if name not in failed]
+    for invoice, _, name in changed:
+        invoice.pdf_path = name
+    BusinessInvoice.objects.bulk_update([invoice for invoice, _, _ in changed], ["pdf_path"])
+    return {"rendered": len(missing) - len(failed), "skipped": skipped, "failed": len(failed)}
+
+
+def render_outstanding_invoices(workers: int = 1, batch_size: int = INVOICE_RENDER_BATCH_SIZE) -> Dict[str, int]:
+    """Bring the PDF of every issued or paid invoice up to date, in batches."""
+    totals = {"rendered": 0, "skipped": 0, "failed": 0}
+    ids = list(
+        BusinessInvoice.objects.exclude(status=InvoiceStatus.DRAFT).order_by("pk").values_list("pk", flat=True)
+    )
+    for start in range(0, len(ids), batch_size):
+        result = render_invoices(BusinessInvoice.objects.filter(pk__in=ids[start:start + batch_size]), workers)
+        for key, value in result.items():
+            totals[key] += value
+    return totals
+
+
+def _enqueue_render(invoice_ids: List[int]) -> None:
+    from .tasks import render_invoice_pdfs_task
+
+    try:
+        render_invoice_pdfs_task.delay(invoice_ids)
+    except Exception:
+        # The nightly run renders anything missed while the broker was down.
+        logger.warning("Could not enqueue invoice PDF rendering for %s", invoice_ids, exc_info=True)
+
+
+def queue_invoice_pdfs(invoice_ids: Iterable[int]) -> None:
+    """Render the PDFs of ``invoice_ids`` in the background once the transaction commits."""
+    invoice_ids = list(invoice_ids)
+    if invoice_ids:
+        transaction.on_commit(lambda: _enqueue_render(invoice_ids))
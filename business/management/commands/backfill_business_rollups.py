@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from business.models import BusinessProfile
+from business.rollups import rebuild_business_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild BusinessDailyRollup rows from order history, one business per "
+        "transaction. Safe to re-run; existing rows in the range are replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--business", type=int, action="append", help="Business profile id (repeatable)")
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        start, end = self._date(options["start"]), self._date(options["end"])
+        businesses = BusinessProfile.objects.order_by("pk")
+        if options["business"]:
+            businesses = businesses.filter(pk__in=options["business"])
+        total = 0
+        for business in businesses.iterator():
+            rows = rebuild_business_rollups(business, start, end)
+            total += rows
+            self.stdout.write(f"{business}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {total} rollup rows"))
+
+    def _date(self, value):
+        if value is None:
+            return None
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f"Invalid date: {value}")
+        return parsed
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from business.invoices import INVOICE_RENDER_BATCH_SIZE, render_invoices, render_outstanding_invoices
+from business.models import BusinessInvoice
+
+
+class Command(BaseCommand):
+    help = (
+        "Render business invoice PDFs in a process pool. Invoices whose content "
+        "has not changed since their last render are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("ids", nargs="*", type=int, help="Invoice ids (default: every non-draft invoice)")
+        parser.add_argument("--workers", type=int, default=settings.INVOICE_PDF_WORKERS, help="Render processes")
+        parser.add_argument("--batch-size", type=int, default=INVOICE_RENDER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options["ids"]:
+            result = render_invoices(BusinessInvoice.objects.filter(pk__in=options["ids"]), options["workers"])
+        else:
+            result = render_outstanding_invoices(options["workers"], options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {result['rendered']}, skipped {result['skipped']} unchanged in {elapsed:.2f}s"
+        ))
+        if result["failed"]:
+            self.stderr.write(f"{result['failed']} invoices have text that cannot be printed; see the log")
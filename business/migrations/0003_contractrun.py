@@ -0,0 +1,52 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('orders', '0005_keyset_indexes'),
+        ('business', '0002_businessinvoice_businesspricingtier_contractorder_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed')], default='PENDING', max_length=20)),
+                ('total_contracts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('started_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contract_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContractRunItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField(help_text="The contract's next_delivery_date when the run started")),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Order created'), ('SKIPPED', 'Skipped'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('skipped_lines', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='run_items', to='business.contractorder')),
+                ('order', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contract_run_item', to='orders.order')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='business.contractrun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['run', 'status'], name='business_co_run_id_b4d77d_idx')],
+                'unique_together': {('run', 'contract')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='contractrun',
+            index=models.Index(fields=['run_date', 'status'], name='business_co_run_dat_503805_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:49
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0006_keyset_indexes'),
+        ('business', '0003_contractrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('product_name', models.CharField(max_length=200)),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('quantity', models.PositiveBigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('delivered_quantity', models.PositiveBigIntegerField(default=0)),
+                ('delivered_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('business', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='business.businessprofile')),
+                ('produce', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='business_rollups', to='farmers.produce')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['business', 'day'], name='business_bu_busines_d76df5_idx')],
+                'unique_together': {('business', 'day', 'produce')},
+            },
+        ),
+    ]
@@ -130,3 +130,110 @@ class BusinessInvoice(models.Model):
 
     def __str__(self) -> str:
         return f"Invoice #{self.id} for Order #{self.order_id}"
+
+
+class ContractRunStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    RUNNING = "RUNNING", "Running"
+    COMPLETED = "COMPLETED", "Completed"
+
+
+class ContractRun(models.Model):
+    """One background pass over the contract orders due on ``run_date``."""
+    run_date = models.DateField()
+    status = models.CharField(max_length=20, choices=ContractRunStatus.choices, default=ContractRunStatus.PENDING)
+    total_contracts = models.PositiveIntegerField(default=0)
+    started_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="contract_runs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["run_date", "status"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Contract run #{self.id} for {self.run_date} ({self.status})"
+
+
+class ContractRunItemStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    DONE = "DONE", "Order created"
+    SKIPPED = "SKIPPED", "Skipped"
+    FAILED = "FAILED", "Failed"
+
+
+class ContractRunItem(models.Model):
+    """Progress of one contract within a run; processed at most once."""
+    run = models.ForeignKey(ContractRun, on_delete=models.CASCADE, related_name="items")
+    contract = models.ForeignKey(ContractOrder, on_delete=models.CASCADE, related_name="run_items")
+    due_date = models.DateField(help_text="The contract's next_delivery_date when the run started")
+    status = models.CharField(max_length=20, choices=ContractRunItemStatus.choices, default=ContractRunItemStatus.PENDING)
+    order = models.OneToOneField('orders.Order', on_delete=models.SET_NULL, null=True, blank=True, related_name="contract_run_item")
+    skipped_lines = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("run", "contract")
+        indexes = [
+            models.Index(fields=["run", "status"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.contract} in run #{self.run_id}: {self.status}"
+
+
+class BusinessDailyRollup(models.Model):
+    """What one business bought of one produce on one day.
+
+    Maintained incrementally as orders are written and delivered (see
+    ``business.rollups``) so analytics never scan order history.
+    """
+    business = models.ForeignKey(BusinessProfile, on_delete=models.CASCADE, related_name="daily_rollups")
+    day = models.DateField()
+    produce = models.ForeignKey('farmers.Produce', on_delete=models.CASCADE, related_name="business_rollups")
+    product_name = models.CharField(max_length=200)
+    orders = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveBigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    delivered_quantity = models.PositiveBigIntegerField(default=0)
+    delivered_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        unique_together = ("business", "day", "produce")
+        indexes = [
+            models.Index(fields=["business", "day"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.business} {self.day} {self.product_name}: {self.amount}"
+
+
+class BulkOrderUploadStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    PROCESSING = "PROCESSING", "Processing"
+    COMPLETED = "COMPLETED", "Completed"
+    FAILED = "FAILED", "Failed"
+
+
+class BulkOrderUpload(models.Model):
+    """A CSV/XLSX spreadsheet of order lines and the outcome of placing it."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="bulk_order_uploads")
+    file = models.FileField(upload_to="bulk-orders/%Y/%m/")
+    file_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=BulkOrderUploadStatus.choices, default=BulkOrderUploadStatus.PENDING)
+    line_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    order = models.OneToOneField('orders.Order', on_delete=models.SET_NULL, null=True, blank=True, related_name="bulk_upload")
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Upload #{self.id} {self.file_name} ({self.status})"
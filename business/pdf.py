@@ -0,0 +1,124 @@
+"""Minimal invoice PDF renderer.
+
+Deliberately free of Django imports: it runs in worker processes of the
+invoice render pool, which only receive plain ``dict`` documents. Output is
+a deterministic function of the document, so equal documents produce
+byte-identical files.
+
+Text is printed with the standard Courier font in WinAnsi (cp1252) encoding.
+Latin letters outside it are printed without their diacritics (``ẹ`` as
+``e``); text with no Latin form raises :class:`UnprintableText` rather than
+being written as ``?``.
+"""
+import unicodedata
+from typing import List, Optional, Tuple
+
+# Bump when the layout changes so every stored PDF is rendered again.
+RENDERER_VERSION = 2
+
+LINES_PER_PAGE = 52
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+ENCODING = "cp1252"
+
+
+class UnprintableText(ValueError):
+    """Raised when a document holds characters the invoice font cannot print."""
+
+
+def _printable(char: str) -> str:
+    try:
+        char.encode(ENCODING)
+        return char
+    except UnicodeEncodeError:
+        pass
+    if unicodedata.combining(char):
+        return ""
+    base = "".join(c for c in unicodedata.normalize("NFKD", char) if not unicodedata.combining(c))
+    try:
+        base.encode(ENCODING)
+    except UnicodeEncodeError:
+        base = ""
+    if not base:
+        raise UnprintableText(f"Cannot print {char!r} (U+{ord(char):04X}) on an invoice")
+    return base
+
+
+def printable_text(text: str) -> str:
+    """``text`` with every character the invoice font lacks transliterated; see the module docstring."""
+    return "".join(_printable(char) for char in unicodedata.normalize("NFC", text))
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def invoice_text_lines(document: dict) -> List[str]:
+    lines = [
+        f"INVOICE #{document['number']}",
+        "",
+        f"Bill to: {document['business']}",
+    ]
+    lines += [value for value in (document.get("address"), document.get("tax_id")) if value]
+    lines += [
+        f"Order #{document['order']}",
+        f"Issued: {document['issued']}    Due: {document['due']}    Terms: net {document['terms']} days",
+        f"Status: {document['status']}",
+        "",
+        f"{'Item':<34}{'Qty':>6}  {'Unit':<8}{'Price':>12}{'Subtotal':>14}",
+        "-" * 76,
+    ]
+    for name, quantity, unit, price, subtotal in document["lines"]:
+        lines.append(f"{name[:33]:<34}{quantity:>6}  {unit[:7]:<8}{price:>12}{subtotal:>14}")
+    lines += ["-" * 76, f"{'Total':<60}{document['total']:>16}"]
+    return lines
+
+
+def render_invoice_pdf(document: dict) -> bytes:
+    """Render ``document`` (see ``business.invoices.invoice_document``) as PDF bytes.
+
+    Raises :class:`UnprintableText` if the document has text with no Latin form.
+    """
+    text = [printable_text(line) for line in invoice_text_lines(document)]
+    pages = [text[i:i + LINES_PER_PAGE] for i in range(0, len(text), LINES_PER_PAGE)] or [[]]
+
+    # Objects 1-3 are the catalog, page tree and font; each page adds a page
+    # object followed by its content stream.
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % pid for pid in page_ids), len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, page in zip(page_ids, pages):
+        commands = ["BT", "/F1 10 Tf", "14 TL", f"50 {PAGE_HEIGHT - 50} Td"]
+        commands += [f"({_escape(line)}) '" for line in page]
+        commands.append("ET")
+        stream = "\n".join(commands).encode(ENCODING)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % (PAGE_WIDTH, PAGE_HEIGHT, page_id + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def try_render_invoice_pdf(document: dict) -> Tuple[Optional[bytes], Optional[str]]:
+    """``(pdf, None)``, or ``(None, error)`` for an unprintable document.
+
+    Used by the render pool: errors come back as values for the parent
+    process to log, since pool processes have no logging set up.
+    """
+    try:
+        return render_invoice_pdf(document), None
+    except UnprintableText as exc:
+        return None, str(exc)
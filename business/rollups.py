@@ -0,0 +1,194 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderItem, OrderStatus
+from .models import BusinessDailyRollup, BusinessProfile
+
+# (business_id, day, produce_id)
+RollupKey = Tuple[int, date, int]
+
+MONEY_FIELDS = {"amount", "delivered_amount"}
+
+
+def order_day(order: Order) -> date:
+    return timezone.localtime(order.created_at).date()
+
+
+def _business_ids(user_ids: Iterable[int]) -> Dict[int, int]:
+    return dict(BusinessProfile.objects.filter(user_id__in=set(user_ids)).values_list("user_id", "id"))
+
+
+def apply_rollup_deltas(deltas: Dict[RollupKey, Dict[str, object]], names: Dict[int, str]) -> None:
+    """Add ``deltas`` to the rollup rows, creating the ones that do not exist yet.
+
+    Existing rows are changed with one ``F()`` UPDATE, so concurrent writers
+    add up instead of overwriting each other; missing rows are bulk-inserted.
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values.values())}
+    if not deltas:
+        return
+    existing = {
+        (row["business_id"], row["day"], row["produce_id"]): row["id"]
+        for row in BusinessDailyRollup.objects.filter(
+            business_id__in={key[0] for key in deltas},
+            day__in={key[1] for key in deltas},
+            produce_id__in={key[2] for key in deltas},
+        ).values("id", "business_id", "day", "produce_id")
+    }
+    _increment_rows({existing[key]: values for key, values in deltas.items() if key in existing})
+
+    missing = [key for key in deltas if key not in existing]
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            BusinessDailyRollup.objects.bulk_create([
+                BusinessDailyRollup(
+                    business_id=business_id, day=day, produce_id=produce_id,
+                    product_name=names.get(produce_id, ""), **deltas[(business_id, day, produce_id)],
+                )
+                for business_id, day, produce_id in missing
+            ])
+    except IntegrityError:
+        # Another transaction created some of the rows first; add to them instead.
+        apply_rollup_deltas({key: deltas[key] for key in missing}, names)
+
+
+def _increment_rows(amounts: Dict[int, Dict[str, object]]) -> None:
+    if not amounts:
+        return
+    fields = {field for values in amounts.values() for field in values}
+    updates = {}
+    for field in fields:
+        output = DecimalField(max_digits=14, decimal_places=2) if field in MONEY_FIELDS else IntegerField()
+        updates[field] = F(field) + Case(
+            *[When(pk=pk, then=Value(values.get(field, 0))) for pk, values in amounts.items()],
+            default=Value(0),
+            output_field=output,
+        )
+    BusinessDailyRollup.objects.filter(pk__in=list(amounts)).update(**updates)
+
+
+def _add(deltas: Dict[RollupKey, Dict[str, object]], key: RollupKey, **values) -> None:
+    row = deltas.setdefault(key, {})
+    for field, value in values.items():
+        row[field] = row.get(field, 0) + value
+
+
+def record_business_rollups(order: Order, items: Iterable[OrderItem]) -> None:
+    """Add a newly written order to its business's daily rollups (no-op for consumers)."""
+    business_id = _business_ids([order.user_id]).get(order.user_id)
+    if business_id is None:
+        return
+    delivered = order.status == OrderStatus.DELIVERED
+    day = order_day(order)
+    deltas: Dict[RollupKey, Dict[str, object]] = {}
+    names: Dict[int, str] = {}
+    counted = set()
+    for item in items:
+        if item.produce_id is None:
+            continue
+        key = (business_id, day, item.produce_id)
+        _add(
+            deltas, key,
+            orders=0 if key in counted else 1,
+            quantity=item.quantity,
+            amount=item.subtotal,
+            delivered_quantity=item.quantity if delivered else 0,
+            delivered_amount=item.subtotal if delivered else Decimal("0"),
+        )
+        counted.add(key)
+        names[item.produce_id] = item.product_name
+    apply_rollup_deltas(deltas, names)
+
+
+def record_status_changes(changes: Iterable[Tuple[Order, str, str]]) -> None:
+    """Move delivered totals for ``(order, old_status, new_status)`` changes.
+
+    Only changes into or out of DELIVERED touch the rollups; the order items
+    of all affected orders are read in one query.
+    """
+    signs = {}
+    for order, old_status, new_status in changes:
+        if (old_status == OrderStatus.DELIVERED) != (new_status == OrderStatus.DELIVERED):
+            signs[order.pk] = (order, 1 if new_status == OrderStatus.DELIVERED else -1)
+    if not signs:
+        return
+    business_ids = _business_ids(order.user_id for order, _ in signs.values())
+    if not business_ids:
+        return
+
+    deltas: Dict[RollupKey, Dict[str, object]] = {}
+    items = OrderItem.objects.filter(order_id__in=list(signs), produce__isnull=False).values(
+        "order_id", "produce_id", "product_name", "quantity", "subtotal"
+    )
+    for item in items:
+        order, sign = signs[item["order_id"]]
+        business_id = business_ids.get(order.user_id)
+        if business_id is None:
+            continue
+        _add(
+            deltas, (business_id, order_day(order), item["produce_id"]),
+            delivered_quantity=sign * item["quantity"],
+            delivered_amount=sign * item["subtotal"],
+        )
+    apply_rollup_deltas(deltas, {})
+
+
+@transaction.atomic
+def rebuild_business_rollups(business: BusinessProfile, start: Optional[date] = None,
+                             end: Optional[date] = None) -> int:
+    """Recompute ``business``'s rollups for ``start..end`` (inclusive) from its orders.
+
+    Used by the backfill command and to repair drift; returns the number of
+    rows written. Orders written for the range while it runs may be counted
+    twice or not at all, so rebuild days that are no longer taking orders.
+    """
+    rollups = BusinessDailyRollup.objects.filter(business=business)
+    items = OrderItem.objects.filter(order__user_id=business.user_id, produce__isnull=False)
+    if start:
+        rollups = rollups.filter(day__gte=start)
+        items = items.filter(order__created_at__date__gte=start)
+    if end:
+        rollups = rollups.filter(day__lte=end)
+        items = items.filter(order__created_at__date__lte=end)
+    rollups.delete()
+
+    delivered = Q(order__status=OrderStatus.DELIVERED)
+    rows = (
+        items.annotate(day=TruncDate("order__created_at", tzinfo=timezone.get_current_timezone()))
+        .values("day", "produce_id")
+        .annotate(
+            name=Max("product_name"),
+            order_count=Count("order_id", distinct=True),
+            total_quantity=Sum("quantity"),
+            total_amount=Sum("subtotal"),
+            delivered_qty=Sum("quantity", filter=delivered, default=0),
+            delivered_total=Sum("subtotal", filter=delivered, default=Decimal("0")),
+        )
+        .order_by()
+    )
+    created = BusinessDailyRollup.objects.bulk_create(
+        (
+            BusinessDailyRollup(
+                business=business,
+                day=row["day"],
+                produce_id=row["produce_id"],
+                product_name=row["name"],
+                orders=row["order_count"],
+                quantity=row["total_quantity"],
+                amount=row["total_amount"],
+                delivered_quantity=row["delivered_qty"],
+                delivered_amount=row["delivered_total"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+    return len(created)
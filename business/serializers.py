@@ -7,7 +7,11 @@ from .models import (
     ContractOrder,
     ContractOrderItem,
     BusinessInvoice,
+    ContractRun,
+    ContractRunItemStatus,
+    BulkOrderUpload,
 )
+from .uploads import BULK_UPLOAD_FORMATS, BULK_UPLOAD_MAX_BYTES
 
 
 class BusinessPricingTierSerializer(serializers.ModelSerializer):
@@ -132,4 +136,68 @@ class BulkOrderCreateSerializer(serializers.Serializer):
         return attrs
 
 
+class BulkOrderUploadCreateSerializer(serializers.Serializer):
+    file = serializers.FileField()
 
+    def validate_file(self, value):
+        if not value.name.lower().endswith(BULK_UPLOAD_FORMATS):
+            raise serializers.ValidationError("Upload a .csv or .xlsx file")
+        if value.size > BULK_UPLOAD_MAX_BYTES:
+            raise serializers.ValidationError(f"Files may be at most {BULK_UPLOAD_MAX_BYTES // (1024 * 1024)} MB")
+        return value
+
+
+class BulkOrderUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BulkOrderUpload
+        fields = ["id", "file_name", "status", "line_count", "errors", "order", "created_at", "finished_at"]
+        read_only_fields = fields
+
+
+class ContractRunSerializer(serializers.ModelSerializer):
+    """A contract run with per-status counts from ``services.with_run_progress``."""
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ContractRun
+        fields = [
+            "id",
+            "run_date",
+            "status",
+            "total_contracts",
+            "progress",
+            "started_by",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        return {
+            status.lower(): getattr(obj, f"{status.lower()}_count", 0)
+            for status in ContractRunItemStatus.values
+        }
+
+
+class BusinessAnalyticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    period = serializers.ChoiceField(choices=["day", "week", "month"], required=False)
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return attrs
+
+
+class LogisticsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    output = serializers.ChoiceField(choices=["json", "ndjson"], default="json")
+    layout = serializers.ChoiceField(choices=["rows", "columns"], default="rows")
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return attrs
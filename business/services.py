@@ -0,0 +1,389 @@
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from consumers.wishlist import queue_wishlist_stock_sync
+from farmers.models import Produce
+from farmfresh.cache import CacheManager, CacheTags, bump_tags_on_commit, tagged_key
+from orders.models import Order
+from orders.services import CheckoutError, OrderLine, validate_lines, write_order
+from .models import (
+    BusinessPricingTier,
+    ContractFrequency,
+    ContractOrder,
+    ContractRun,
+    ContractRunItem,
+    ContractRunItemStatus,
+    ContractRunStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_TIERS_TIMEOUT = 60 * 60
+
+BULK_ORDER_MAX_ATTEMPTS = 3
+BULK_ORDER_RETRY_DELAY = 0.05  # seconds, multiplied by the attempt number
+
+CONTRACT_RUN_CHUNK_SIZE = 100
+CONTRACT_INTERVALS = {
+    ContractFrequency.WEEKLY: timedelta(days=7),
+    ContractFrequency.BIWEEKLY: timedelta(days=14),
+    ContractFrequency.MONTHLY: timedelta(days=30),
+}
+
+# (produce_id, unit) -> [(min_quantity, unit_price, tier_id), ...], highest min_quantity first
+TierTable = Dict[Tuple[int, str], List[Tuple[int, Decimal, int]]]
+
+
+class QuoteError(Exception):
+    """Raised when a basket cannot be priced; ``payload`` is the 400 response body."""
+
+    def __init__(self, payload: dict) -> None:
+        super().__init__(payload)
+        self.payload = payload
+
+
+class PriceQuote(NamedTuple):
+    """The unit price that applies to one line and where it came from."""
+    unit_price: Decimal
+    source: str  # "business", "global" or "list"
+    tier_id: Optional[int] = None
+
+
+def _tier_table(rows: Iterable[Tuple[int, str, int, Decimal, int]]) -> TierTable:
+    table: TierTable = {}
+    for produce_id, unit, min_quantity, unit_price, tier_id in rows:
+        table.setdefault((produce_id, unit), []).append((min_quantity, unit_price, tier_id))
+    for tiers in table.values():
+        tiers.sort(key=lambda tier: tier[0], reverse=True)
+    return table
+
+
+def _best_tier(table: TierTable, produce_id: int, unit: str, quantity: int) -> Optional[Tuple[int, Decimal, int]]:
+    for tier in table.get((produce_id, unit), ()):
+        if tier[0] <= quantity:
+            return tier
+    return None
+
+
+def _tier_fields(queryset) -> List[Tuple[int, str, int, Decimal, int]]:
+    return list(queryset.values_list("produce_id", "unit", "min_quantity", "unit_price", "id"))
+
+
+def global_tier_table() -> TierTable:
+    """All active global tiers, cached until the next tier save."""
+    return CacheManager.get_or_set(
+        tagged_key("business:pricing:global-tiers", [CacheTags.PRICING_TIERS], local=True),
+        lambda: _tier_table(_tier_fields(BusinessPricingTier.objects.filter(business__isnull=True, active=True))),
+        GLOBAL_TIERS_TIMEOUT,
+        local=True,
+    )
+
+
+class TierPriceIndex:
+    """Pricing tiers for a set of produce, resolved in memory.
+
+    Business-specific tiers for ``user`` are loaded with one query; global
+    tiers come from the versioned cache. A business tier beats a global tier,
+    which beats the produce's list price, and within each the tier with the
+    highest ``min_quantity`` not above the ordered quantity wins.
+    """
+
+    def __init__(self, user, produce_ids: Iterable[int]) -> None:
+        produce_ids = set(produce_ids)
+        self.business_tiers = _tier_table(_tier_fields(
+            BusinessPricingTier.objects.filter(business__user=user, produce_id__in=produce_ids, active=True)
+        )) if produce_ids and user.is_authenticated else {}
+        self.global_tiers = global_tier_table() if produce_ids else {}
+
+    def resolve(self, produce: Produce, quantity: int, unit: str) -> PriceQuote:
+        for source, table in (("business", self.business_tiers), ("global", self.global_tiers)):
+            tier = _best_tier(table, produce.id, unit, quantity)
+            if tier is not None:
+                return PriceQuote(unit_price=tier[1], source=source, tier_id=tier[2])
+        return PriceQuote(unit_price=produce.price_per_unit, source="list")
+
+
+def quote_basket(user, items: List[dict]) -> dict:
+    """Price ``items`` (``produce_id``, ``quantity``, ``unit``) without reserving anything.
+
+    Raises :class:`QuoteError` listing any unknown produce ids.
+    """
+    produce_ids = {item["produce_id"] for item in items}
+    produce_by_id = Produce.objects.in_bulk(produce_ids)
+    missing = sorted(produce_ids - set(produce_by_id))
+    if missing:
+        raise QuoteError({"detail": "Unknown produce.", "produce_ids": missing})
+
+    index = TierPriceIndex(user, produce_ids)
+    lines, total = [], Decimal("0")
+    for item in items:
+        produce = produce_by_id[item["produce_id"]]
+        quote = index.resolve(produce, item["quantity"], item["unit"])
+        subtotal = quote.unit_price * Decimal(item["quantity"])
+        total += subtotal
+        lines.append({
+            "produce_id": produce.id,
+            "name": produce.name,
+            "quantity": item["quantity"],
+            "unit": item["unit"],
+            "unit_price": quote.unit_price,
+            "price_source": quote.source,
+            "tier_id": quote.tier_id,
+            "subtotal": subtotal,
+            "in_stock": produce.available and produce.quantity_available >= item["quantity"],
+        })
+    return {"items": lines, "total": total}
+
+
+def _is_transient(exc: OperationalError) -> bool:
+    """True for lock conflicts that succeed when the transaction is simply rerun."""
+    cause = exc.__cause__
+    if cause is not None and cause.args and cause.args[0] in (1205, 1213):
+        return True  # MySQL lock wait timeout / deadlock
+    if getattr(cause, "pgcode", None) in ("40001", "40P01"):
+        return True  # PostgreSQL serialization failure / deadlock
+    return "database is locked" in str(exc)
+
+
+def _lock_produce(produce_ids: Iterable[int]) -> Dict[int, Produce]:
+    # One statement locks every row, always in pk order, so concurrent orders
+    # sharing produce queue up instead of deadlocking.
+    return {
+        produce.pk: produce
+        for produce in Produce.objects.select_for_update().filter(pk__in=set(produce_ids)).order_by("pk")
+    }
+
+
+def _take_stock(locked: Dict[int, Produce], lines: List[OrderLine]) -> None:
+    """Decrement locked produce rows for ``lines`` with one bulk UPDATE."""
+    for line in lines:
+        line.produce.quantity_available -= line.quantity
+        if line.produce.quantity_available <= 0:
+            line.produce.available = False
+    Produce.objects.bulk_update(list(locked.values()), ["quantity_available", "available"])
+    # bulk_update sends no post_save, so the cached catalog is bumped here.
+    bump_tags_on_commit(CacheTags.PRODUCE, *{CacheTags.farmer(produce.farmer_id) for produce in locked.values()})
+    queue_wishlist_stock_sync(pk for pk, produce in locked.items() if not produce.available)
+
+
+def _place_bulk_order(user, items: List[dict], tiers: TierPriceIndex) -> Order:
+    with transaction.atomic():
+        produce_ids = sorted({item["produce_id"] for item in items})
+        locked = _lock_produce(produce_ids)
+        missing = [pk for pk in produce_ids if pk not in locked]
+        if missing:
+            raise CheckoutError({
+                "errors": [{"produce_id": pk, "detail": "Produce not found."} for pk in missing]
+            })
+
+        lines = []
+        for item in items:
+            produce = locked[item["produce_id"]]
+            quote = tiers.resolve(produce, item["quantity"], item["unit"])
+            lines.append(OrderLine(produce, item["quantity"], item["unit"], quote.unit_price))
+        # The rows are locked, so the snapshot check is authoritative here.
+        errors = validate_lines(lines)
+        if errors:
+            raise CheckoutError({"errors": errors})
+
+        _take_stock(locked, lines)
+        return write_order(user, lines)
+
+
+def place_bulk_order(user, items: List[dict]) -> Order:
+    """Create a tier-priced order for ``items`` (``produce_id``, ``quantity``, ``unit``).
+
+    All produce rows are locked with a single ordered ``SELECT ... FOR
+    UPDATE`` and every line is validated before anything is written. Deadlocks
+    and serialization failures rerun the whole transaction, up to
+    ``BULK_ORDER_MAX_ATTEMPTS`` times; inside an outer transaction there is
+    nothing to rerun, so they propagate. Raises :class:`CheckoutError` listing
+    every rejected line.
+    """
+    tiers = TierPriceIndex(user, [item["produce_id"] for item in items])
+    for attempt in range(1, BULK_ORDER_MAX_ATTEMPTS + 1):
+        try:
+            return _place_bulk_order(user, items, tiers)
+        except OperationalError as exc:
+            if attempt == BULK_ORDER_MAX_ATTEMPTS or connection.in_atomic_block or not _is_transient(exc):
+                raise
+            time.sleep(BULK_ORDER_RETRY_DELAY * attempt)
+
+
+def _enqueue_contract_run(run_id: int) -> None:
+    from .tasks import process_contract_run_task
+
+    try:
+        process_contract_run_task.delay(run_id)
+    except Exception:
+        # Staff can resume the run once the broker is reachable again.
+        logger.warning("Could not enqueue contract run %s", run_id, exc_info=True)
+
+
+def start_contract_run(user=None, run_date: Optional[date] = None) -> Tuple[ContractRun, bool]:
+    """Snapshot the contracts due on ``run_date`` into a new run and queue it.
+
+    Returns ``(run, created)``; an unfinished run for the same date is
+    returned instead of starting a second one.
+    """
+    run_date = run_date or date.today()
+    with transaction.atomic():
+        active = ContractRun.objects.filter(
+            run_date=run_date, status__in=[ContractRunStatus.PENDING, ContractRunStatus.RUNNING]
+        ).first()
+        if active is not None:
+            return active, False
+        run = ContractRun.objects.create(run_date=run_date, started_by=user)
+        due = ContractOrder.objects.filter(is_active=True, next_delivery_date__lte=run_date).order_by("pk")
+        items = ContractRunItem.objects.bulk_create(
+            [
+                ContractRunItem(run=run, contract_id=contract_id, due_date=due_date)
+                for contract_id, due_date in due.values_list("id", "next_delivery_date").iterator()
+            ],
+            batch_size=1000,
+        )
+        run.total_contracts = len(items)
+        run.save(update_fields=["total_contracts"])
+        transaction.on_commit(lambda: _enqueue_contract_run(run.pk))
+    return run, True
+
+
+def resume_contract_run(run: ContractRun) -> bool:
+    """Queue the unprocessed contracts of ``run`` again; False if it already finished.
+
+    Safe while chunks are still running: each contract is claimed under a
+    row lock, so nothing is ordered twice.
+    """
+    if run.status == ContractRunStatus.COMPLETED:
+        return False
+    _enqueue_contract_run(run.pk)
+    return True
+
+
+def dispatch_contract_run(run_id: int) -> int:
+    """Split the run's pending contracts into chunk tasks; return how many were queued."""
+    from .tasks import process_contract_chunk_task
+
+    ContractRun.objects.filter(pk=run_id, started_at__isnull=True).update(started_at=timezone.now())
+    ContractRun.objects.filter(pk=run_id, status=ContractRunStatus.PENDING).update(status=ContractRunStatus.RUNNING)
+    pending = list(
+        ContractRunItem.objects.filter(run_id=run_id, status=ContractRunItemStatus.PENDING)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    if not pending:
+        finish_contract_run(run_id)
+        return 0
+    chunks = [pending[i:i + CONTRACT_RUN_CHUNK_SIZE] for i in range(0, len(pending), CONTRACT_RUN_CHUNK_SIZE)]
+    for chunk in chunks:
+        process_contract_chunk_task.delay(run_id, chunk)
+    return len(chunks)
+
+
+def _process_contract_item(item: ContractRunItem, run_date: date) -> None:
+    contract = item.contract
+    with transaction.atomic():
+        # Every run touching this contract serialises on the contract row, so
+        # the status and due date read below cannot change under us.
+        current = (
+            ContractOrder.objects.select_for_update()
+            .filter(pk=contract.pk)
+            .values("is_active", "next_delivery_date")
+            .first()
+        )
+        claimed = ContractRunItem.objects.filter(pk=item.pk, status=ContractRunItemStatus.PENDING)
+        if not claimed.exists():
+            return
+        if current is None or not current["is_active"] or current["next_delivery_date"] != item.due_date:
+            claimed.update(
+                status=ContractRunItemStatus.SKIPPED,
+                error="Contract changed or was already processed.",
+                processed_at=timezone.now(),
+            )
+            return
+
+        contract_items = list(contract.items.all())
+        locked = _lock_produce(line.produce_id for line in contract_items)
+        lines, skipped = [], 0
+        for contract_item in contract_items:
+            produce = locked.get(contract_item.produce_id)
+            if produce is None or produce.quantity_available < contract_item.quantity:
+                skipped += 1
+                continue
+            lines.append(OrderLine(produce, contract_item.quantity, contract_item.unit, contract_item.agreed_unit_price))
+            produce.quantity_available -= contract_item.quantity  # later lines see the reduced stock
+        for line in lines:
+            line.produce.quantity_available += line.quantity
+        order = None
+        if lines:
+            _take_stock(locked, lines)
+            order = write_order(contract.business.user, lines)
+
+        ContractOrder.objects.filter(pk=contract.pk).update(
+            next_delivery_date=run_date + CONTRACT_INTERVALS.get(contract.frequency, timedelta(days=30))
+        )
+        claimed.update(
+            status=ContractRunItemStatus.DONE if order else ContractRunItemStatus.SKIPPED,
+            order=order,
+            skipped_lines=skipped,
+            error="" if order else "No contract line had enough stock.",
+            processed_at=timezone.now(),
+        )
+
+
+def process_contract_chunk(run_id: int, item_ids: List[int]) -> None:
+    """Create the orders for one chunk of a run, one transaction per contract."""
+    run_date = ContractRun.objects.values_list("run_date", flat=True).get(pk=run_id)
+    items = list(
+        ContractRunItem.objects.filter(pk__in=item_ids, status=ContractRunItemStatus.PENDING)
+        .select_related("contract__business__user")
+        .prefetch_related("contract__items")
+        .order_by("pk")
+    )
+    for item in items:
+        for attempt in range(1, BULK_ORDER_MAX_ATTEMPTS + 1):
+            try:
+                _process_contract_item(item, run_date)
+                break
+            except OperationalError as exc:
+                if attempt < BULK_ORDER_MAX_ATTEMPTS and _is_transient(exc):
+                    time.sleep(BULK_ORDER_RETRY_DELAY * attempt)
+                    continue
+                _fail_contract_item(item, exc)
+                break
+            except Exception as exc:
+                _fail_contract_item(item, exc)
+                break
+    finish_contract_run(run_id)
+
+
+def _fail_contract_item(item: ContractRunItem, exc: Exception) -> None:
+    logger.exception("Contract %s failed in run %s", item.contract_id, item.run_id)
+    ContractRunItem.objects.filter(pk=item.pk, status=ContractRunItemStatus.PENDING).update(
+        status=ContractRunItemStatus.FAILED, error=str(exc)[:1000], processed_at=timezone.now()
+    )
+
+
+def finish_contract_run(run_id: int) -> None:
+    """Mark the run completed once no contract is left pending."""
+    if ContractRunItem.objects.filter(run_id=run_id, status=ContractRunItemStatus.PENDING).exists():
+        return
+    ContractRun.objects.filter(pk=run_id).exclude(status=ContractRunStatus.COMPLETED).update(
+        status=ContractRunStatus.COMPLETED, finished_at=timezone.now()
+    )
+
+
+def with_run_progress(queryset):
+    """Annotate contract runs with per-status item counts in the same query."""
+    counts = {
+        f"{status.lower()}_count": Count("items", filter=Q(items__status=status))
+        for status in ContractRunItemStatus.values
+    }
+    return queryset.annotate(**counts)
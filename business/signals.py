@@ -0,0 +1,36 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .invoices import queue_invoice_pdfs
+from orders.models import Order
+from .models import BusinessInvoice, BusinessPricingTier, InvoiceStatus
+from .rollups import record_status_changes
+
+
+# A tier may have moved between global and business scope, so every change bumps.
+invalidate_on_change(BusinessPricingTier, lambda tier: [CacheTags.PRICING_TIERS])
+
+
+@receiver(post_save, sender=BusinessInvoice)
+def render_issued_invoice(sender, instance: BusinessInvoice, **kwargs):
+    # Drafts change freely; the PDF is produced once the invoice is issued and
+    # refreshed on later saves (unchanged content is skipped by the renderer).
+    if instance.status != InvoiceStatus.DRAFT:
+        queue_invoice_pdfs([instance.pk])
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance: Order, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and "status" not in update_fields):
+        return
+    instance._previous_status = Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+
+
+@receiver(post_save, sender=Order)
+def roll_up_order_status(sender, instance: Order, created: bool, **kwargs):
+    # Bulk transitions bypass save() and update the rollups themselves.
+    previous = getattr(instance, "_previous_status", None)
+    if not created and previous and previous != instance.status:
+        record_status_changes([(instance, previous, instance.status)])
+    instance._previous_status = instance.status
@@ -0,0 +1,39 @@
+from celery import shared_task
+from django.conf import settings
+
+from .invoices import render_invoices, render_outstanding_invoices
+from .models import BulkOrderUpload, BusinessInvoice
+from .services import dispatch_contract_run, process_contract_chunk
+from .uploads import process_upload
+
+
+@shared_task
+def process_contract_run_task(run_id: int):
+    """Start or resume a contract run by queueing its pending contracts in chunks."""
+    return dispatch_contract_run(run_id)
+
+
+@shared_task
+def process_contract_chunk_task(run_id: int, item_ids: list):
+    """Create the orders for one chunk of a contract run."""
+    process_contract_chunk(run_id, item_ids)
+
+
+@shared_task
+def render_invoice_pdfs_task(invoice_ids: list):
+    """Render the PDFs of freshly issued invoices."""
+    return render_invoices(BusinessInvoice.objects.filter(pk__in=invoice_ids), settings.INVOICE_PDF_WORKERS)
+
+
+@shared_task
+def render_outstanding_invoices_task():
+    """Nightly: re-render every non-draft invoice whose content changed."""
+    return render_outstanding_invoices(settings.INVOICE_PDF_WORKERS)
+
+
+@shared_task
+def process_bulk_order_upload_task(upload_id: int):
+    """Validate and place a large bulk order upload."""
+    upload = BulkOrderUpload.objects.filter(pk=upload_id).first()
+    if upload is not None:
+        return process_upload(upload).status
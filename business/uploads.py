@@ -0,0 +1,258 @@
+import codecs
+import csv
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from farmers.models import Produce
+from orders.services import CheckoutError
+from .models import BulkOrderUpload, BulkOrderUploadStatus
+from .services import TierPriceIndex, place_bulk_order
+
+logger = logging.getLogger(__name__)
+
+BULK_UPLOAD_FORMATS = (".csv", ".xlsx")
+BULK_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+BULK_UPLOAD_MAX_LINES = 5000
+# Files up to this size are placed during the upload request; larger ones in the background.
+BULK_UPLOAD_INLINE_MAX_BYTES = 64 * 1024
+
+PRODUCE_ID_COLUMNS = ("produce_id", "id")
+PRODUCE_NAME_COLUMNS = ("produce", "name", "product", "product_name")
+
+
+class UploadError(Exception):
+    """The file as a whole cannot be read; the message is shown to the user."""
+
+
+class UploadLine(NamedTuple):
+    line: int
+    reference: str
+    produce_id: Optional[int]
+    name: Optional[str]
+    quantity: int
+    unit: str
+
+
+def _csv_rows(fileobj) -> Iterator[List[str]]:
+    # Decode incrementally; utf-8-sig drops the BOM spreadsheet apps add.
+    yield from csv.reader(codecs.getreader("utf-8-sig")(fileobj))
+
+
+def _xlsx_rows(fileobj) -> Iterator[List[str]]:
+    try:
+        from openpyxl import load_workbook  # type: ignore
+    except ImportError:
+        raise UploadError("XLSX uploads are not available; upload a CSV file instead.")
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception:
+        raise UploadError("The file is not a valid XLSX workbook.")
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def _column(header: List[str], names: Tuple[str, ...]) -> Optional[int]:
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def _cell(cells: List[str], col: Optional[int]) -> str:
+    return cells[col] if col is not None and col < len(cells) else ""
+
+
+def _quantity(raw: str) -> Optional[int]:
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        return None
+    if value != value.to_integral_value() or value <= 0:
+        return None
+    return int(value)
+
+
+def parse_upload(fileobj, file_name: str) -> Tuple[List[UploadLine], List[dict]]:
+    """Read order lines from a CSV or XLSX file, one row at a time.
+
+    The first non-empty row is the header. It needs a ``quantity`` column and
+    a ``produce_id`` and/or ``produce``/``name`` column; ``unit`` is optional.
+    Returns the parsed lines and an error for every row that could not be
+    read, numbered as in the spreadsheet.
+    """
+    rows = _xlsx_rows(fileobj) if file_name.lower().endswith(".xlsx") else _csv_rows(fileobj)
+    try:
+        header, header_line = [], 0
+        for header_line, row in enumerate(rows, start=1):
+            if any(cell.strip() for cell in row):
+                header = [cell.strip().lower().replace(" ", "_") for cell in row]
+                break
+        id_col, name_col = _column(header, PRODUCE_ID_COLUMNS), _column(header, PRODUCE_NAME_COLUMNS)
+        quantity_col, unit_col = _column(header, ("quantity", "qty")), _column(header, ("unit",))
+        if quantity_col is None or (id_col is None and name_col is None):
+            raise UploadError("The header row needs a quantity column and a produce_id or produce column.")
+
+        lines, errors = [], []
+        for line, row in enumerate(rows, start=header_line + 1):
+            cells = [cell.strip() for cell in row]
+            if not any(cells):
+                continue
+            if len(lines) + len(errors) >= BULK_UPLOAD_MAX_LINES:
+                raise UploadError(f"Files may contain at most {BULK_UPLOAD_MAX_LINES} lines.")
+            produce_id, name = _cell(cells, id_col), _cell(cells, name_col)
+            reference = produce_id or name
+            if produce_id and not produce_id.isdigit():
+                name, produce_id = name or produce_id, ""
+            quantity = _quantity(_cell(cells, quantity_col))
+            if not reference:
+                errors.append({"line": line, "detail": "Missing produce."})
+            elif quantity is None:
+                errors.append({"line": line, "produce": reference, "detail": "Quantity must be a whole number above zero."})
+            else:
+                lines.append(UploadLine(
+                    line, reference, int(produce_id) if produce_id else None, name or None,
+                    quantity, _cell(cells, unit_col),
+                ))
+        return lines, errors
+    except (csv.Error, UnicodeDecodeError):
+        raise UploadError("The file is not a valid UTF-8 CSV file.")
+
+
+def validate_upload_lines(user, lines: List[UploadLine]) -> Tuple[List[dict], List[dict]]:
+    """Resolve produce for every line with one query and check stock and pricing.
+
+    Returns the bulk order items and the errors of every line that failed.
+    """
+    ids = {line.produce_id for line in lines if line.produce_id is not None}
+    names = {line.name for line in lines if line.produce_id is None}
+    matches = list(Produce.objects.filter(Q(pk__in=ids) | Q(name__in=names))) if lines else []
+    by_id = {produce.pk: produce for produce in matches}
+    by_name: Dict[str, List[Produce]] = {}
+    for produce in matches:
+        by_name.setdefault(produce.name, []).append(produce)
+
+    resolved, errors = [], []
+    for line in lines:
+        if line.produce_id is not None:
+            produce = by_id.get(line.produce_id)
+            if produce is None:
+                errors.append({"line": line.line, "produce": line.reference, "detail": "Produce not found."})
+                continue
+        else:
+            candidates = by_name.get(line.name, [])
+            if len(candidates) != 1:
+                errors.append({
+                    "line": line.line,
+                    "produce": line.reference,
+                    "detail": "Produce not found." if not candidates
+                    else "Several produce have this name; use produce_id.",
+                    **({"produce_ids": sorted(p.pk for p in candidates)} if candidates else {}),
+                })
+                continue
+            produce = candidates[0]
+        resolved.append((line, produce, line.unit or produce.unit))
+
+    requested: Dict[int, int] = {}
+    for line, produce, _ in resolved:
+        requested[produce.pk] = requested.get(produce.pk, 0) + line.quantity
+    tiers = TierPriceIndex(user, requested)
+    items = []
+    for line, produce, unit in resolved:
+        if unit != produce.unit and tiers.resolve(produce, line.quantity, unit).source == "list":
+            errors.append({
+                "line": line.line, "produce": line.reference, "produce_id": produce.pk,
+                "detail": f"No price per {unit} at this quantity; {produce.name} is sold per {produce.unit}.",
+            })
+        elif produce.quantity_available < requested[produce.pk]:
+            errors.append({
+                "line": line.line, "produce": line.reference, "produce_id": produce.pk,
+                "available": produce.quantity_available, "requested": requested[produce.pk],
+                "detail": "Insufficient stock",
+            })
+        else:
+            items.append({"line": line.line, "produce_id": produce.pk, "quantity": line.quantity, "unit": unit})
+    return items, errors
+
+
+def _checkout_errors(payload: dict, items: List[dict]) -> List[dict]:
+    """Attach line numbers to the per-produce errors of a rejected bulk order."""
+    if "errors" not in payload:
+        return [{"detail": payload.get("detail", "The order could not be placed.")}]
+    lines: Dict[int, List[int]] = {}
+    for item in items:
+        lines.setdefault(item["produce_id"], []).append(item["line"])
+    return [
+        {"line": line, **error}
+        for error in payload["errors"]
+        for line in lines.get(error.get("produce_id"), [None])
+    ]
+
+
+def process_upload(upload: BulkOrderUpload) -> BulkOrderUpload:
+    """Parse, validate and place an upload; a no-op unless it is still pending."""
+    claimed = BulkOrderUpload.objects.filter(pk=upload.pk, status=BulkOrderUploadStatus.PENDING).update(
+        status=BulkOrderUploadStatus.PROCESSING
+    )
+    if not claimed:
+        upload.refresh_from_db()
+        return upload
+
+    order, errors, line_count = None, [], 0
+    try:
+        with upload.file.open("rb") as fileobj:
+            lines, errors = parse_upload(fileobj, upload.file_name)
+        line_count = len(lines) + len(errors)
+        items, line_errors = validate_upload_lines(upload.user, lines)
+        errors += line_errors
+        if not errors and not items:
+            errors = [{"detail": "The file has no order lines."}]
+        if not errors:
+            try:
+                order = place_bulk_order(
+                    upload.user, [{key: item[key] for key in ("produce_id", "quantity", "unit")} for item in items]
+                )
+            except CheckoutError as exc:
+                errors = _checkout_errors(exc.payload, items)
+    except UploadError as exc:
+        errors = [{"detail": str(exc)}]
+    except Exception:
+        logger.exception("Bulk order upload %s failed", upload.pk)
+        errors = [{"detail": "The file could not be processed."}]
+
+    upload.status = BulkOrderUploadStatus.FAILED if errors else BulkOrderUploadStatus.COMPLETED
+    upload.errors = sorted(errors, key=lambda error: error.get("line") or 0)
+    upload.line_count = line_count
+    upload.order = order
+    upload.finished_at = timezone.now()
+    upload.save(update_fields=["status", "errors", "line_count", "order", "finished_at"])
+    return upload
+
+
+def _enqueue_upload(upload_id: int) -> None:
+    from .tasks import process_bulk_order_upload_task
+
+    try:
+        process_bulk_order_upload_task.delay(upload_id)
+    except Exception:
+        logger.warning("Could not enqueue bulk order upload %s", upload_id, exc_info=True)
+
+
+def start_bulk_order_upload(user, file) -> Tuple[BulkOrderUpload, bool]:
+    """Store an uploaded file and place it; returns ``(upload, finished)``.
+
+    Small files are processed before returning; larger ones are queued for
+    the background worker and can be polled on the upload status endpoint.
+    """
+    upload = BulkOrderUpload.objects.create(user=user, file=file, file_name=file.name[:255])
+    if file.size <= BULK_UPLOAD_INLINE_MAX_BYTES:
+        return process_upload(upload), True
+    transaction.on_commit(lambda: _enqueue_upload(upload.pk))
+    return upload, False
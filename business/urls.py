@@ -9,8 +9,15 @@ from .views import (
     ContractOrderDetailView,
     BusinessInvoiceListView,
     BusinessInvoiceDetailView,
+    BusinessInvoicePdfView,
     create_bulk_order,
+    quote_bulk_order,
+    upload_bulk_order,
+    BulkOrderUploadDetailView,
     run_contract_orders,
+    ContractRunListView,
+    ContractRunDetailView,
+    resume_contract_run_view,
     logistics_dashboard,
     business_analytics,
 )
@@ -27,13 +34,20 @@ urlpatterns = [
     path("contracts/", ContractOrderListCreateView.as_view(), name="business-contracts"),
     path("contracts/<int:pk>/", ContractOrderDetailView.as_view(), name="business-contract-detail"),
     path("contracts/run-cycle/", run_contract_orders, name="business-contracts-run"),
+    path("contracts/runs/", ContractRunListView.as_view(), name="business-contract-runs"),
+    path("contracts/runs/<int:pk>/", ContractRunDetailView.as_view(), name="business-contract-run-detail"),
+    path("contracts/runs/<int:pk>/resume/", resume_contract_run_view, name="business-contract-run-resume"),
 
     # Invoices
     path("invoices/", BusinessInvoiceListView.as_view(), name="business-invoices"),
     path("invoices/<int:pk>/", BusinessInvoiceDetailView.as_view(), name="business-invoice-detail"),
+    path("invoices/<int:pk>/pdf/", BusinessInvoicePdfView.as_view(), name="business-invoice-pdf"),
 
     # Bulk orders
     path("bulk-orders/", create_bulk_order, name="business-bulk-order"),
+    path("bulk-orders/quote/", quote_bulk_order, name="business-bulk-order-quote"),
+    path("bulk-orders/upload/", upload_bulk_order, name="business-bulk-order-upload"),
+    path("bulk-orders/uploads/<int:pk>/", BulkOrderUploadDetailView.as_view(), name="business-bulk-order-upload-detail"),
 
     # Logistics dashboard & analytics
     path("logistics/", logistics_dashboard, name="business-logistics"),
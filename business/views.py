@@ -1,12 +1,16 @@
-from datetime import date, timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
-from django.db import transaction
-from django.db.models import Sum, Count
+from django.core.files.storage import default_storage
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
 from rest_framework import generics, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
+from api.idempotency import idempotent
 from userprofiles.models import UserType
 from .models import (
     BusinessProfile,
@@ -14,6 +18,11 @@ from .models import (
     ContractOrder,
     ContractOrderItem,
     BusinessInvoice,
+    BusinessDailyRollup,
+    ContractRun,
+    InvoiceStatus,
+    BulkOrderUpload,
+    BulkOrderUploadStatus,
 )
 from .serializers import (
     BusinessProfileSerializer,
@@ -21,11 +30,27 @@ from .serializers import (
     ContractOrderSerializer,
     BusinessInvoiceSerializer,
     BulkOrderCreateSerializer,
+    BulkOrderUploadCreateSerializer,
+    BulkOrderUploadSerializer,
+    ContractRunSerializer,
+    BusinessAnalyticsQuerySerializer,
+    LogisticsQuerySerializer,
 )
-from orders.models import Order, OrderItem, OrderStatus
-from orders.serializers import OrderSerializer
-from farmers.models import Produce
-from farmers.models import FarmerEarnings
+from orders.models import Order
+from orders.serializers import OrderSerializer, order_items_prefetch
+from orders.services import CheckoutError
+from .services import (
+    QuoteError,
+    place_bulk_order,
+    quote_basket,
+    resume_contract_run,
+    start_contract_run,
+    with_run_progress,
+)
+from .invoices import invoice_pdf_etag, queue_invoice_pdfs
+from .uploads import start_bulk_order_upload
+from farmfresh.pagination import CursorOrPageNumberPagination
+from farmfresh.streaming import keyset_batches, ndjson_response, stream_file
 from notifications.utils import notify_user
 from deliveries.models import Delivery
 
@@ -55,9 +80,10 @@ class MyBusinessProfileView(generics.RetrieveUpdateAPIView):
 class MyBusinessOrdersView(generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [IsBusinessOrStaff]
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related("items")
+        return Order.objects.filter(user=self.request.user).prefetch_related(order_items_prefetch())
 
 
 class PricingTierListCreateView(generics.ListCreateAPIView):
@@ -110,164 +136,236 @@ class BusinessInvoiceDetailView(generics.RetrieveAPIView):
         return BusinessInvoice.objects.filter(business__user=self.request.user).select_related("order", "business")
 
 
+class BusinessInvoicePdfView(BusinessInvoiceDetailView):
+    """Stream the invoice PDF with ``Range`` and ``ETag`` support."""
+
+    def retrieve(self, request, *args, **kwargs):
+        invoice = self.get_object()
+        if invoice.status == InvoiceStatus.DRAFT:
+            return Response({"detail": "Draft invoices have no PDF."}, status=status.HTTP_404_NOT_FOUND)
+        if not (invoice.pdf_path and default_storage.exists(invoice.pdf_path)):
+            queue_invoice_pdfs([invoice.pk])
+            return Response({"detail": "The PDF is being generated."}, status=status.HTTP_202_ACCEPTED)
+        response = stream_file(
+            request,
+            default_storage.open(invoice.pdf_path, "rb"),
+            default_storage.size(invoice.pdf_path),
+            etag=invoice_pdf_etag(invoice.pdf_path),
+            content_type="application/pdf",
+            filename=f"invoice-{invoice.pk}.pdf",
+        )
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
 @api_view(["POST"])
 @permission_classes([IsBusinessOrStaff])
+@idempotent
 def create_bulk_order(request):
     """Create an order with volume pricing and bulk units for business users."""
     serializer = BulkOrderCreateSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    items_data = serializer.validated_data["items"]
-
-    with transaction.atomic():
-        order = Order.objects.create(user=request.user, status=OrderStatus.PENDING)
-        total = Decimal("0")
-
-        for item in items_data:
-            produce = Produce.objects.select_for_update().get(id=item["produce_id"])  # lock row
-            quantity = int(item["quantity"])  # bulk quantity
-            unit = item["unit"]
-
-            if quantity <= 0:
-                transaction.set_rollback(True)
-                return Response({"detail": f"Invalid quantity for produce {produce.id}"}, status=status.HTTP_400_BAD_REQUEST)
-            if produce.quantity_available < quantity:
-                transaction.set_rollback(True)
-                return Response({"detail": f"Insufficient stock for {produce.name}", "available": produce.quantity_available}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Determine unit price considering pricing tiers (business-specific first, then global)
-            price = produce.price_per_unit
-            tier = (
-                BusinessPricingTier.objects.filter(business__user=request.user, produce=produce, min_quantity__lte=quantity, unit=unit, active=True)
-                .order_by("-min_quantity")
-                .first()
-            ) or (
-                BusinessPricingTier.objects.filter(business__isnull=True, produce=produce, min_quantity__lte=quantity, unit=unit, active=True)
-                .order_by("-min_quantity")
-                .first()
-            )
-            if tier:
-                price = tier.unit_price
-
-            subtotal = price * Decimal(quantity)
-
-            # Create order item
-            OrderItem.objects.create(
-                order=order,
-                produce=produce,
-                product_name=produce.name,
-                unit=unit,
-                price_per_unit=price,
-                quantity=quantity,
-                subtotal=subtotal,
-            )
-
-            # Create farmer earnings
-            FarmerEarnings.objects.create(
-                farmer=produce.farmer,
-                order=order,
-                produce=produce,
-                quantity=quantity,
-                unit_price=price,
-                total_amount=subtotal,
-                status='PENDING'
-            )
-
-            # Decrement stock
-            produce.quantity_available -= quantity
-            if produce.quantity_available <= 0:
-                produce.available = False
-            produce.save(update_fields=["quantity_available", "available"]) 
-
-            total += subtotal
-
-        order.total_amount = total
-        order.save(update_fields=["total_amount"]) 
-
-        # Create delivery placeholder
-        Delivery.objects.get_or_create(order=order)
-
+    try:
+        order = place_bulk_order(request.user, serializer.validated_data["items"])
+    except CheckoutError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
     return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
 
+@api_view(["POST"])
+@permission_classes([IsBusinessOrStaff])
+@parser_classes([MultiPartParser])
+@idempotent
+def upload_bulk_order(request):
+    """Place a bulk order from a CSV or XLSX file of produce and quantities.
+
+    Small files are validated and placed right away: 201 with the upload and
+    its order, or 400 with every failing line. Larger files are processed in
+    the background (202); poll the upload until it has finished.
+    """
+    serializer = BulkOrderUploadCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    upload, finished = start_bulk_order_upload(request.user, serializer.validated_data["file"])
+    data = BulkOrderUploadSerializer(upload).data
+    if not finished:
+        return Response(data, status=status.HTTP_202_ACCEPTED)
+    if upload.status != BulkOrderUploadStatus.COMPLETED:
+        return Response(data, status=status.HTTP_400_BAD_REQUEST)
+    data["order"] = OrderSerializer(upload.order).data
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+class BulkOrderUploadDetailView(generics.RetrieveAPIView):
+    """Status and line errors of one of the caller's bulk order uploads."""
+    serializer_class = BulkOrderUploadSerializer
+    permission_classes = [IsBusinessOrStaff]
+
+    def get_queryset(self):
+        return BulkOrderUpload.objects.filter(user=self.request.user)
+
+
+@api_view(["POST"])
+@permission_classes([IsBusinessOrStaff])
+def quote_bulk_order(request):
+    """Price a basket with the caller's volume tiers without placing an order."""
+    serializer = BulkOrderCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        quote = quote_basket(request.user, serializer.validated_data["items"])
+    except QuoteError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
+    return Response(quote)
+
+
 @api_view(["POST"])  # admin-only run cycle
 @permission_classes([permissions.IsAdminUser])
 def run_contract_orders(request):
-    """Process active contract orders due today and create Orders + Deliveries."""
-    today = date.today()
-    processed = 0
-    for contract in ContractOrder.objects.select_related("business").prefetch_related("items").filter(is_active=True, next_delivery_date__lte=today):
-        with transaction.atomic():
-            order = Order.objects.create(user=contract.business.user, status=OrderStatus.PENDING)
-            total = Decimal("0")
-            for item in contract.items.select_related("produce"):
-                produce = item.produce
-                if produce.quantity_available < item.quantity:
-                    continue
-                subtotal = item.agreed_unit_price * Decimal(item.quantity)
-                OrderItem.objects.create(
-                    order=order,
-                    produce=produce,
-                    product_name=produce.name,
-                    unit=item.unit,
-                    price_per_unit=item.agreed_unit_price,
-                    quantity=item.quantity,
-                    subtotal=subtotal,
-                )
-                FarmerEarnings.objects.create(
-                    farmer=produce.farmer,
-                    order=order,
-                    produce=produce,
-                    quantity=item.quantity,
-                    unit_price=item.agreed_unit_price,
-                    total_amount=subtotal,
-                    status='PENDING'
-                )
-                produce.quantity_available -= item.quantity
-                if produce.quantity_available <= 0:
-                    produce.available = False
-                produce.save(update_fields=["quantity_available", "available"]) 
-                total += subtotal
-
-            order.total_amount = total
-            order.save(update_fields=["total_amount"]) 
-            Delivery.objects.get_or_create(order=order)
-
-            # advance next date
-            if contract.frequency == 'WEEKLY':
-                contract.next_delivery_date = today + timedelta(days=7)
-            elif contract.frequency == 'BIWEEKLY':
-                contract.next_delivery_date = today + timedelta(days=14)
-            else:
-                contract.next_delivery_date = today + timedelta(days=30)
-            contract.save(update_fields=["next_delivery_date"]) 
-            processed += 1
+    """Start a background run over the contracts due today and return it (202).
+
+    If today's run has not finished yet it is returned instead of starting
+    another one.
+    """
+    run, created = start_contract_run(request.user)
+    run = with_run_progress(ContractRun.objects.filter(pk=run.pk)).get()
+    return Response(
+        ContractRunSerializer(run).data,
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+    )
 
-    return Response({"processed": processed})
 
+class ContractRunListView(generics.ListAPIView):
+    serializer_class = ContractRunSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_queryset(self):
+        return with_run_progress(ContractRun.objects.all()).order_by("-created_at", "-id")
+
+
+class ContractRunDetailView(generics.RetrieveAPIView):
+    serializer_class = ContractRunSerializer
+    permission_classes = [permissions.IsAdminUser]
 
-@api_view(["GET"])  # basic logistics dashboard
+    def get_queryset(self):
+        return with_run_progress(ContractRun.objects.all())
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAdminUser])
+def resume_contract_run_view(request, pk):
+    """Re-queue the contracts of an unfinished run, e.g. after a worker crash."""
+    run = generics.get_object_or_404(ContractRun, pk=pk)
+    if not resume_contract_run(run):
+        return Response({"detail": "Run already completed."}, status=status.HTTP_400_BAD_REQUEST)
+    run = with_run_progress(ContractRun.objects.filter(pk=run.pk)).get()
+    return Response(ContractRunSerializer(run).data, status=status.HTTP_202_ACCEPTED)
+
+
+LOGISTICS_ORDER_FIELDS = ["id", "status", "created_at"]
+LOGISTICS_DELIVERY_FIELDS = ["id", "order_id", "status", "scheduled_date", "notes"]
+
+
+@api_view(["GET"])  # logistics dashboard
 @permission_classes([IsBusinessOrStaff])
 def logistics_dashboard(request):
-    orders = Order.objects.filter(user=request.user).values("id", "status", "created_at")
-    deliveries = Delivery.objects.filter(order__user=request.user).values("id", "order_id", "status", "scheduled_date", "notes")
-    return Response({"orders": list(orders), "deliveries": list(deliveries)})
+    """The caller's orders and their deliveries, optionally limited to ``?start=``/``?end=``.
+
+    ``?output=ndjson`` streams one JSON object per line, read in keyset
+    batches so memory stays flat however long the history; ``&layout=columns``
+    emits each batch as ``{"type", "columns": {field: [values]}}`` instead of
+    one line per row. The stream ends with a ``{"type": "end"}`` line carrying
+    the row counts.
+    """
+    query = LogisticsQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    params = query.validated_data
+
+    orders = Order.objects.filter(user=request.user)
+    if params.get("start"):
+        orders = orders.filter(created_at__gte=_day_start(params["start"]))
+    if params.get("end"):
+        orders = orders.filter(created_at__lt=_day_start(params["end"] + timedelta(days=1)))
+    deliveries = Delivery.objects.filter(order__in=orders.values("id"))
+
+    if params["output"] == "json":
+        return Response({
+            "orders": list(orders.order_by("id").values(*LOGISTICS_ORDER_FIELDS)),
+            "deliveries": list(deliveries.order_by("id").values(*LOGISTICS_DELIVERY_FIELDS)),
+        })
+    return ndjson_response(_logistics_lines(
+        [("order", orders, LOGISTICS_ORDER_FIELDS), ("delivery", deliveries, LOGISTICS_DELIVERY_FIELDS)],
+        columns=params["layout"] == "columns",
+    ))
+
+
+def _logistics_lines(sources, columns: bool):
+    counts = {}
+    for kind, queryset, fields in sources:
+        counts[kind] = 0
+        for batch in keyset_batches(queryset, fields):
+            counts[kind] += len(batch)
+            if columns:
+                yield {"type": kind, "columns": {field: [row[field] for row in batch] for field in fields}}
+            else:
+                for row in batch:
+                    yield {"type": kind, **row}
+    yield {"type": "end", "counts": counts}
 
 
-@api_view(["GET"])  # simple analytics
+ANALYTICS_PERIODS = {
+    "day": F("day"),
+    "week": TruncWeek("day"),
+    "month": TruncMonth("day"),
+}
+
+
+@api_view(["GET"])  # analytics from the daily rollups
 @permission_classes([IsBusinessOrStaff])
 def business_analytics(request):
-    totals = (
-        Order.objects.filter(user=request.user)
-        .aggregate(total_spent=Sum("total_amount"), total_orders=Count("id"))
+    """Spend totals, top items and an optional day/week/month series.
+
+    Reads ``BusinessDailyRollup`` rows only; ``?start=`` / ``?end=`` (dates,
+    inclusive) narrow the range and ``?period=`` adds the series.
+    """
+    query = BusinessAnalyticsQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    start, end, period = (query.validated_data.get(key) for key in ("start", "end", "period"))
+
+    rollups = BusinessDailyRollup.objects.filter(business__user=request.user)
+    orders = Order.objects.filter(user=request.user)
+    if start:
+        rollups = rollups.filter(day__gte=start)
+        orders = orders.filter(created_at__gte=_day_start(start))
+    if end:
+        rollups = rollups.filter(day__lte=end)
+        orders = orders.filter(created_at__lt=_day_start(end + timedelta(days=1)))
+
+    totals = rollups.aggregate(
+        total_spent=Sum("amount"), delivered_spent=Sum("delivered_amount"), total_quantity=Sum("quantity")
     )
     top_items = (
-        OrderItem.objects.filter(order__user=request.user)
-        .values("product_name")
-        .annotate(total_qty=Sum("quantity"))
-        .order_by("-total_qty")[:10]
+        rollups.values("produce_id")
+        .annotate(product_name=Max("product_name"), total_qty=Sum("quantity"))
+        .order_by("-total_qty", "produce_id")[:10]
     )
-    return Response({
-        "total_spent": totals.get("total_spent") or Decimal("0.00"),
-        "total_orders": totals.get("total_orders") or 0,
+    data = {
+        "start": start,
+        "end": end,
+        "total_spent": totals["total_spent"] or Decimal("0.00"),
+        "delivered_spent": totals["delivered_spent"] or Decimal("0.00"),
+        "total_quantity": totals["total_quantity"] or 0,
+        "total_orders": orders.count(),
         "top_items": list(top_items),
-    })
+    }
+    if period:
+        data["period"] = period
+        data["series"] = list(
+            rollups.annotate(period_start=ANALYTICS_PERIODS[period])
+            .values("period_start")
+            .annotate(spent=Sum("amount"), delivered_spent=Sum("delivered_amount"), quantity=Sum("quantity"))
+            .order_by("period_start")
+        )
+    return Response(data)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
@@ -1,17 +1,24 @@
+from django.conf import settings
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum, Count, Avg
 from django.utils import timezone
 from datetime import timedelta
 
+from farmfresh.pagination import CachedCountPaginator
+from farmfresh.streaming import keyset_batches
 from .models import (
-    ConsumerProfile, ConsumerWishlist, ConsumerReview, 
+    BackInStockAlert, ConsumerProfile, ConsumerWishlist, ConsumerReview, 
     ConsumerAnalytics, ConsumerPreference
 )
+from .analytics import materialize_consumer_analytics
+from .wishlist import sync_wishlist_stock
 
 
 @admin.register(ConsumerProfile)
 class ConsumerProfileAdmin(admin.ModelAdmin):
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     list_display = [
         'user', 'total_spent', 'total_orders', 'average_order_value',
         'organic_preference', 'local_preference', 'created_at'
@@ -93,6 +100,14 @@ class ConsumerWishlistAdmin(admin.ModelAdmin):
         obj.update_availability()
 
 
+@admin.register(BackInStockAlert)
+class BackInStockAlertAdmin(admin.ModelAdmin):
+    list_display = ['consumer', 'produce', 'created_at', 'sent_at']
+    list_filter = ['sent_at']
+    list_select_related = ['consumer__user', 'produce']
+    raw_id_fields = ['consumer', 'produce']
+
+
 @admin.register(ConsumerReview)
 class ConsumerReviewAdmin(admin.ModelAdmin):
     list_display = [
@@ -137,17 +152,17 @@ class ConsumerAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['created_at', 'updated_at']
     search_fields = ['consumer__user__username', 'consumer__user__email']
     readonly_fields = [
-        'monthly_spending', 'yearly_spending', 'top_produce_categories',
-        'seasonal_preferences', 'preferred_delivery_days', 'delivery_success_rate',
-        'last_login', 'total_logins', 'days_since_last_order', 'created_at', 'updated_at'
+        'monthly_spending', 'yearly_spending', 'weekly_orders', 'order_frequency', 'average_order_size',
+        'top_produce_categories', 'seasonal_preferences', 'preferred_delivery_days', 'delivery_success_rate',
+        'last_login', 'total_logins', 'days_since_last_order', 'materialized_at', 'created_at', 'updated_at'
     ]
     
     fieldsets = (
         ('Consumer Information', {
-            'fields': ('consumer', 'created_at', 'updated_at')
+            'fields': ('consumer', 'materialized_at', 'created_at', 'updated_at')
         }),
         ('Spending Analytics', {
-            'fields': ('monthly_spending', 'yearly_spending'),
+            'fields': ('monthly_spending', 'yearly_spending', 'weekly_orders'),
             'classes': ('collapse',)
         }),
         ('Order Analytics', {
@@ -228,22 +243,20 @@ class ConsumerPreferenceAdmin(admin.ModelAdmin):
 # Custom admin actions
 @admin.action(description="Update wishlist availability")
 def update_wishlist_availability(modeladmin, request, queryset):
-    """Update availability for selected wishlist items."""
-    updated = 0
-    for wishlist_item in queryset:
-        wishlist_item.update_availability()
-        updated += 1
-    modeladmin.message_user(request, f"Updated availability for {updated} wishlist items.")
+    """Update availability for the produce of the selected wishlist items."""
+    produce_ids = set(queryset.values_list('produce_id', flat=True))
+    restocked = sync_wishlist_stock(produce_ids)
+    modeladmin.message_user(
+        request, f"Updated wishlist availability for {len(produce_ids)} produce; {restocked} items are back in stock."
+    )
 
 
 @admin.action(description="Recalculate consumer analytics")
 def recalculate_consumer_analytics(modeladmin, request, queryset):
-    """Recalculate analytics for selected consumers."""
+    """Recalculate analytics for selected consumers, in batches."""
     updated = 0
-    for consumer_profile in queryset:
-        # This would trigger analytics recalculation
-        # Implementation would depend on your analytics logic
-        updated += 1
+    for batch in keyset_batches(queryset, ['id', 'user_id'], settings.CONSUMER_ANALYTICS_BATCH_SIZE):
+        updated += materialize_consumer_analytics([row['user_id'] for row in batch])
     modeladmin.message_user(request, f"Recalculated analytics for {updated} consumers.")
 
 
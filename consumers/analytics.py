@@ -0,0 +1,247 @@
+"""Materialized consumer analytics.
+
+``ConsumerAnalytics`` rows (and the order totals on ``ConsumerProfile``) are
+computed from orders, order items and deliveries, so dashboards read one row
+instead of aggregating order history. Order creation, order status changes
+and delivery status changes queue a refresh of the consumer; refreshes within
+``CONSUMER_ANALYTICS_DELAY_SECONDS`` of each other are coalesced into one
+delayed job, and each job recomputes up to ``CONSUMER_ANALYTICS_BATCH_SIZE``
+consumers with a fixed number of grouped queries. ``manage.py
+rebuild_consumer_analytics`` recomputes every consumer in batches.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Coalesce, ExtractIsoWeekDay, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from deliveries.models import Delivery, DeliveryStatus
+from farmfresh.aggregation import time_buckets_by
+from farmfresh.streaming import keyset_batches
+from orders.models import Order, OrderItem, OrderStatus
+from .models import ConsumerAnalytics, ConsumerProfile
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "consumer-analytics:pending:{}"
+MONTHS = 12
+WEEKS = 8
+TOP_PRODUCE = 5
+TOP_SEASONAL = 3
+TOP_DELIVERY_DAYS = 3
+SEASONS = {
+    12: "winter", 1: "winter", 2: "winter",
+    3: "spring", 4: "spring", 5: "spring",
+    6: "summer", 7: "summer", 8: "summer",
+    9: "autumn", 10: "autumn", 11: "autumn",
+}
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+ANALYTICS_FIELDS = [
+    "monthly_spending", "yearly_spending", "weekly_orders", "order_frequency", "average_order_size",
+    "top_produce_categories", "seasonal_preferences", "preferred_delivery_days", "delivery_success_rate",
+    "days_since_last_order", "materialized_at", "updated_at",
+]
+PROFILE_FIELDS = ["total_spent", "total_orders", "average_order_value", "last_order_date", "updated_at"]
+MAX_ORDER_FREQUENCY = Decimal("999.99")
+
+
+def _chunks(ids: List[int], size: int) -> List[List[int]]:
+    return [ids[i:i + size] for i in range(0, len(ids), size)]
+
+
+def queue_consumer_analytics(user_ids: Iterable[int]) -> None:
+    """Refresh the analytics of ``user_ids`` shortly after the current transaction commits."""
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        transaction.on_commit(lambda: _schedule_refresh(user_ids))
+
+
+def _schedule_refresh(user_ids: List[int]) -> None:
+    from .tasks import refresh_consumer_analytics_task
+
+    delay = settings.CONSUMER_ANALYTICS_DELAY_SECONDS
+    # Business and farmer buyers have no consumer analytics; users that
+    # already have a refresh scheduled are picked up by it.
+    consumers = ConsumerProfile.objects.filter(user_id__in=user_ids).order_by("user_id").values_list("user_id", flat=True)
+    due = [user_id for user_id in consumers if cache.add(PENDING_KEY.format(user_id), 1, delay)]
+    for chunk in _chunks(due, settings.CONSUMER_ANALYTICS_BATCH_SIZE):
+        try:
+            refresh_consumer_analytics_task.apply_async((chunk,), countdown=delay)
+        except Exception:
+            # The nightly rebuild catches these consumers up.
+            cache.delete_many([PENDING_KEY.format(user_id) for user_id in chunk])
+            logger.warning("Could not enqueue consumer analytics refresh for %s", chunk, exc_info=True)
+
+
+def refresh_consumer_analytics(user_ids: Iterable[int]) -> int:
+    """Recompute the analytics of ``user_ids`` (the body of the delayed job)."""
+    user_ids = sorted(set(user_ids))
+    # Cleared first, so events from here on schedule a new refresh.
+    cache.delete_many([PENDING_KEY.format(user_id) for user_id in user_ids])
+    return materialize_consumer_analytics(user_ids)
+
+
+def _season_rankings(quantities: Dict[str, Dict[str, int]]) -> Dict[str, List[str]]:
+    return {
+        season: sorted(names, key=lambda name: (-names[name], name))[:TOP_SEASONAL]
+        for season, names in quantities.items()
+    }
+
+
+def _delivery_success_rate(delivered: int, due: int) -> Decimal:
+    if not due:
+        return Decimal("100.00")
+    return (Decimal(delivered) * 100 / due).quantize(Decimal("0.01"))
+
+
+def _order_frequency(orders: int, first: Optional[datetime], now: datetime) -> Decimal:
+    if not orders:
+        return Decimal("0.00")
+    first, today = timezone.localtime(first), timezone.localtime(now)
+    months = max(1, (today.year - first.year) * 12 + today.month - first.month + 1)
+    return min(MAX_ORDER_FREQUENCY, (Decimal(orders) / months).quantize(Decimal("0.01")))
+
+
+@transaction.atomic
+def materialize_consumer_analytics(user_ids: Iterable[int], now: Optional[datetime] = None) -> int:
+    """Recompute analytics and order totals of the consumers among ``user_ids``; return how many.
+
+    Runs a fixed number of grouped queries whatever the number of users and
+    orders; callers bound the batch size. Users without a consumer profile
+    are skipped, and consumers without an analytics row get one.
+
+    - ``monthly_spending`` / ``weekly_orders``: the last 12 calendar months
+      and 8 ISO weeks, keyed ``YYYY-MM`` / ``YYYY-Www``;
+    - ``order_frequency``: orders per calendar month since the first order;
+    - ``top_produce_categories`` / ``seasonal_preferences``: produce names
+      ranked by quantity ordered, overall and per season;
+    - ``preferred_delivery_days``: weekdays of completed deliveries;
+    - ``delivery_success_rate``: share of confirmed orders scheduled before
+      today whose delivery was completed.
+    """
+    now = now or timezone.now()
+    profiles = dict(
+        ConsumerProfile.objects.filter(user_id__in=set(user_ids)).values_list("user_id", "id")
+    )
+    if not profiles:
+        return 0
+    users = list(profiles)
+    orders = Order.objects.filter(user_id__in=users)
+
+    totals = {
+        row["user_id"]: row
+        for row in orders.values("user_id").annotate(
+            count=Count("id"), spent=Sum("total_amount"),
+            first=Min("created_at"), last=Max("created_at"),
+        ).order_by()
+    }
+    months = time_buckets_by(orders, "user_id", "month", MONTHS, now=now, total=Sum("total_amount"))
+    weeks = time_buckets_by(orders, "user_id", "week", WEEKS, now=now, count=Count("id"))
+    years: Dict[int, Dict[str, float]] = defaultdict(dict)
+    for row in orders.values("user_id", year=ExtractYear("created_at")).annotate(
+        total=Sum("total_amount")
+    ).order_by():
+        years[row["user_id"]][str(row["year"])] = float(row["total"] or 0)
+
+    produce: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    seasonal: Dict[int, Dict[str, Dict[str, int]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    for row in OrderItem.objects.filter(order__user_id__in=users, produce__isnull=False).values(
+        "order__user_id", "produce__name", month=ExtractMonth("order__created_at"),
+    ).annotate(quantity=Sum("quantity")).order_by():
+        user_id, name = row["order__user_id"], row["produce__name"]
+        produce[user_id][name] += row["quantity"]
+        seasonal[user_id][SEASONS[row["month"]]][name] += row["quantity"]
+
+    today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    delivered = Q(status=DeliveryStatus.DELIVERED)
+    deliveries = {
+        row["order__user_id"]: row
+        for row in Delivery.objects.filter(order__user_id__in=users).values("order__user_id").annotate(
+            delivered=Count("id", filter=delivered),
+            due=Count("id", filter=delivered | Q(
+                scheduled_date__lt=today, order__status=OrderStatus.CONFIRMED,
+            )),
+        ).order_by()
+    }
+    delivery_days: Dict[int, Dict[int, int]] = defaultdict(dict)
+    for row in Delivery.objects.filter(delivered, order__user_id__in=users).values(
+        "order__user_id", weekday=ExtractIsoWeekDay(Coalesce("delivered_at", "updated_at")),
+    ).annotate(count=Count("id")).order_by():
+        delivery_days[row["order__user_id"]][row["weekday"]] = row["count"]
+
+    ConsumerAnalytics.objects.bulk_create(
+        [ConsumerAnalytics(consumer_id=consumer_id) for consumer_id in profiles.values()],
+        ignore_conflicts=True,
+    )
+    rows = {row.consumer_id: row for row in ConsumerAnalytics.objects.filter(consumer_id__in=profiles.values())}
+    consumers = []
+    for user_id, consumer_id in profiles.items():
+        total = totals.get(user_id, {})
+        count, last = total.get("count", 0), total.get("last")
+        spent = total.get("spent") or Decimal("0.00")
+        average = (spent / count).quantize(Decimal("0.01")) if count else Decimal("0.00")
+        names = produce.get(user_id, {})
+        days = delivery_days.get(user_id, {})
+        delivery = deliveries.get(user_id, {})
+
+        analytics = rows[consumer_id]
+        analytics.monthly_spending = {
+            bucket["start"].strftime("%Y-%m"): float(bucket["total"] or 0)
+            for bucket in months.get(user_id, [])
+        }
+        analytics.yearly_spending = years.get(user_id, {})
+        analytics.weekly_orders = {
+            bucket["start"].strftime("%Y-W%W"): bucket["count"] or 0
+            for bucket in weeks.get(user_id, [])
+        }
+        analytics.order_frequency = _order_frequency(count, total.get("first"), now)
+        analytics.average_order_size = average
+        analytics.top_produce_categories = sorted(names, key=lambda name: (-names[name], name))[:TOP_PRODUCE]
+        analytics.seasonal_preferences = _season_rankings(seasonal.get(user_id, {}))
+        analytics.preferred_delivery_days = [
+            WEEKDAYS[day - 1] for day in sorted(days, key=lambda day: (-days[day], day))[:TOP_DELIVERY_DAYS]
+        ]
+        analytics.delivery_success_rate = _delivery_success_rate(delivery.get("delivered", 0), delivery.get("due", 0))
+        analytics.days_since_last_order = max(0, (now - last).days) if last else 0
+        analytics.materialized_at = now
+        analytics.updated_at = now
+        consumers.append(ConsumerProfile(
+            pk=consumer_id, total_spent=spent, total_orders=count, average_order_value=average,
+            last_order_date=last, updated_at=now,
+        ))
+    ConsumerAnalytics.objects.bulk_update(list(rows.values()), ANALYTICS_FIELDS)
+    ConsumerProfile.objects.bulk_update(consumers, PROFILE_FIELDS)
+    return len(profiles)
+
+
+def rebuild_consumer_analytics(batch_size: Optional[int] = None) -> int:
+    """Recompute every consumer's analytics, one batch of consumers at a time; return how many.
+
+    Each batch is read by primary key range and committed on its own, so
+    memory and lock time stay bounded by the batch size.
+    """
+    batch_size = batch_size or settings.CONSUMER_ANALYTICS_BATCH_SIZE
+    total = 0
+    for batch in keyset_batches(ConsumerProfile.objects.all(), ["id", "user_id"], batch_size):
+        total += materialize_consumer_analytics([row["user_id"] for row in batch])
+    return total
+
+
+def ensure_consumer_analytics(consumer: ConsumerProfile) -> ConsumerAnalytics:
+    """The analytics row of ``consumer``, computed now if it never has been.
+
+    When it is computed here, the order totals on ``consumer`` are reloaded too.
+    """
+    analytics = ConsumerAnalytics.objects.filter(consumer=consumer).first()
+    if analytics is None or analytics.materialized_at is None:
+        materialize_consumer_analytics([consumer.user_id])
+        analytics = ConsumerAnalytics.objects.get(consumer=consumer)
+        consumer.refresh_from_db(fields=PROFILE_FIELDS)
+    return analytics
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from consumers.analytics import rebuild_consumer_analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized analytics and order totals of every consumer from their orders "
+        "and deliveries, one batch of consumers per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.CONSUMER_ANALYTICS_BATCH_SIZE,
+            help="Consumers recomputed per batch (default: CONSUMER_ANALYTICS_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_consumer_analytics(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics of {total} consumers"))
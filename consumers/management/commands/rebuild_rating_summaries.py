@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from consumers.ratings import rebuild_rating_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-produce rating summaries from ConsumerReview rows. "
+        "Run after queryset updates or deletes of reviews, which bypass the signals."
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_rating_summaries()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt ratings of {total} produce"))
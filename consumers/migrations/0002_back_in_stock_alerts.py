@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 03:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0007_produce_search'),
+        ('consumers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackInStockAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('consumer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='back_in_stock_alerts', to='consumers.consumerprofile')),
+                ('produce', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='back_in_stock_alerts', to='farmers.produce')),
+            ],
+            options={
+                'db_table': 'consumers_back_in_stock_alert',
+                'indexes': [models.Index(fields=['sent_at', 'consumer'], name='consumers_b_sent_at_9de7ae_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='backinstockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('sent_at__isnull', True)), fields=('consumer', 'produce'), name='consumers_one_pending_alert'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.23 on 2026-10-18 03:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def backfill_summaries(apps, schema_editor):
+    ConsumerReview = apps.get_model("consumers", "ConsumerReview")
+    ProduceRatingSummary = apps.get_model("consumers", "ProduceRatingSummary")
+    totals = ConsumerReview.objects.values("produce_id").annotate(
+        review_count=Count("pk"),
+        rating_sum=Sum("rating"),
+        **{f"stars_{stars}": Count("pk", filter=Q(rating=stars)) for stars in range(1, 6)},
+    )
+    ProduceRatingSummary.objects.bulk_create([ProduceRatingSummary(**row) for row in totals], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0007_produce_search'),
+        ('consumers', '0002_back_in_stock_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduceRatingSummary',
+            fields=[
+                ('produce', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to='farmers.produce')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'consumers_produce_rating_summary',
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
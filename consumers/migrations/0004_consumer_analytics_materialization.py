@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-18 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consumers', '0003_produce_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consumeranalytics',
+            name='materialized_at',
+            field=models.DateTimeField(blank=True, help_text='When the fields were last computed from orders', null=True),
+        ),
+        migrations.AddField(
+            model_name='consumeranalytics',
+            name='weekly_orders',
+            field=models.JSONField(default=dict, help_text='Orders per ISO week, recent weeks'),
+        ),
+    ]
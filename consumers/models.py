@@ -101,6 +101,30 @@ class ConsumerWishlist(models.Model):
         self.save(update_fields=['is_available'])
 
 
+class BackInStockAlert(models.Model):
+    """A wishlist item that came back in stock, waiting to be sent to its consumer."""
+    consumer = models.ForeignKey(ConsumerProfile, on_delete=models.CASCADE, related_name="back_in_stock_alerts")
+    produce = models.ForeignKey('farmers.Produce', on_delete=models.CASCADE, related_name="back_in_stock_alerts")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'consumers_back_in_stock_alert'
+        constraints = [
+            # One pending alert per wishlist item, however often it is restocked.
+            models.UniqueConstraint(
+                fields=['consumer', 'produce'], condition=models.Q(sent_at__isnull=True),
+                name='consumers_one_pending_alert',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['sent_at', 'consumer']),
+        ]
+
+    def __str__(self):
+        return f"Back in stock for {self.consumer_id}: {self.produce_id}"
+
+
 class ConsumerReview(models.Model):
     """Reviews and ratings for produce."""
     consumer = models.ForeignKey(ConsumerProfile, on_delete=models.CASCADE, related_name="reviews")
@@ -130,18 +154,34 @@ class ConsumerReview(models.Model):
     def __str__(self):
         return f"{self.consumer.user.username}'s review of {self.produce.name}"
 
-    def save(self, *args, **kwargs):
-        """Override save to update produce average rating."""
-        super().save(*args, **kwargs)
-        self.update_produce_rating()
 
-    def update_produce_rating(self) -> None:
-        """Update the average rating for the produce."""
-        reviews = ConsumerReview.objects.filter(produce=self.produce)
-        if reviews.exists():
-            avg_rating = reviews.aggregate(avg=models.Avg('rating'))['avg']
-            self.produce.average_rating = round(avg_rating, 2)
-            self.produce.save(update_fields=['average_rating'])
+class ProduceRatingSummary(models.Model):
+    """Running review totals of one produce, kept current by the review signals (see consumers/ratings.py)."""
+    produce = models.OneToOneField(
+        'farmers.Produce', on_delete=models.CASCADE, primary_key=True, related_name="rating_summary"
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'consumers_produce_rating_summary'
+
+    def __str__(self):
+        return f"Ratings of produce {self.produce_id}: {self.average_rating} ({self.review_count})"
+
+    @property
+    def average_rating(self) -> float:
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else 0.0
+
+    @property
+    def histogram(self) -> dict:
+        return {str(stars): getattr(self, f'stars_{stars}') for stars in range(1, 6)}
 
 
 class ConsumerAnalytics(models.Model):
@@ -151,6 +191,7 @@ class ConsumerAnalytics(models.Model):
     # Spending analytics
     monthly_spending = models.JSONField(default=dict, help_text="Monthly spending breakdown")
     yearly_spending = models.JSONField(default=dict, help_text="Yearly spending breakdown")
+    weekly_orders = models.JSONField(default=dict, help_text="Orders per ISO week, recent weeks")
     
     # Order analytics
     order_frequency = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'), help_text="Orders per month")
@@ -169,6 +210,7 @@ class ConsumerAnalytics(models.Model):
     total_logins = models.PositiveIntegerField(default=0)
     days_since_last_order = models.PositiveIntegerField(default=0)
     
+    materialized_at = models.DateTimeField(null=True, blank=True, help_text="When the fields were last computed from orders")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -0,0 +1,85 @@
+"""Per-produce rating aggregates.
+
+``ProduceRatingSummary`` holds the review count, rating sum and a 1-5
+histogram of each produce. Review signals apply each change as one UPDATE
+with ``F()`` increments, so readers never aggregate reviews and concurrent
+reviews cannot lose counts. Queryset ``update()``/``delete()`` on reviews
+bypass the signals; run ``manage.py rebuild_rating_summaries`` after them.
+"""
+from typing import Dict, Iterable, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Q, QuerySet, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import ConsumerReview, ProduceRatingSummary
+
+STAR_FIELDS = [f"stars_{stars}" for stars in range(1, 6)]
+
+
+def _deltas(rating: int, sign: int) -> Dict[str, int]:
+    return {"review_count": sign, "rating_sum": sign * rating, f"stars_{rating}": sign}
+
+
+def apply_rating_change(produce_id: int, added: Optional[int] = None, removed: Optional[int] = None) -> None:
+    """Count a review with rating ``added`` in, and/or one with rating ``removed`` out, of ``produce_id``."""
+    deltas: Dict[str, int] = {}
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating is not None:
+            for field, delta in _deltas(rating, sign).items():
+                deltas[field] = deltas.get(field, 0) + delta
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if ProduceRatingSummary.objects.filter(produce_id=produce_id).update(updated_at=timezone.now(), **updates):
+        return
+    if removed is not None:
+        # No summary yet means there is nothing to take the review out of;
+        # the produce itself may be going away.
+        return
+    try:
+        with transaction.atomic():
+            ProduceRatingSummary.objects.create(produce_id=produce_id, **deltas)
+    except IntegrityError:
+        # A concurrent first review created the row; add ours to it.
+        ProduceRatingSummary.objects.filter(produce_id=produce_id).update(updated_at=timezone.now(), **updates)
+
+
+def rating_summary(produce_id: int) -> Optional[ProduceRatingSummary]:
+    """The summary of ``produce_id``, read by primary key; None if it was never reviewed."""
+    return ProduceRatingSummary.objects.filter(produce_id=produce_id).first()
+
+
+def with_average_rating(queryset: QuerySet) -> QuerySet:
+    """Annotate Produce rows with ``average_rating`` (0 when unrated) from their summaries."""
+    return queryset.annotate(
+        average_rating=Case(
+            When(rating_summary__review_count__gt=0, then=(
+                Cast("rating_summary__rating_sum", FloatField()) / F("rating_summary__review_count")
+            )),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def rebuild_rating_summaries(produce_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute summaries from the reviews themselves; return how many were written."""
+    reviews = ConsumerReview.objects.all()
+    summaries = ProduceRatingSummary.objects.all()
+    if produce_ids is not None:
+        produce_ids = set(produce_ids)
+        reviews = reviews.filter(produce_id__in=produce_ids)
+        summaries = summaries.filter(produce_id__in=produce_ids)
+    totals = reviews.values("produce_id").annotate(
+        review_count=Count("pk"),
+        rating_sum=Sum("rating"),
+        **{field: Count("pk", filter=Q(rating=stars)) for stars, field in enumerate(STAR_FIELDS, start=1)},
+    )
+    rows = [ProduceRatingSummary(**row) for row in totals]
+    with transaction.atomic():
+        summaries.delete()
+        ProduceRatingSummary.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
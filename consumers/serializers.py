@@ -5,7 +5,7 @@ from decimal import Decimal
 
 from .models import (
     ConsumerProfile, ConsumerWishlist, ConsumerReview, 
-    ConsumerAnalytics, ConsumerPreference
+    ConsumerAnalytics, ConsumerPreference, ProduceRatingSummary
 )
 from farmers.serializers import ProduceSerializer, FarmerProfileSerializer
 from orders.serializers import OrderSerializer
@@ -178,11 +178,23 @@ class ConsumerReviewSerializer(serializers.ModelSerializer):
         )
 
 
+class ProduceRatingSummarySerializer(serializers.ModelSerializer):
+    """Review totals of one produce, read from its rating summary."""
+    average_rating = serializers.FloatField(read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = ProduceRatingSummary
+        fields = ['produce_id', 'review_count', 'average_rating', 'histogram', 'updated_at']
+        read_only_fields = fields
+
+
 class ConsumerAnalyticsSerializer(serializers.ModelSerializer):
     """Serializer for consumer analytics."""
     consumer = serializers.PrimaryKeyRelatedField(read_only=True)
     monthly_spending = serializers.JSONField(read_only=True)
     yearly_spending = serializers.JSONField(read_only=True)
+    weekly_orders = serializers.JSONField(read_only=True)
     top_produce_categories = serializers.JSONField(read_only=True)
     seasonal_preferences = serializers.JSONField(read_only=True)
     preferred_delivery_days = serializers.JSONField(read_only=True)
@@ -190,18 +202,18 @@ class ConsumerAnalyticsSerializer(serializers.ModelSerializer):
     class Meta:
         model = ConsumerAnalytics
         fields = [
-            'id', 'consumer', 'monthly_spending', 'yearly_spending',
+            'id', 'consumer', 'monthly_spending', 'yearly_spending', 'weekly_orders',
             'order_frequency', 'average_order_size', 'top_produce_categories',
             'seasonal_preferences', 'preferred_delivery_days', 'delivery_success_rate',
             'last_login', 'total_logins', 'days_since_last_order',
-            'created_at', 'updated_at'
+            'materialized_at', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'consumer', 'monthly_spending', 'yearly_spending',
+            'id', 'consumer', 'monthly_spending', 'yearly_spending', 'weekly_orders',
             'order_frequency', 'average_order_size', 'top_produce_categories',
             'seasonal_preferences', 'preferred_delivery_days', 'delivery_success_rate',
             'last_login', 'total_logins', 'days_since_last_order',
-            'created_at', 'updated_at'
+            'materialized_at', 'created_at', 'updated_at'
         ]
 
 
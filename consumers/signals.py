@@ -1,9 +1,20 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from deliveries.models import Delivery
+from farmers.models import Produce
+from orders.models import Order
 from userprofiles.models import UserType
 
-from .models import ConsumerProfile, ConsumerAnalytics, ConsumerPreference
+from .analytics import queue_consumer_analytics
+from .models import ConsumerProfile, ConsumerAnalytics, ConsumerPreference, ConsumerReview
+from .ratings import apply_rating_change
+from .wishlist import STOCK_FIELDS, queue_wishlist_stock_sync
+
+# Saving these review fields can move its rating between summaries.
+RATING_FIELDS = {"rating", "produce", "produce_id"}
+# Order fields the materialized analytics are computed from.
+ANALYTICS_ORDER_FIELDS = {"status", "total_amount", "created_at"}
 
 
 @receiver(post_save, sender=User)
@@ -36,3 +47,55 @@ def update_consumer_profile_on_role_change(sender, instance, **kwargs):
             ConsumerProfile.objects.filter(user=instance).delete()
 
 
+@receiver(post_save, sender=Produce)
+def sync_wishlist_on_stock_change(sender, instance, created, update_fields=None, **kwargs):
+    """Flip wishlist availability (and queue back-in-stock alerts) after a stock change."""
+    if not created and (update_fields is None or STOCK_FIELDS & set(update_fields)):
+        queue_wishlist_stock_sync([instance.pk])
+
+
+@receiver(pre_save, sender=ConsumerReview)
+def remember_review_rating(sender, instance, update_fields=None, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is None or (update_fields is not None and not RATING_FIELDS & set(update_fields)):
+        return
+    instance._previous_rating = ConsumerReview.objects.filter(pk=instance.pk).values_list(
+        "produce_id", "rating"
+    ).first()
+
+
+@receiver(post_save, sender=ConsumerReview)
+def count_review_rating(sender, instance, created, **kwargs):
+    previous = instance._previous_rating
+    if created:
+        apply_rating_change(instance.produce_id, added=instance.rating)
+    elif previous is not None and previous != (instance.produce_id, instance.rating):
+        produce_id, rating = previous
+        if produce_id == instance.produce_id:
+            apply_rating_change(produce_id, added=instance.rating, removed=rating)
+        else:
+            apply_rating_change(produce_id, removed=rating)
+            apply_rating_change(instance.produce_id, added=instance.rating)
+
+
+@receiver(post_delete, sender=ConsumerReview)
+def uncount_review_rating(sender, instance, **kwargs):
+    apply_rating_change(instance.produce_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=Order)
+def refresh_analytics_on_order(sender, instance, created, update_fields=None, **kwargs):
+    """Queue a refresh of the buyer's analytics for a new order or a status change.
+
+    Bulk status transitions bypass save() and queue the refresh themselves.
+    """
+    if created or update_fields is None or ANALYTICS_ORDER_FIELDS & set(update_fields):
+        queue_consumer_analytics([instance.user_id])
+
+
+@receiver(post_save, sender=Delivery)
+def refresh_analytics_on_delivery(sender, instance, created, update_fields=None, **kwargs):
+    # New deliveries are placeholders written with their order.
+    if created or (update_fields is not None and "status" not in update_fields):
+        return
+    queue_consumer_analytics(Order.objects.filter(pk=instance.order_id).values_list("user_id", flat=True))
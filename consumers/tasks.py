@@ -0,0 +1,28 @@
+from celery import shared_task
+
+from .analytics import rebuild_consumer_analytics, refresh_consumer_analytics
+from .wishlist import send_back_in_stock_alerts, sync_wishlist_stock
+
+
+@shared_task
+def sync_wishlist_stock_task(produce_ids: list):
+    """Apply stock changes of ``produce_ids`` to wishlist rows and record back-in-stock alerts."""
+    return sync_wishlist_stock(produce_ids)
+
+
+@shared_task
+def send_back_in_stock_alerts_task(frequency: str = "immediate"):
+    """Send pending back-in-stock alerts to consumers who chose ``frequency``."""
+    return send_back_in_stock_alerts(frequency)
+
+
+@shared_task
+def refresh_consumer_analytics_task(user_ids: list):
+    """Recompute the materialized analytics of the consumers among ``user_ids``."""
+    return refresh_consumer_analytics(user_ids)
+
+
+@shared_task
+def rebuild_consumer_analytics_task():
+    """Recompute every consumer's materialized analytics, in batches."""
+    return rebuild_consumer_analytics()
@@ -20,6 +20,7 @@ urlpatterns = [
     path('reviews/', views.ConsumerReviewViewSet.as_view(), name='consumer-reviews'),
     path('reviews/<int:pk>/', views.ConsumerReviewDetailView.as_view(), name='consumer-review-detail'),
     path('reviews/add/', views.add_review, name='add-review'),
+    path('reviews/summary/<int:produce_id>/', views.produce_review_summary, name='produce-review-summary'),
     
     # Analytics
     path('analytics/', views.ConsumerAnalyticsView.as_view(), name='consumer-analytics'),
@@ -4,21 +4,23 @@ from rest_framework.response import Response
 from rest_framework.request import Request
 from django.shortcuts import get_object_or_404
 from django.db.models import Q, Sum, Count, Avg
-from django.utils import timezone
 from django.contrib.auth.models import User
-from datetime import timedelta, datetime
+from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List
 
 from .models import (
     ConsumerProfile, ConsumerWishlist, ConsumerReview, 
-    ConsumerAnalytics, ConsumerPreference
+    ConsumerPreference, ProduceRatingSummary
 )
 from .serializers import (
     ConsumerProfileSerializer, ConsumerWishlistSerializer, ConsumerReviewSerializer,
     ConsumerAnalyticsSerializer, ConsumerPreferenceSerializer, ConsumerDashboardSerializer,
-    ConsumerWishlistCreateSerializer, ConsumerReviewCreateSerializer
+    ConsumerWishlistCreateSerializer, ConsumerReviewCreateSerializer, ProduceRatingSummarySerializer
 )
+from .analytics import ensure_consumer_analytics
+from .ratings import rating_summary, with_average_rating
+from farmfresh.aggregation import bucket_starts, time_buckets
 from userprofiles.models import UserType
 from orders.models import Order
 from farmers.models import Produce, FarmerProfile
@@ -124,8 +126,9 @@ class ConsumerAnalyticsView(generics.RetrieveAPIView):
     permission_classes = [IsConsumerOrStaff]
 
     def get_object(self):
-        """Get analytics for the current consumer."""
-        return get_object_or_404(ConsumerAnalytics, consumer=self.request.user.consumer_profile)
+        """Get the materialized analytics of the current consumer."""
+        consumer_profile = get_object_or_404(ConsumerProfile, user=self.request.user)
+        return ensure_consumer_analytics(consumer_profile)
 
 
 class ConsumerPreferenceView(generics.RetrieveUpdateAPIView):
@@ -159,43 +162,22 @@ def consumer_dashboard(request: Request) -> Response:
     favorite_farmers = consumer_profile.favorite_farmers.all()[:5]
     
     # Get analytics
-    analytics = ConsumerAnalytics.objects.filter(consumer=consumer_profile).first()
+    analytics = ensure_consumer_analytics(consumer_profile)
     
     # Get preferences
     preferences = ConsumerPreference.objects.filter(consumer=consumer_profile).first()
     
-    # Calculate top produce categories from order history
-    top_categories = (
-        Order.objects.filter(user=user)
-        .values('items__produce__category')
-        .annotate(count=Count('items'))
-        .order_by('-count')[:5]
-        .values_list('items__produce__category', flat=True)
-    )
-    
-    # Calculate monthly spending chart (last 6 months)
-    monthly_spending = {}
-    for i in range(6):
-        month = timezone.now() - timedelta(days=30*i)
-        month_key = month.strftime('%Y-%m')
-        monthly_total = Order.objects.filter(
-            user=user,
-            created_at__year=month.year,
-            created_at__month=month.month
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-        monthly_spending[month_key] = float(monthly_total)
-    
-    # Calculate order frequency trend
-    order_frequency = {}
-    for i in range(4):
-        week = timezone.now() - timedelta(weeks=i)
-        week_key = week.strftime('%Y-W%W')
-        week_count = Order.objects.filter(
-            user=user,
-            created_at__gte=week,
-            created_at__lt=week + timedelta(weeks=1)
-        ).count()
-        order_frequency[week_key] = week_count
+    # Top produce, monthly spending chart (current and previous 5 calendar
+    # months) and order frequency trend (current and previous 3 weeks) come
+    # from the materialized analytics
+    monthly_spending = {
+        key: analytics.monthly_spending.get(key, 0.0)
+        for key in (start.strftime('%Y-%m') for start in bucket_starts('month', 6))
+    }
+    order_frequency = {
+        key: analytics.weekly_orders.get(key, 0)
+        for key in (start.strftime('%Y-W%W') for start in bucket_starts('week', 4))
+    }
     
     dashboard_data = {
         'profile': consumer_profile,
@@ -204,7 +186,7 @@ def consumer_dashboard(request: Request) -> Response:
         'recent_orders': recent_orders,
         'wishlist_items': wishlist_items,
         'favorite_farmers': favorite_farmers,
-        'top_produce_categories': list(top_categories),
+        'top_produce_categories': analytics.top_produce_categories,
         'monthly_spending_chart': monthly_spending,
         'order_frequency_trend': order_frequency,
     }
@@ -235,6 +217,18 @@ def add_review(request: Request) -> Response:
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def produce_review_summary(request: Request, produce_id: int) -> Response:
+    """Public review count, average and 1-5 histogram of a produce."""
+    summary = rating_summary(produce_id)
+    if summary is None:
+        if not Produce.objects.filter(pk=produce_id).exists():
+            return Response({'error': 'Produce not found'}, status=status.HTTP_404_NOT_FOUND)
+        summary = ProduceRatingSummary(produce_id=produce_id)
+    return Response(ProduceRatingSummarySerializer(summary).data)
+
+
 @api_view(['POST'])
 @permission_classes([IsConsumerOrStaff])
 def toggle_favorite_farmer(request: Request) -> Response:
@@ -271,33 +265,38 @@ def consumer_recommendations(request: Request) -> Response:
     consumer_profile = get_object_or_404(ConsumerProfile, user=user)
     
     # Get user's order history
-    ordered_produce = Order.objects.filter(user=user).values_list('items__produce__category', flat=True).distinct()
+    ordered_produce = (
+        Order.objects.filter(user=user, items__produce__isnull=False)
+        .values_list('items__produce__name', flat=True).distinct()
+    )
     
     # Get preferences
     preferences = ConsumerPreference.objects.filter(consumer=consumer_profile).first()
     preferred_types = preferences.preferred_produce_types if preferences else []
     excluded_types = preferences.excluded_produce_types if preferences else []
     
-    # Build recommendation query
-    recommended_produce = Produce.objects.filter(available=True).exclude(
-        category__in=excluded_types
-    )
+    # Build recommendation query. Produce has no category or organic flag, so
+    # produce types are matched against the produce name.
+    def name_matches(types: List[str]) -> Q:
+        return Q(*[Q(name__icontains=produce_type) for produce_type in types], _connector=Q.OR)
+
+    recommended_produce = Produce.objects.filter(available=True)
+    if excluded_types:
+        recommended_produce = recommended_produce.exclude(name_matches(excluded_types))
     
     # Prioritize preferred types
     if preferred_types:
-        recommended_produce = recommended_produce.filter(category__in=preferred_types)
-    
-    # Add organic preference
-    if consumer_profile.organic_preference:
-        recommended_produce = recommended_produce.filter(is_organic=True)
+        recommended_produce = recommended_produce.filter(name_matches(preferred_types))
     
     # Add local preference
     if consumer_profile.local_preference:
         # This would need to be implemented based on location logic
         pass
     
-    # Order by rating and availability
-    recommended_produce = recommended_produce.order_by('-average_rating', '-quantity_available')[:10]
+    # Order by rating (from the stored summaries, no review aggregation) and availability
+    recommended_produce = with_average_rating(recommended_produce).order_by(
+        '-average_rating', '-quantity_available'
+    )[:10]
     
     return Response({
         'recommendations': ProduceSerializer(recommended_produce, many=True).data,
@@ -372,41 +371,34 @@ def consumer_spending_analytics(request: Request) -> Response:
     """Get detailed spending analytics for consumer."""
     user = request.user
     
-    # Get spending by month (last 12 months)
-    monthly_spending = {}
-    for i in range(12):
-        month = timezone.now() - timedelta(days=30*i)
-        month_key = month.strftime('%Y-%m')
-        monthly_total = Order.objects.filter(
-            user=user,
-            created_at__year=month.year,
-            created_at__month=month.month
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-        monthly_spending[month_key] = float(monthly_total)
+    # Get spending, average order value and order count per calendar month
+    # (current and previous 11) in one query
+    months = time_buckets(
+        Order.objects.filter(user=user), 'month', 12,
+        total=Sum('total_amount'), average=Avg('total_amount'), count=Count('id'),
+    )
+    monthly_spending = {
+        bucket['start'].strftime('%Y-%m'): float(bucket['total'] or Decimal('0.00'))
+        for bucket in months
+    }
     
-    # Get spending by produce category
+    # Get spending by produce
     category_spending = (
-        Order.objects.filter(user=user)
-        .values('items__produce__category')
+        Order.objects.filter(user=user, items__produce__isnull=False)
+        .values('items__produce__name')
         .annotate(total=Sum('items__subtotal'))
         .order_by('-total')
     )
     
-    # Get average order value trend
-    avg_order_trend = []
-    for i in range(6):
-        month = timezone.now() - timedelta(days=30*i)
-        month_orders = Order.objects.filter(
-            user=user,
-            created_at__year=month.year,
-            created_at__month=month.month
-        )
-        avg_value = month_orders.aggregate(avg=Avg('total_amount'))['avg'] or Decimal('0.00')
-        avg_order_trend.append({
-            'month': month.strftime('%Y-%m'),
-            'average_order_value': float(avg_value),
-            'order_count': month_orders.count()
-        })
+    # Get average order value trend (last 6 months)
+    avg_order_trend = [
+        {
+            'month': bucket['start'].strftime('%Y-%m'),
+            'average_order_value': float(bucket['average'] or Decimal('0.00')),
+            'order_count': bucket['count'] or 0,
+        }
+        for bucket in months[:6]
+    ]
     
     return Response({
         'monthly_spending': monthly_spending,
@@ -0,0 +1,155 @@
+"""Wishlist availability and back-in-stock alerts.
+
+Stock changes are applied to wishlist rows in bulk: one UPDATE per produce,
+after the change commits. Items that come back in stock become pending
+``BackInStockAlert`` rows, which are sent per consumer according to
+``ConsumerPreference.notification_frequency``:
+
+- ``immediate``: shortly after the restock, so that restocks within
+  ``WISHLIST_ALERT_DEBOUNCE_SECONDS`` share one message;
+- ``daily`` / ``weekly``: by the matching Celery beat digest.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from farmers.models import Produce
+from notifications.utils import notify_users
+from .models import BackInStockAlert, ConsumerProfile, ConsumerWishlist
+
+logger = logging.getLogger(__name__)
+
+IMMEDIATE = "immediate"
+IMMEDIATE_SCHEDULED_KEY = "wishlist-alerts:immediate"
+# Produce whose ``available`` or ``quantity_available`` changes can flip wishlist rows.
+STOCK_FIELDS = {"available", "quantity_available"}
+MAX_ALERT_NAMES = 5
+
+
+def _enqueue_sync(produce_ids: List[int]) -> None:
+    from .tasks import sync_wishlist_stock_task
+
+    try:
+        sync_wishlist_stock_task.delay(produce_ids)
+    except Exception:
+        # The wishlist rows catch up on the produce's next stock change.
+        logger.warning("Could not enqueue wishlist stock sync for %s", produce_ids, exc_info=True)
+
+
+def queue_wishlist_stock_sync(produce_ids: Iterable[int]) -> None:
+    """Sync the wishlist rows of ``produce_ids`` once the current transaction commits."""
+    produce_ids = sorted(set(produce_ids))
+    if produce_ids:
+        transaction.on_commit(lambda: _enqueue_sync(produce_ids))
+
+
+def sync_wishlist_stock(produce_ids: Iterable[int]) -> int:
+    """Set ``is_available`` on every wishlist row of ``produce_ids``; return how many rows came back in stock.
+
+    Runs one UPDATE per produce whose wishlist rows disagree with its
+    stock. Rows that come back in stock get a pending alert.
+    """
+    in_stock = {
+        pk: available and quantity > 0
+        for pk, available, quantity in Produce.objects.filter(pk__in=set(produce_ids)).values_list(
+            "pk", "available", "quantity_available"
+        )
+    }
+    restocked = []
+    with transaction.atomic():
+        for produce_id, available in sorted(in_stock.items()):
+            rows = ConsumerWishlist.objects.filter(produce_id=produce_id).exclude(is_available=available)
+            if not available:
+                rows.update(is_available=False)
+                continue
+            flipped = list(rows.select_for_update().values_list("pk", "consumer_id"))
+            if flipped:
+                ConsumerWishlist.objects.filter(pk__in=[pk for pk, _ in flipped]).update(is_available=True)
+                restocked.extend((consumer_id, produce_id) for _, consumer_id in flipped)
+        BackInStockAlert.objects.bulk_create(
+            [BackInStockAlert(consumer_id=consumer_id, produce_id=produce_id) for consumer_id, produce_id in restocked],
+            ignore_conflicts=True,
+        )
+    if restocked:
+        transaction.on_commit(_schedule_immediate_alerts)
+    return len(restocked)
+
+
+def _schedule_immediate_alerts() -> None:
+    from .tasks import send_back_in_stock_alerts_task
+
+    # One delayed send per debounce window collects every restock within it.
+    if not cache.add(IMMEDIATE_SCHEDULED_KEY, 1, settings.WISHLIST_ALERT_DEBOUNCE_SECONDS):
+        return
+    try:
+        send_back_in_stock_alerts_task.apply_async((IMMEDIATE,), countdown=settings.WISHLIST_ALERT_DEBOUNCE_SECONDS)
+    except Exception:
+        cache.delete(IMMEDIATE_SCHEDULED_KEY)
+        logger.warning("Could not enqueue back-in-stock alerts", exc_info=True)
+
+
+def _frequency_filter(frequency: str) -> Q:
+    field = "consumer__preferences__notification_frequency"
+    if frequency == IMMEDIATE:
+        # Consumers without preferences get the default, immediate.
+        return Q(**{field: IMMEDIATE}) | Q(consumer__preferences__isnull=True)
+    return Q(**{field: frequency})
+
+
+def _alert_message(names: List[str]) -> str:
+    shown = names[:MAX_ALERT_NAMES]
+    if len(names) > len(shown):
+        listed = f"{', '.join(shown)} and {len(names) - len(shown)} more"
+    elif len(shown) > 1:
+        listed = f"{', '.join(shown[:-1])} and {shown[-1]}"
+    else:
+        listed = shown[0]
+    verb = "is" if len(names) == 1 else "are"
+    return f"{listed} from your wishlist {verb} back in stock."
+
+
+def send_back_in_stock_alerts(frequency: str = IMMEDIATE, now: Optional[datetime] = None) -> int:
+    """Send one message per consumer for their pending alerts at ``frequency``; return how many were sent.
+
+    Alerts whose produce sold out again before sending are dropped.
+    """
+    now = now or timezone.now()
+    if frequency == IMMEDIATE:
+        # Restocks from here on schedule the next send.
+        cache.delete(IMMEDIATE_SCHEDULED_KEY)
+    pending = list(
+        BackInStockAlert.objects.filter(_frequency_filter(frequency), sent_at__isnull=True)
+        .order_by("consumer_id", "produce__name")
+        .values_list("pk", "consumer_id", "produce__name", "produce__available", "produce__quantity_available")
+    )
+    if not pending:
+        return 0
+    claimed = BackInStockAlert.objects.filter(pk__in=[row[0] for row in pending], sent_at__isnull=True).update(
+        sent_at=now
+    )
+    if claimed != len(pending):
+        # Another sender took some of these rows; only send what is ours.
+        mine = set(BackInStockAlert.objects.filter(sent_at=now).values_list("pk", flat=True))
+        pending = [row for row in pending if row[0] in mine]
+
+    names: Dict[int, List[str]] = defaultdict(list)
+    for _, consumer_id, name, available, quantity in pending:
+        if available and quantity > 0:
+            names[consumer_id].append(name)
+    consumers = ConsumerProfile.objects.filter(pk__in=names).select_related("user")
+    by_channels = defaultdict(list)
+    for consumer in consumers:
+        by_channels[(consumer.email_notifications, consumer.sms_notifications)].append(
+            (consumer.user, "Back in stock", _alert_message(names[consumer.pk]))
+        )
+    sent = 0
+    for (email, sms), messages in by_channels.items():
+        sent += len(notify_users(messages, email=email, sms=sms))
+    return sent
@@ -0,0 +1,4 @@
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .models import DeliveryWindow
+
+invalidate_on_change(DeliveryWindow, lambda window: [CacheTags.DELIVERY_WINDOWS])
@@ -5,6 +5,7 @@ from rest_framework.request import Request
 from django.shortcuts import get_object_or_404
 from django.db.models import Sum, Count
 
+from farmfresh.cache import CachedResponseMixin, CacheTags
 from .models import Delivery, DeliveryStatus, DeliveryBatch, DeliveryWindow
 from .serializers import DeliverySerializer, DeliveryBatchSerializer, DeliveryWindowSerializer
 from userprofiles.models import UserType
@@ -66,9 +67,12 @@ def distributor_mark_delivered(request: Request, pk: int) -> Response:
     return Response({"detail": "Marked delivered"})
 
 
-class DeliveryWindowViewSet(viewsets.ModelViewSet):
+class DeliveryWindowViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     serializer_class = DeliveryWindowSerializer
     queryset = DeliveryWindow.objects.all()
+    cache_tags = [CacheTags.DELIVERY_WINDOWS]
+    cache_scope = "public"
+    cache_local = True
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -0,0 +1,89 @@
+"""Notifications for produce that is available again.
+
+A produce row switching from unavailable to available notifies its farmer
+and the customers who bought it recently. The fan-out runs in Celery: one
+task resolves the recipients with a single query and queues them in chunks,
+and each chunk is written with ``notify_users`` (bulk inserts, one outbox
+kick). A produce that flaps is announced at most once per cooldown.
+"""
+import logging
+from datetime import timedelta
+from typing import List
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.utils import notify_users
+from orders.models import OrderItem
+from .models import Produce
+
+logger = logging.getLogger(__name__)
+
+# Customers who ordered the produce within this window hear that it is back.
+RECENT_BUYER_WINDOW = timedelta(days=30)
+FAN_OUT_CHUNK_SIZE = 500
+
+
+def _cooldown_key(produce_id: int) -> str:
+    return f"produce-available:{produce_id}"
+
+
+def _enqueue_fan_out(produce_id: int) -> None:
+    from .tasks import fan_out_produce_available_task
+
+    if not cache.add(_cooldown_key(produce_id), 1, settings.PRODUCE_AVAILABLE_COOLDOWN_SECONDS):
+        return
+    try:
+        fan_out_produce_available_task.delay(produce_id)
+    except Exception:
+        # Let the next transition retry rather than sit out the cooldown.
+        cache.delete(_cooldown_key(produce_id))
+        logger.warning("Could not enqueue availability fan-out for produce %s", produce_id, exc_info=True)
+
+
+def queue_produce_available(produce: Produce) -> None:
+    """Announce ``produce`` once the current transaction commits."""
+    transaction.on_commit(lambda: _enqueue_fan_out(produce.pk))
+
+
+def recent_buyer_ids(produce: Produce) -> List[int]:
+    """Users, other than the farmer, who ordered ``produce`` within ``RECENT_BUYER_WINDOW``."""
+    return list(
+        OrderItem.objects.filter(produce=produce, order__created_at__gte=timezone.now() - RECENT_BUYER_WINDOW)
+        .exclude(order__user_id=produce.farmer.user_id)
+        .values_list("order__user_id", flat=True)
+        .distinct()
+        .order_by("order__user_id")
+    )
+
+
+def fan_out_produce_available(produce_id: int) -> int:
+    """Notify the farmer and queue the buyer chunks; return how many chunks were queued."""
+    from .tasks import notify_produce_buyers_task
+
+    produce = Produce.objects.select_related("farmer__user").filter(pk=produce_id).first()
+    if produce is None or not produce.available:
+        return 0
+    notify_users([(
+        produce.farmer.user,
+        "Produce available",
+        f"Your produce '{produce.name}' is now marked as available.",
+    )])
+    buyer_ids = recent_buyer_ids(produce)
+    chunks = [buyer_ids[i:i + FAN_OUT_CHUNK_SIZE] for i in range(0, len(buyer_ids), FAN_OUT_CHUNK_SIZE)]
+    for chunk in chunks:
+        notify_produce_buyers_task.delay(produce_id, chunk)
+    return len(chunks)
+
+
+def notify_produce_buyers(produce_id: int, user_ids: List[int]) -> int:
+    """Write one chunk of "fresh harvest" notifications; return how many."""
+    produce = Produce.objects.select_related("farmer").filter(pk=produce_id).first()
+    if produce is None:
+        return 0
+    message = f"{produce.name} is fresh and available again from {produce.farmer.name}."
+    users = User.objects.filter(pk__in=user_ids).only("id", "email")
+    return len(notify_users((user, "Fresh harvest available", message) for user in users))
@@ -0,0 +1,93 @@
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from farmers.models import FarmerProfile, Produce
+from farmers.search import rebuild_search_index, search_produce, search_terms
+
+WORDS = [
+    "tomato", "cherry", "heirloom", "kale", "curly", "onion", "red", "sweet", "potato", "carrot", "organic",
+    "leek", "beet", "golden", "spinach", "baby", "pepper", "chilli", "garlic", "smoked", "apple", "bramley",
+]
+# The icontains filters the public produce endpoints used before the search index.
+LEGACY_FIELDS = ["name", "variety", "description", "farmer__name", "farmer__user__username"]
+
+
+def legacy_search(queryset, query):
+    for term in query.split():
+        queryset = queryset.filter(Q(*[Q(**{f"{field}__icontains": term}) for field in LEGACY_FIELDS], _connector=Q.OR))
+    return queryset
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark produce search: the search index against the old icontains "
+        "filters, on throwaway produce that is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produce", type=int, default=20000, help="Produce rows to create")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+        parser.add_argument("--query", action="append", help="Query to time (repeatable)")
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        tag = f"bench-{uuid.uuid4().hex[:8]}"
+        queries = options["query"] or ["tomato", "red onion", "organic sweet potato", "quince"]
+        farmers = [
+            FarmerProfile.objects.create(
+                user=User.objects.create_user(username=f"{tag}-{i}"), name=f"{tag} farm {i}",
+                crops=", ".join(rng.sample(WORDS, 4)),
+            )
+            for i in range(20)
+        ]
+        Produce.objects.bulk_create(
+            [
+                Produce(
+                    farmer=farmers[i % len(farmers)],
+                    name="quince" if i % 200 == 0 else " ".join(rng.sample(WORDS, 2)),
+                    variety=rng.choice(WORDS),
+                    description=" ".join(rng.choices(WORDS, k=40)),
+                    unit="kg",
+                    price_per_unit=Decimal("1.00"),
+                )
+                for i in range(options["produce"])
+            ],
+            batch_size=1000,
+        )
+        try:
+            started = time.perf_counter()
+            rebuild_search_index()
+            self.stdout.write(f"indexed in {time.perf_counter() - started:.2f}s ({connection.vendor})")
+            base = Produce.objects.filter(farmer__in=farmers, available=True)
+            for query in queries:
+                # What a search page costs: the match count plus the first page in result order
+                # (newest first for icontains, best match first for the index).
+                legacy = self._time(lambda: (
+                    legacy_search(base, query).count(),
+                    list(legacy_search(base, query).order_by("-created_at").values_list("pk", flat=True)[:20]),
+                ), options["repeat"])
+                indexed = self._time(lambda: (
+                    search_produce(base, query).count(),
+                    list(search_produce(base, query).order_by("-search_rank").values_list("pk", flat=True)[:20]),
+                ), options["repeat"])
+                self.stdout.write(
+                    f"{query!r} ({len(search_terms(query))} terms): "
+                    f"icontains {legacy[0] * 1000:.1f}ms [{legacy[1][0]} hits], "
+                    f"index {indexed[0] * 1000:.1f}ms [{indexed[1][0]} hits], {legacy[0] / indexed[0]:.1f}x"
+                )
+        finally:
+            User.objects.filter(username__startswith=tag).delete()
+
+    def _time(self, run, repeat):
+        result = run()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        return (time.perf_counter() - started) / repeat, result
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from farmers.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the produce search documents from Produce and FarmerProfile rows. "
+        "Run after bulk imports or queryset updates, which bypass the save signals."
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} produce"))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0005_farmerprofile_total_earnings_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farmerearnings',
+            index=models.Index(fields=['farmer', 'created_at', 'id'], name='farmers_far_farmer__5fc044_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.utils import OperationalError
+
+FTS_TABLE = "farmers_produce_fts"
+DOCUMENTS = "farmers_producesearchdocument"
+COLUMNS = "name, variety, farmer, crops, description"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "mysql":
+        schema_editor.execute(f"ALTER TABLE {DOCUMENTS} ADD FULLTEXT INDEX farmers_psd_fulltext ({COLUMNS})")
+        schema_editor.execute(f"ALTER TABLE {DOCUMENTS} ADD FULLTEXT INDEX farmers_psd_name_fulltext (name)")
+    elif vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({COLUMNS}, content='{DOCUMENTS}', "
+                "content_rowid='produce_id', tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            # SQLite without FTS5: farmers.search falls back to substring matches.
+            return
+        new = "new.produce_id, new.name, new.variety, new.farmer, new.crops, new.description"
+        old = "old.produce_id, old.name, old.variety, old.farmer, old.crops, old.description"
+        schema_editor.execute(
+            f"CREATE TRIGGER farmers_psd_ai AFTER INSERT ON {DOCUMENTS} BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES ({new}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER farmers_psd_ad AFTER DELETE ON {DOCUMENTS} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {old}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER farmers_psd_au AFTER UPDATE ON {DOCUMENTS} BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {old}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES ({new}); END"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for trigger in ("farmers_psd_ai", "farmers_psd_ad", "farmers_psd_au"):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    # MySQL drops the FULLTEXT indexes with the table.
+
+
+def build_documents(apps, schema_editor):
+    Produce = apps.get_model("farmers", "Produce")
+    ProduceSearchDocument = apps.get_model("farmers", "ProduceSearchDocument")
+    documents = (
+        ProduceSearchDocument(
+            produce_id=produce.pk,
+            name=produce.name,
+            variety=produce.variety,
+            farmer=f"{produce.farmer.name} {produce.farmer.user.username}".strip()[:400],
+            crops=produce.farmer.crops,
+            description=produce.description,
+        )
+        for produce in Produce.objects.select_related("farmer__user").iterator()
+    )
+    ProduceSearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProduceSearchDocument',
+            fields=[
+                ('produce', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='farmers.produce')),
+                ('name', models.CharField(max_length=255)),
+                ('variety', models.CharField(blank=True, max_length=255)),
+                ('farmer', models.CharField(blank=True, help_text='Farmer name and username', max_length=400)),
+                ('crops', models.TextField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
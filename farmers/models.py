@@ -89,9 +89,28 @@ class FarmerEarnings(models.Model):
         indexes = [
             models.Index(fields=['farmer', 'status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['farmer', 'created_at', 'id']),
         ]
 
     def __str__(self) -> str:
         return f"{self.farmer.name} - {self.produce.name} - ${self.total_amount}"
 
 # Create your models here.
+
+
+class ProduceSearchDocument(models.Model):
+    """Denormalized search text for one produce, indexed by ``farmers.search``.
+
+    SQLite indexes it with an FTS5 table kept in sync by triggers and MySQL
+    with a FULLTEXT index; see migration 0007.
+    """
+    produce = models.OneToOneField(Produce, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    name = models.CharField(max_length=255)
+    variety = models.CharField(max_length=255, blank=True)
+    farmer = models.CharField(max_length=400, blank=True, help_text="Farmer name and username")
+    crops = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Search document for {self.produce_id}"
@@ -0,0 +1,172 @@
+import re
+from typing import Iterable, List
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from farmfresh.streaming import keyset_batches
+from .models import Produce, ProduceSearchDocument
+
+SEARCH_FIELDS = ["name", "variety", "farmer", "crops", "description"]
+# bm25 column weights, in SEARCH_FIELDS order.
+SEARCH_WEIGHTS = [10.0, 5.0, 3.0, 2.0, 1.0]
+# Document fields ``?crops=`` matches against, any one of them.
+CROP_FIELDS = ["name", "variety", "crops"]
+MAX_SEARCH_TERMS = 8
+FTS_TABLE = "farmers_produce_fts"
+FULLTEXT_INDEX = "farmers_psd_fulltext"
+FULLTEXT_NAME_INDEX = "farmers_psd_name_fulltext"
+
+# Saving these fields changes the search document.
+PRODUCE_SEARCH_FIELDS = {"name", "variety", "description", "farmer", "farmer_id"}
+FARMER_SEARCH_FIELDS = {"name", "crops", "user", "user_id"}
+
+_fts_available = {}
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a user query into at most ``MAX_SEARCH_TERMS`` lowercase words."""
+    return re.findall(r"\w+", query.lower())[:MAX_SEARCH_TERMS]
+
+
+def _sqlite_fts() -> bool:
+    # The FTS5 table is missing when SQLite was built without FTS5 (see migration 0007).
+    key = connection.settings_dict["NAME"]
+    if key not in _fts_available:
+        _fts_available[key] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[key]
+
+
+def search_produce(queryset: QuerySet, query: str) -> QuerySet:
+    """Narrow a Produce ``queryset`` to rows matching every word of ``query``.
+
+    Words match as prefixes. Rows are annotated with ``search_rank`` (higher
+    is better) but not reordered. SQLite uses the FTS5 table and MySQL the
+    FULLTEXT index. Other backends fall back to substring matches on the
+    search documents.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    produce_id = f"{connection.ops.quote_name(Produce._meta.db_table)}.{connection.ops.quote_name('id')}"
+    documents = ProduceSearchDocument._meta.db_table
+
+    # The index is joined in with extra() so that it drives the query: a
+    # correlated rank subquery would run the full-text search once per row.
+    if connection.vendor == "sqlite" and _sqlite_fts():
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        return queryset.extra(
+            select={"search_rank": f"-bm25({FTS_TABLE}, {weights})"},
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE} MATCH %s", f"{FTS_TABLE}.rowid = {produce_id}"],
+            params=[match],
+        )
+
+    if connection.vendor == "mysql":
+        match = " ".join(f"+{term}*" for term in terms)
+        columns = ", ".join(f"{documents}.{field}" for field in SEARCH_FIELDS)
+        return queryset.extra(
+            select={
+                "search_rank": f"MATCH({documents}.name) AGAINST (%s IN BOOLEAN MODE) * 4 "
+                               f"+ MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+            },
+            select_params=[match, match],
+            tables=[documents],
+            where=[f"{documents}.produce_id = {produce_id}", f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"],
+            params=[match],
+        )
+
+    matches = Q()
+    for term in terms:
+        matches &= Q(*[Q(**{f"{field}__icontains": term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+    rank = Value(0.0)
+    for term in terms:
+        rank += Case(
+            When(search_document__name__icontains=term, then=Value(2.0)), default=Value(1.0), output_field=FloatField()
+        )
+    return queryset.filter(
+        pk__in=ProduceSearchDocument.objects.filter(matches).values("produce_id")
+    ).annotate(search_rank=rank)
+
+
+def filter_crops(queryset: QuerySet, crops: str) -> QuerySet:
+    """Narrow a Produce ``queryset`` to rows whose name, variety or farmer crops contain ``crops``.
+
+    Applied as a primary-key subquery rather than a join, so it composes
+    with :func:`search_produce` on the same queryset. On SQLite the FTS5
+    table matches ``crops`` as a phrase whose last word may be a prefix;
+    elsewhere the search documents are matched by substring.
+    """
+    terms = search_terms(crops)
+    if terms and connection.vendor == "sqlite" and _sqlite_fts():
+        match = "{%s} : \"%s\"*" % (" ".join(CROP_FIELDS), " ".join(terms))
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        )
+    matches = Q(*[Q(**{f"{field}__icontains": crops}) for field in CROP_FIELDS], _connector=Q.OR)
+    return queryset.filter(pk__in=ProduceSearchDocument.objects.filter(matches).values("produce_id"))
+
+
+class ProduceSearchFilter(filters.SearchFilter):
+    """``?search=`` over the produce search index.
+
+    Best matches come first unless the request passes ``?ordering=``. Put
+    this backend after ``OrderingFilter`` so a view's default ordering does
+    not override the rank.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not search_terms(query):
+            return queryset
+        queryset = search_produce(queryset, query)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by("-search_rank", "-pk")
+
+
+def search_document(produce: Produce) -> ProduceSearchDocument:
+    farmer = produce.farmer
+    return ProduceSearchDocument(
+        produce=produce,
+        name=produce.name,
+        variety=produce.variety,
+        farmer=f"{farmer.name} {farmer.user.username}".strip()[:400],
+        crops=farmer.crops,
+        description=produce.description,
+        updated_at=timezone.now(),
+    )
+
+
+def sync_search_documents(produce_ids: Iterable[int]) -> int:
+    """Write the search documents of ``produce_ids`` from their current rows; returns how many."""
+    produce_ids = set(produce_ids)
+    if not produce_ids:
+        return 0
+    documents = [search_document(p) for p in Produce.objects.filter(pk__in=produce_ids).select_related("farmer__user")]
+    existing = set(
+        ProduceSearchDocument.objects.filter(pk__in=produce_ids).values_list("pk", flat=True)
+    )
+    ProduceSearchDocument.objects.bulk_update(
+        [document for document in documents if document.produce_id in existing], SEARCH_FIELDS + ["updated_at"]
+    )
+    ProduceSearchDocument.objects.bulk_create(
+        [document for document in documents if document.produce_id not in existing]
+    )
+    return len(documents)
+
+
+def rebuild_search_index() -> int:
+    """Rewrite every search document and, on SQLite, rebuild the FTS5 table."""
+    total = 0
+    for rows in keyset_batches(Produce.objects.all(), ["id"], batch_size=500):
+        total += sync_search_documents(row["id"] for row in rows)
+    if connection.vendor == "sqlite" and _sqlite_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return total
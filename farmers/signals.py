@@ -1,37 +1,41 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_save
 from django.dispatch import receiver
-from django.utils import timezone
-from datetime import timedelta
 
-from .models import Produce
-from notifications.utils import notify_user
-from orders.models import OrderItem
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .availability import queue_produce_available
+from .models import FarmerProfile, Produce
+from .search import FARMER_SEARCH_FIELDS, PRODUCE_SEARCH_FIELDS, sync_search_documents
+
+
+invalidate_on_change(Produce, lambda produce: [CacheTags.PRODUCE, CacheTags.farmer(produce.farmer_id)])
+invalidate_on_change(FarmerProfile, lambda farmer: [
+    CacheTags.PRODUCE, CacheTags.farmer(farmer.pk), CacheTags.user(farmer.user_id),
+])
 
 
 @receiver(post_save, sender=Produce)
-def notify_produce_available(sender, instance: Produce, created: bool, **kwargs):
-    # Notify the farmer when produce becomes available again
-    if not created and instance.available and instance.farmer and instance.farmer.user:
-        notify_user(
-            instance.farmer.user,
-            title="Produce available",
-            message=f"Your produce '{instance.name}' is now marked as available.",
-        )
-        # Notify recent customers (last 30 days) that this produce is fresh again
-        since = timezone.now() - timedelta(days=30)
-        recent_buyer_ids = (
-            OrderItem.objects.filter(produce=instance, order__created_at__gte=since)
-            .values_list("order__user_id", flat=True)
-            .distinct()
-        )
-        for user_id in recent_buyer_ids:
-            try:
-                user = instance.farmer.user.__class__.objects.get(id=user_id)
-                notify_user(
-                    user,
-                    title="Fresh harvest available",
-                    message=f"{instance.name} is fresh and available again from {instance.farmer.name}.",
-                )
-            except Exception:
-                pass
+def index_produce(sender, instance: Produce, update_fields=None, **kwargs):
+    if update_fields is None or PRODUCE_SEARCH_FIELDS & set(update_fields):
+        sync_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=FarmerProfile)
+def index_farmer_produce(sender, instance: FarmerProfile, update_fields=None, **kwargs):
+    if update_fields is None or FARMER_SEARCH_FIELDS & set(update_fields):
+        sync_search_documents(instance.produce.values_list("pk", flat=True))
 
+
+@receiver(pre_save, sender=Produce)
+def remember_produce_availability(sender, instance: Produce, update_fields=None, **kwargs):
+    if instance.pk is None or (update_fields is not None and "available" not in update_fields):
+        return
+    instance._was_available = Produce.objects.filter(pk=instance.pk).values_list("available", flat=True).first()
+
+
+@receiver(post_save, sender=Produce)
+def notify_produce_available(sender, instance: Produce, created: bool, **kwargs):
+    # Only the unavailable -> available transition is announced; stock and
+    # sales saves leave ``available`` alone and never reach the fan-out.
+    if not created and instance.available and getattr(instance, "_was_available", None) is False:
+        queue_produce_available(instance)
+    instance._was_available = instance.available
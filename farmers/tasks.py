@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from .availability import fan_out_produce_available, notify_produce_buyers
+
+
+@shared_task
+def fan_out_produce_available_task(produce_id: int):
+    """Notify the farmer and queue the recent buyers of produce that is available again."""
+    return fan_out_produce_available(produce_id)
+
+
+@shared_task
+def notify_produce_buyers_task(produce_id: int, user_ids: list):
+    """Notify one chunk of recent buyers that the produce is available again."""
+    return notify_produce_buyers(produce_id, user_ids)
@@ -10,7 +10,11 @@ from datetime import timedelta
 from decimal import Decimal
 from typing import Any
 
+from farmfresh.aggregation import time_buckets
+from farmfresh.cache import CachedResponseMixin, CacheTags
+from farmfresh.pagination import CachedCountPagination, CursorOrPageNumberPagination
 from .models import FarmerProfile, FarmCluster, Produce, FarmerEarnings
+from .search import ProduceSearchFilter, filter_crops
 from .serializers import (
     FarmerProfileSerializer,
     FarmClusterSerializer,
@@ -99,11 +103,13 @@ class FarmerProfileAdminDetailView(generics.RetrieveUpdateAPIView):
     queryset = FarmerProfile.objects.all()
 
 
-class PublicProduceListView(generics.ListAPIView):
+class PublicProduceListView(CachedResponseMixin, generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
+    cache_tags = [CacheTags.PRODUCE]
+    cache_scope = "public"
     serializer_class = ProduceSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["name", "variety", "description", "farmer__name", "farmer__user__username"]
+    pagination_class = CachedCountPagination
+    filter_backends = [filters.OrderingFilter, ProduceSearchFilter]
     ordering_fields = ["price_per_unit", "created_at", "quantity_available"]
 
     def get_queryset(self):
@@ -124,11 +130,7 @@ class PublicProduceListView(generics.ListAPIView):
         if location:
             queryset = queryset.filter(farmer__location__icontains=location)
         if crops:
-            queryset = queryset.filter(
-                Q(farmer__crops__icontains=crops)
-                | Q(name__icontains=crops)
-                | Q(variety__icontains=crops)
-            )
+            queryset = filter_crops(queryset, crops)
         return queryset
 
 
@@ -161,9 +163,9 @@ class ProduceViewSet(viewsets.ModelViewSet):
 class ProducePublicViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ProducePublicSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = CachedCountPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ProduceSearchFilter]
     filterset_fields = ['farmer', 'available', 'unit']
-    search_fields = ['name', 'variety', 'description', 'farmer__name']
     ordering_fields = ['price_per_unit', 'created_at', 'name']
     ordering = ['-created_at']
 
@@ -176,9 +178,10 @@ class FarmerEarningsListView(generics.ListAPIView):
     """List farmer's earnings transactions."""
     serializer_class = FarmerEarningsSerializer
     permission_classes = [IsFarmerOrStaff]
+    pagination_class = CursorOrPageNumberPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'total_amount', 'status']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
 
     def get_queryset(self):
         user = self.request.user
@@ -226,9 +229,7 @@ def farmer_dashboard(request):
         })
     
     # Get top selling produce
-    top_produce = Produce.objects.filter(farmer=farmer_profile).annotate(
-        total_revenue=Sum('earnings__total_amount')
-    ).order_by('-total_revenue')[:5]
+    top_produce = Produce.objects.filter(farmer=farmer_profile).order_by('-total_revenue')[:5]
     
     top_produce_data = []
     for produce in top_produce:
@@ -239,21 +240,16 @@ def farmer_dashboard(request):
             'total_revenue': str(produce.total_revenue),
         })
     
-    # Get monthly earnings (last 6 months)
-    monthly_earnings = []
-    for i in range(6):
-        month_start = timezone.now() - timedelta(days=30*i)
-        month_end = month_start + timedelta(days=30)
-        month_earnings = FarmerEarnings.objects.filter(
-            farmer=farmer_profile,
-            created_at__gte=month_start,
-            created_at__lt=month_end
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-        
-        monthly_earnings.append({
-            'month': month_start.strftime('%Y-%m'),
-            'earnings': str(month_earnings),
-        })
+    # Get monthly earnings (current and previous 5 calendar months)
+    monthly_earnings = [
+        {
+            'month': bucket['start'].strftime('%Y-%m'),
+            'earnings': str(bucket['total'] or Decimal('0.00')),
+        }
+        for bucket in time_buckets(
+            FarmerEarnings.objects.filter(farmer=farmer_profile), 'month', 6, total=Sum('total_amount')
+        )
+    ]
     
     dashboard_data = {
         'total_earnings': earnings_summary['total_earnings'] or Decimal('0.00'),
@@ -0,0 +1,76 @@
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Dict, List, Optional
+
+from django.db.models import QuerySet
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+TRUNCATE = {"month": TruncMonth, "week": TruncWeek}
+
+
+def bucket_starts(period: str, periods: int, now: Optional[datetime] = None,
+                  tz: Optional[tzinfo] = None) -> List[datetime]:
+    """Start of the current and ``periods - 1`` previous calendar months or ISO weeks, newest first.
+
+    Starts are midnight in ``tz`` (the current time zone by default).
+    """
+    tz = tz or timezone.get_current_timezone()
+    today = timezone.localtime(now or timezone.now(), tz).date()
+    if period == "month":
+        days = []
+        year, month = today.year, today.month
+        for _ in range(periods):
+            days.append(date(year, month, 1))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    elif period == "week":
+        monday = today - timedelta(days=today.weekday())
+        days = [monday - timedelta(weeks=i) for i in range(periods)]
+    else:
+        raise ValueError(f"Unknown period {period!r}; expected one of {sorted(TRUNCATE)}")
+    return [timezone.make_aware(datetime.combine(day, datetime.min.time()), tz) for day in days]
+
+
+def time_buckets(queryset: QuerySet, period: str, periods: int, field: str = "created_at",
+                 now: Optional[datetime] = None, tz: Optional[tzinfo] = None,
+                 **aggregates: Any) -> List[Dict[str, Any]]:
+    """Aggregate ``queryset`` per calendar month or ISO week, in one query.
+
+    Returns ``periods`` buckets, newest first, each ``{"start": <aware
+    datetime>, <name>: <value>, ...}`` for the ``aggregates`` given as
+    keyword expressions (``total=Sum("total_amount")``). Buckets without rows
+    are filled in with ``None``, as ``aggregate()`` returns on no rows.
+    Rows dated after ``now`` are left out.
+    """
+    grouped = time_buckets_by(queryset, None, period, periods, field, now, tz, **aggregates)
+    return grouped.get(None) or _fill(bucket_starts(period, periods, now, tz), {}, aggregates)
+
+
+def time_buckets_by(queryset: QuerySet, by: Optional[str], period: str, periods: int,
+                    field: str = "created_at", now: Optional[datetime] = None,
+                    tz: Optional[tzinfo] = None, **aggregates: Any) -> Dict[Any, List[Dict[str, Any]]]:
+    """:func:`time_buckets` for every value of the ``by`` field, in one query.
+
+    Maps each value with rows in the window to its gap-filled buckets;
+    values without rows are left out. ``by=None`` groups the whole queryset
+    under the key ``None``.
+    """
+    tz = tz or timezone.get_current_timezone()
+    starts = bucket_starts(period, periods, now, tz)
+    group = [by] if by else []
+    rows = (
+        queryset.filter(**{f"{field}__gte": starts[-1], f"{field}__lte": now or timezone.now()})
+        .annotate(bucket=TRUNCATE[period](field, tzinfo=tz))
+        .values(*group, "bucket")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    found: Dict[Any, Dict[date, Dict[str, Any]]] = {}
+    for row in rows:
+        key = row.pop(by) if by else None
+        found.setdefault(key, {})[timezone.localtime(row.pop("bucket"), tz).date()] = row
+    return {key: _fill(starts, buckets, aggregates) for key, buckets in found.items()}
+
+
+def _fill(starts: List[datetime], found: Dict[date, Dict[str, Any]], aggregates: Dict[str, Any]) -> List[Dict[str, Any]]:
+    empty = dict.fromkeys(aggregates)
+    return [{"start": start, **found.get(start.date(), empty)} for start in starts]
@@ -1,9 +1,262 @@
-from typing import Any, Optional, Callable
+from typing import Any, Optional, Callable, Dict, Iterable, List, Sequence
 from django.core.cache import cache
 from django.conf import settings
-from functools import wraps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+from collections import OrderedDict
+from functools import partial, wraps
+from rest_framework.response import Response
 import hashlib
 import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+
+from .streaming import etag_matches
+
+logger = logging.getLogger(__name__)
+
+TAG_KEY_PREFIX = "cache-tag"
+STATS_KEY_PREFIX = "cache-stats"
+STAT_FIELDS = ("local_hits", "hits", "stale", "misses", "waits", "rebuilds", "rebuild_ms")
+
+
+class CacheTags:
+    """Invalidation tags shared by cache keys and the signals that bump them."""
+    PRODUCE = "produce"
+    SUBSCRIPTION_PLANS = "subscription-plans"
+    PRICING_TIERS = "pricing-tiers"
+    DELIVERY_WINDOWS = "delivery-windows"
+    MIXED_BOXES = "mixed-boxes"
+    CATALOG = "catalog"
+
+    @staticmethod
+    def user(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    @staticmethod
+    def farmer(farmer_id: int) -> str:
+        return f"farmer:{farmer_id}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}:{tag}"
+
+
+def _new_generation() -> int:
+    # Start from the clock rather than 1, so that a tag key that was evicted
+    # cannot come back at a generation whose entries are still cached.
+    return time.time_ns() // 1000
+
+
+def tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """Current generation of each tag, read in one round trip."""
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_generation(), None)
+        found.update(cache.get_many(missing))
+    return {tag: found.get(key, 0) for key, tag in keys.items()}
+
+
+class LocalCache:
+    """A bounded LRU with per-entry expiry, private to this process.
+
+    The in-process tier in front of the Django cache. Entries must be keyed
+    with :func:`tagged_key` (``local=True``) so that a tag bump elsewhere
+    orphans them within ``LOCAL_CACHE_VERSION_CHECK_SECONDS``.
+    """
+    MISSING = object()
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return self.MISSING
+            if item[1] <= time.monotonic():
+                del self._entries[key]
+                return self.MISSING
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, value: Any, timeout: float) -> None:
+        if timeout <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + min(timeout, settings.LOCAL_CACHE_TIMEOUT))
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.LOCAL_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache()
+_local_versions: Dict[str, int] = {}
+_local_versions_checked_at = 0.0
+_local_versions_lock = threading.Lock()
+
+
+def local_tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """Like :func:`tag_versions`, but re-read at most every ``LOCAL_CACHE_VERSION_CHECK_SECONDS``.
+
+    All tags this process has seen are refreshed together, in one round trip.
+    """
+    global _local_versions, _local_versions_checked_at
+    tags = list(tags)
+    with _local_versions_lock:
+        known, checked_at = dict(_local_versions), _local_versions_checked_at
+    if time.monotonic() - checked_at >= settings.LOCAL_CACHE_VERSION_CHECK_SECONDS or not known.keys() >= set(tags):
+        known = tag_versions(set(known) | set(tags))
+        with _local_versions_lock:
+            _local_versions, _local_versions_checked_at = known, time.monotonic()
+    return {tag: known[tag] for tag in tags}
+
+
+def clear_local_cache() -> None:
+    """Drop this process's entries and tag generations (tests, ``cache.clear()``)."""
+    global _local_versions_checked_at
+    local_cache.clear()
+    with _local_versions_lock:
+        _local_versions.clear()
+        _local_versions_checked_at = 0.0
+
+
+def tagged_key(key: str, tags: List[str], *, local: bool = False) -> str:
+    """Embed the generations of ``tags`` in ``key``; bumping any tag orphans it.
+
+    With ``local=True`` the generations may be up to
+    ``LOCAL_CACHE_VERSION_CHECK_SECONDS`` old, which saves a round trip on
+    most calls. Use it for keys read through the local tier.
+    """
+    versions = local_tag_versions(tags) if local else tag_versions(tags)
+    return f"{key}@{'.'.join(str(versions[tag]) for tag in tags)}"
+
+
+def bump_tags(*tags: str) -> None:
+    """Invalidate every key built with any of ``tags``, in O(1) per tag.
+
+    Old entries are not deleted; nothing reads them any more and they expire
+    with their timeout.
+    """
+    global _local_versions_checked_at
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.add(_tag_key(tag), _new_generation(), None)
+    # This process sees its own bumps at once; others within a version check.
+    with _local_versions_lock:
+        _local_versions_checked_at = 0.0
+
+
+def bump_tags_on_commit(*tags: str) -> None:
+    # After commit, so that a reader cannot re-cache the old rows under the new generation.
+    transaction.on_commit(lambda: bump_tags(*tags))
+
+
+def invalidate_on_change(model: Any, tags_for: Callable[[Any], Iterable[str]]) -> None:
+    """Bump ``tags_for(instance)`` whenever a ``model`` row is saved or deleted."""
+    def handler(sender: Any, instance: Any, **kwargs: Any) -> None:
+        bump_tags_on_commit(*tags_for(instance))
+
+    uid = f"cache-tags:{model._meta.label}"
+    post_save.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(handler, sender=model, weak=False, dispatch_uid=uid)
+
+
+def pattern_tag(pattern: str) -> str:
+    """The tag behind a key pattern such as ``"user:5:*"`` (``"user:5"``)."""
+    return pattern.rstrip("*").rstrip(":")
+
+
+class CacheStats:
+    """Hit, miss and rebuild counters per cache name, shared by all workers.
+
+    Counts are buffered in process and added to the cache at most every
+    ``CACHE_STATS_FLUSH_SECONDS``, so recording a hit costs no round trip.
+    """
+    _lock = threading.Lock()
+    _pending: Dict[str, Dict[str, int]] = {}
+    _flushed_at = 0.0
+
+    @classmethod
+    def record(cls, name: str, **counts: int) -> None:
+        with cls._lock:
+            pending = cls._pending.setdefault(name, {})
+            for field, amount in counts.items():
+                pending[field] = pending.get(field, 0) + amount
+            due = time.monotonic() - cls._flushed_at >= settings.CACHE_STATS_FLUSH_SECONDS
+        if due:
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> None:
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+            cls._flushed_at = time.monotonic()
+        try:
+            names = set(cache.get(f"{STATS_KEY_PREFIX}:names", []))
+            if pending.keys() - names:
+                cache.set(f"{STATS_KEY_PREFIX}:names", sorted(names | pending.keys()), None)
+            for name, counts in pending.items():
+                for field, amount in counts.items():
+                    key = f"{STATS_KEY_PREFIX}:{name}:{field}"
+                    if not cache.add(key, amount, None):
+                        cache.incr(key, amount)
+        except Exception as exc:  # counters must never break a request
+            logger.warning("Could not flush cache stats: %s", exc)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Any]]:
+        """Totals per cache name, with the hit ratio and mean rebuild time."""
+        cls.flush()
+        names = cache.get(f"{STATS_KEY_PREFIX}:names", [])
+        stored = cache.get_many([f"{STATS_KEY_PREFIX}:{name}:{field}" for name in names for field in STAT_FIELDS])
+        stats = {}
+        for name in names:
+            row = {field: stored.get(f"{STATS_KEY_PREFIX}:{name}:{field}", 0) for field in STAT_FIELDS}
+            shared = row["hits"] + row["stale"] + row["misses"]
+            lookups = row["local_hits"] + shared
+            # Per tier: the local ratio is over all lookups, the shared one over local misses.
+            row["local_hit_ratio"] = round(row["local_hits"] / lookups, 4) if lookups else None
+            row["hit_ratio"] = round((row["hits"] + row["stale"]) / shared, 4) if shared else None
+            row["mean_rebuild_ms"] = round(row["rebuild_ms"] / row["rebuilds"], 1) if row["rebuilds"] else None
+            stats[name] = row
+        return stats
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._pending = {}
+        names = cache.get(f"{STATS_KEY_PREFIX}:names", [])
+        cache.delete_many([f"{STATS_KEY_PREFIX}:{name}:{field}" for name in names for field in STAT_FIELDS])
+        cache.delete(f"{STATS_KEY_PREFIX}:names")
+
+
+def _stats_name(key: str) -> str:
+    # "business:pricing:global-tiers@123" -> "business:pricing:global-tiers"
+    return key.split("@", 1)[0]
+
+
+def _expires_early(entry: dict, beta: float) -> bool:
+    # Probabilistic early expiration (XFetch): the closer an entry is to
+    # expiry, and the longer it took to build, the likelier one reader
+    # rebuilds it ahead of time, so a hot key does not expire for all at once.
+    gap = -entry["build_seconds"] * beta * math.log(1.0 - random.random())
+    return time.time() + gap >= entry["fresh_until"]
 
 
 def cache_key_generator(*args: Any, **kwargs: Any) -> str:
@@ -17,35 +270,159 @@ def cache_key_generator(*args: Any, **kwargs: Any) -> str:
     return hashlib.md5(key_string.encode()).hexdigest()
 
 
-def cache_view(timeout: int = 300, key_prefix: str = "view") -> Callable:
-    """Decorator to cache view responses."""
+# How often a caller waiting on another worker's rebuild checks the cache.
+CACHE_LOCK_POLL_SECONDS = 0.05
+
+# Renderer formats whose responses are cached; the browsable API shows the user.
+RESPONSE_CACHE_FORMATS = ("json",)
+# How long the request revalidating a stale entry holds the refresh lock.
+RESPONSE_REVALIDATE_LOCK_SECONDS = 30
+
+
+def _auth_scope(request: Any, scope: str) -> str:
+    user = request.user
+    if scope == "public":
+        return "public"
+    if not user or not user.is_authenticated:
+        return "anon"
+    if scope == "user":
+        return f"user:{user.pk}"
+    if user.is_staff:
+        return "staff"
+    profile = getattr(user, "profile", None)
+    return f"role:{getattr(profile, 'role', '')}"
+
+
+def response_cache_key(request: Any, scope: str, tags: Sequence[str], *, local: bool = False) -> str:
+    """Key a DRF request on path, normalized query params, auth scope and negotiated media type.
+
+    ``scope`` is ``"public"`` (one entry for everyone), ``"role"`` (per
+    anonymous/staff/profile role) or ``"user"``.
+    """
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values if value != "")
+    identity = json.dumps([request.path, params, _auth_scope(request, scope), request.accepted_media_type])
+    return tagged_key(f"response:{hashlib.md5(identity.encode()).hexdigest()}", list(tags), local=local)
+
+
+class CachedResponse(HttpResponse):
+    """Rendered bytes from the response cache; ``data`` decodes them like ``Response.data``."""
+
+    @property
+    def data(self) -> Any:
+        return json.loads(self.content)
+
+
+def _cached_response(request: Any, entry: dict, state: str, scope: str) -> HttpResponse:
+    if etag_matches(request.META.get("HTTP_IF_NONE_MATCH", ""), entry["etag"]):
+        response = HttpResponseNotModified()
+    else:
+        response = CachedResponse(entry["content"], content_type=entry["content_type"])
+    response["ETag"] = entry["etag"]
+    response["Cache-Control"] = f"{'public' if scope == 'public' else 'private'}, no-cache"
+    response["X-Cache"] = state
+    return response
+
+
+def serve_cached(request: Any, compute: Callable[[], Any], *, tags: Sequence[str] = (), scope: str = "role",
+                 timeout: Optional[int] = None, stale_timeout: Optional[int] = None, local: bool = False) -> Any:
+    """Answer a DRF GET from the response cache, calling ``compute()`` on a miss.
+
+    Rendered bytes are stored with an ETag, and ``If-None-Match`` gets a 304.
+    After ``timeout`` seconds an entry is stale: for up to ``stale_timeout``
+    more seconds one request recomputes it while the others are served the
+    stale bytes. Only 200 responses are cached. With ``local=True`` fresh
+    entries are also kept in this process's :data:`local_cache`.
+    """
+    if request.method not in ("GET", "HEAD") or request.accepted_renderer.format not in RESPONSE_CACHE_FORMATS:
+        return compute()
+    timeout = settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+    stale_timeout = settings.RESPONSE_CACHE_STALE_SECONDS if stale_timeout is None else stale_timeout
+    key = response_cache_key(request, scope, tags, local=local)
+    view = request.parser_context["view"]
+    stats_name = f"response:{type(view).__name__}"
+    if local:
+        entry = local_cache.get(key)
+        if entry is not LocalCache.MISSING and entry["fresh_until"] > time.time():
+            CacheStats.record(stats_name, local_hits=1)
+            return _cached_response(request, entry, "HIT", scope)
+    entry = cache.get(key)
+    if entry is not None:
+        if local:
+            local_cache.set(key, entry, entry["fresh_until"] - time.time())
+        if entry["fresh_until"] > time.time():
+            CacheStats.record(stats_name, hits=1)
+            return _cached_response(request, entry, "HIT", scope)
+        if not cache.add(f"{key}:revalidate", 1, RESPONSE_REVALIDATE_LOCK_SECONDS):
+            CacheStats.record(stats_name, stale=1)
+            return _cached_response(request, entry, "STALE", scope)
+
+    CacheStats.record(stats_name, misses=1)
+    started = time.monotonic()
+    response = compute()
+    if response.status_code != 200 or not isinstance(response, Response):
+        return response
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    content = response.render().content
+    entry = {
+        "content": content,
+        "content_type": response["Content-Type"],
+        "etag": f'"{hashlib.sha1(content).hexdigest()}"',
+        "fresh_until": time.time() + timeout,
+    }
+    cache.set(key, entry, timeout + stale_timeout)
+    cache.delete(f"{key}:revalidate")
+    if local:
+        local_cache.set(key, entry, timeout)
+    CacheStats.record(stats_name, rebuilds=1, rebuild_ms=round((time.monotonic() - started) * 1000))
+    return _cached_response(request, entry, "MISS", scope)
+
+
+def cache_view(timeout: Optional[int] = None, *, tags: Sequence[str] = (), scope: str = "role",
+               stale_timeout: Optional[int] = None, local: bool = False) -> Callable:
+    """Cache a function-based DRF view; apply it below ``@api_view``."""
     def decorator(view_func: Callable) -> Callable:
         @wraps(view_func)
-        def wrapper(*args: Any, **kwargs: Any) -> Any:
-            # Generate cache key
-            cache_key = f"{key_prefix}:{cache_key_generator(*args, **kwargs)}"
-            
-            # Try to get from cache
-            cached_response = cache.get(cache_key)
-            if cached_response is not None:
-                return cached_response
-            
-            # Call the view function
-            response = view_func(*args, **kwargs)
-            
-            # Cache the response
-            cache.set(cache_key, response, timeout)
-            
-            return response
+        def wrapper(request: Any, *args: Any, **kwargs: Any) -> Any:
+            return serve_cached(
+                request, partial(view_func, request, *args, **kwargs),
+                tags=tags, scope=scope, timeout=timeout, stale_timeout=stale_timeout, local=local,
+            )
         return wrapper
     return decorator
 
 
+class CachedResponseMixin:
+    """Serve ``list`` and ``retrieve`` of a DRF view through :func:`serve_cached`.
+
+    Set ``cache_tags`` to the tags whose models the response shows, and
+    ``cache_scope`` to ``"public"`` when it is the same for every caller.
+    Set ``cache_local`` for small reference data read on most requests, to
+    keep it in process as well.
+    """
+    cache_tags: Sequence[str] = ()
+    cache_scope = "role"
+    cache_timeout: Optional[int] = None
+    cache_stale_timeout: Optional[int] = None
+    cache_local = False
+
+    def _serve_cached(self, compute: Callable[[], Any]) -> Any:
+        return serve_cached(
+            self.request, compute, tags=self.cache_tags, scope=self.cache_scope,
+            timeout=self.cache_timeout, stale_timeout=self.cache_stale_timeout, local=self.cache_local,
+        )
+
+    def list(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        return self._serve_cached(partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request: Any, *args: Any, **kwargs: Any) -> Any:
+        return self._serve_cached(partial(super().retrieve, request, *args, **kwargs))
+
+
 def invalidate_cache_pattern(pattern: str) -> None:
-    """Invalidate all cache keys matching a pattern."""
-    # Note: This is a simplified implementation
-    # In production, you might want to use Redis SCAN or similar
-    cache.clear()
+    """Invalidate the keys tagged with the prefix of ``pattern`` (see :func:`pattern_tag`)."""
+    bump_tags(pattern_tag(pattern))
 
 
 def cache_model_queryset(model_class: Any, timeout: int = 300) -> Callable:
@@ -76,56 +453,113 @@ class CacheManager:
     """Utility class for managing cache operations."""
     
     @staticmethod
-    def get_or_set(key: str, default_func: Callable, timeout: int = 300) -> Any:
-        """Get from cache or set if not exists."""
-        result = cache.get(key)
-        if result is None:
-            result = default_func()
-            cache.set(key, result, timeout)
-        return result
+    def get_or_set(key: str, default_func: Callable, timeout: int = 300, *,
+                   stale_timeout: Optional[int] = None, name: Optional[str] = None, local: bool = False) -> Any:
+        """Get ``key`` from the cache, rebuilding it with ``default_func()`` in one caller at a time.
+
+        The caller that takes the rebuild lock calls ``default_func``. While it
+        runs, the others get the previous value if there is one, or wait for
+        the rebuild up to ``CACHE_LOCK_WAIT_SECONDS``. Values stay readable for
+        ``stale_timeout`` seconds after ``timeout`` for this purpose, and may
+        be rebuilt a little before ``timeout`` (probabilistic early expiration).
+        Hits, misses and rebuild times are counted under ``name`` (the key
+        without its tag generations); see :class:`CacheStats`.
+
+        With ``local=True`` the value is also kept in this process's
+        :data:`local_cache`; build ``key`` with ``tagged_key(..., local=True)``.
+        """
+        name = name or _stats_name(key)
+        if local:
+            value = local_cache.get(key)
+            if value is not LocalCache.MISSING:
+                CacheStats.record(name, local_hits=1)
+                return value
+            value = CacheManager.get_or_set(key, default_func, timeout, stale_timeout=stale_timeout, name=name)
+            local_cache.set(key, value, timeout)
+            return value
+        stale_timeout = settings.CACHE_STALE_SECONDS if stale_timeout is None else stale_timeout
+        entry = cache.get(key)
+        if entry is not None and not _expires_early(entry, settings.CACHE_EARLY_EXPIRY_BETA):
+            CacheStats.record(name, hits=1)
+            return entry["value"]
+
+        lock_key, token = f"{key}:rebuild", uuid.uuid4().hex
+        if not cache.add(lock_key, token, settings.CACHE_LOCK_SECONDS):
+            if entry is not None:
+                CacheStats.record(name, stale=1)
+                return entry["value"]
+            entry = CacheManager._wait_for_rebuild(key)
+            if entry is not None:
+                CacheStats.record(name, waits=1, hits=1)
+                return entry["value"]
+            # The rebuild is slow or its worker died; build it here rather than fail.
+            token = None
+
+        CacheStats.record(name, misses=1)
+        started = time.monotonic()
+        try:
+            value = default_func()
+            build_seconds = time.monotonic() - started
+            cache.set(key, {
+                "value": value, "fresh_until": time.time() + timeout, "build_seconds": build_seconds,
+            }, timeout + stale_timeout)
+        finally:
+            if token is not None and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+        CacheStats.record(name, rebuilds=1, rebuild_ms=round(build_seconds * 1000))
+        return value
+
+    @staticmethod
+    def _wait_for_rebuild(key: str) -> Optional[dict]:
+        deadline = time.monotonic() + settings.CACHE_LOCK_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(CACHE_LOCK_POLL_SECONDS)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return None
     
     @staticmethod
     def delete_pattern(pattern: str) -> None:
-        """Delete cache keys matching pattern."""
-        # This is a simplified implementation
-        # In production, use Redis SCAN
-        cache.clear()
+        """Invalidate the keys tagged with the prefix of ``pattern``."""
+        bump_tags(pattern_tag(pattern))
     
     @staticmethod
     def get_user_cache_key(user_id: int, prefix: str) -> str:
         """Generate cache key for user-specific data."""
-        return f"user:{user_id}:{prefix}"
+        return tagged_key(f"user:{user_id}:{prefix}", [CacheTags.user(user_id)])
     
     @staticmethod
     def invalidate_user_cache(user_id: int) -> None:
         """Invalidate all cache for a specific user."""
-        pattern = f"user:{user_id}:*"
-        CacheManager.delete_pattern(pattern)
+        bump_tags(CacheTags.user(user_id))
 
 
 # Cache keys for common operations
 class CacheKeys:
-    """Predefined cache keys for common operations."""
+    """Predefined cache keys for common operations, versioned by their tags."""
     
     @staticmethod
     def public_produce_list(filters: dict) -> str:
         """Cache key for public produce list."""
         filter_str = json.dumps(filters, sort_keys=True)
-        return f"public_produce_list:{hashlib.md5(filter_str.encode()).hexdigest()}"
+        return tagged_key(
+            f"public_produce_list:{hashlib.md5(filter_str.encode()).hexdigest()}", [CacheTags.PRODUCE]
+        )
     
     @staticmethod
     def user_profile(user_id: int) -> str:
         """Cache key for user profile."""
-        return f"user_profile:{user_id}"
+        return tagged_key(f"user_profile:{user_id}", [CacheTags.user(user_id)])
     
     @staticmethod
     def subscription_plans() -> str:
         """Cache key for subscription plans."""
-        return "subscription_plans"
+        return tagged_key("subscription_plans", [CacheTags.SUBSCRIPTION_PLANS])
     
     @staticmethod
     def farmer_produce(farmer_id: int) -> str:
         """Cache key for farmer's produce."""
-        return f"farmer_produce:{farmer_id}"
+        return tagged_key(f"farmer_produce:{farmer_id}", [CacheTags.PRODUCE, CacheTags.farmer(farmer_id)])
 
 
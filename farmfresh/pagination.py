@@ -1,4 +1,13 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
 
 
 class DefaultPagination(PageNumberPagination):
@@ -7,6 +16,162 @@ class DefaultPagination(PageNumberPagination):
     max_page_size = 100
 
 
+def estimated_table_rows(model, using: str = "default") -> Optional[int]:
+    """Row estimate from the database's table statistics, or None if unavailable."""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "mysql":
+        sql = "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+    elif connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def _count_cache_key(queryset) -> Optional[str]:
+    try:
+        sql = str(queryset.order_by().query)
+    except Exception:
+        # Querysets that cannot be rendered (e.g. empty IN lists) are not cached.
+        return None
+    digest = hashlib.md5(f"{queryset.db}|{sql}".encode()).hexdigest()
+    return f"pagination:count:{queryset.model._meta.label_lower}:{digest}"
+
+
+def cached_count(queryset) -> Tuple[int, bool]:
+    """Return ``(count, exact)`` for ``queryset``, cached per filter signature.
+
+    Counts are cached for ``PAGINATION_COUNT_CACHE_TTL`` seconds under a key
+    derived from the queryset's SQL, so identical filters share one COUNT.
+    Unfiltered querysets over tables the database estimates at more than
+    ``PAGINATION_COUNT_ESTIMATE_THRESHOLD`` rows use that estimate instead,
+    and ``exact`` is False.
+    """
+    key = _count_cache_key(queryset)
+    if key is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0], hit[1]
+
+    result = None
+    query = queryset.query
+    if not query.where and not query.distinct and not query.is_sliced:
+        estimate = estimated_table_rows(queryset.model, queryset.db)
+        if estimate is not None and estimate >= settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+            result = (estimate, False)
+    if result is None:
+        result = (queryset.count(), True)
+
+    if key is not None:
+        cache.set(key, result, settings.PAGINATION_COUNT_CACHE_TTL)
+    return result
+
+
+class CachedCountPaginator(Paginator):
+    """Django paginator whose ``count`` comes from :func:`cached_count`.
+
+    Usable directly as ``ModelAdmin.paginator``.
+    """
+    count_is_exact = True
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, "query"):
+            return super().count
+        count, self.count_is_exact = cached_count(self.object_list)
+        return count
+
+
+class CachedCountPagination(DefaultPagination):
+    """Page-number pagination with cached, possibly estimated, counts.
+
+    Adds ``count_exact`` to the response so clients can show "about N" when
+    the count is an estimate.
+    """
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.page.paginator.count,
+            "count_exact": self.page.paginator.count_is_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_exact"] = {"type": "boolean", "example": True}
+        return response_schema
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset pagination over ``(created_at, id)``, newest first.
+
+    Pages are fetched with an indexed range scan instead of an OFFSET, so deep
+    pages cost the same as the first one; only rows sharing the boundary
+    timestamp are skipped by offset. ``?ordering=`` is honoured for the view's
+    ``ordering_fields``; ``id`` is appended as a tiebreaker.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = ordering or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if not any(field.lstrip("-") in ("id", "pk") for field in ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def decode_cursor(self, request):
+        # A bare ``?cursor=`` asks for the first page in cursor mode.
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        return super().decode_cursor(request)
+
+
+class CursorOrPageNumberPagination(DefaultPagination):
+    """Page-number pagination that switches to keyset pages on ``?cursor=``.
+
+    Existing clients keep ``?page=`` and ``count``; clients that send
+    ``cursor`` (empty for the first page) get ``CreatedAtCursorPagination``
+    pages and follow ``next``/``previous`` from there.
+    """
+    cursor_query_param = "cursor"
+    cursor_pagination_class = CreatedAtCursorPagination
 
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
 
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
 
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            "name": self.cursor_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Cursor for keyset pagination; send it empty to start.",
+            "schema": {"type": "string"},
+        }]
@@ -253,6 +253,12 @@ CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default=CELERY_BROKER_URL)
 CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=False)
 CELERY_TASK_TIME_LIMIT = env.int("CELERY_TASK_TIME_LIMIT", default=300)
+CELERY_TASK_ROUTES = {
+    # Invoice rendering starts a process pool, which prefork children may not
+    # do; serve this queue with a solo or threads worker (see DOCs/payments.md).
+    "business.tasks.render_invoice_pdfs_task": {"queue": "invoices"},
+    "business.tasks.render_outstanding_invoices_task": {"queue": "invoices"},
+}
 CELERY_BEAT_SCHEDULE = {
     "send_digests_daily": {
         "task": "notifications.tasks.send_digest_task",
@@ -264,8 +270,87 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": 24 * 60 * 60,  # daily
         "options": {"queue": "default"},
     },
+    "dispatch_notification_outbox": {
+        # Safety net for dispatches that were not enqueued on commit.
+        "task": "notifications.tasks.dispatch_outbox_task",
+        "schedule": 60,
+        "options": {"queue": "default"},
+    },
+    "render_business_invoices_nightly": {
+        "task": "business.tasks.render_outstanding_invoices_task",
+        "schedule": 24 * 60 * 60,  # daily
+        "options": {"queue": "invoices"},
+    },
+    "purge_idempotency_keys_hourly": {
+        "task": "api.tasks.purge_idempotency_keys_task",
+        "schedule": 60 * 60,  # hourly
+        "options": {"queue": "default"},
+    },
+    "send_back_in_stock_alerts_daily": {
+        "task": "consumers.tasks.send_back_in_stock_alerts_task",
+        "schedule": 24 * 60 * 60,  # daily
+        "args": ("daily",),
+        "options": {"queue": "default"},
+    },
+    "send_back_in_stock_alerts_weekly": {
+        "task": "consumers.tasks.send_back_in_stock_alerts_task",
+        "schedule": 7 * 24 * 60 * 60,  # weekly
+        "args": ("weekly",),
+        "options": {"queue": "default"},
+    },
+    "send_back_in_stock_alerts_immediate": {
+        # Safety net for immediate alerts whose delayed send was not enqueued.
+        "task": "consumers.tasks.send_back_in_stock_alerts_task",
+        "schedule": 15 * 60,
+        "args": ("immediate",),
+        "options": {"queue": "default"},
+    },
+    "rebuild_consumer_analytics_nightly": {
+        # Safety net for refreshes that were not enqueued; also ages days_since_last_order.
+        "task": "consumers.tasks.rebuild_consumer_analytics_task",
+        "schedule": 24 * 60 * 60,  # daily
+        "options": {"queue": "default"},
+    },
 }
 
+# Idempotency-Key handling for retried POSTs (see api/idempotency.py)
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_TIMEOUT = env.int("IDEMPOTENCY_LOCK_TIMEOUT", default=120)
+IDEMPOTENCY_WAIT_TIMEOUT = env.int("IDEMPOTENCY_WAIT_TIMEOUT", default=1)
+
+# Page-number pagination counts (see farmfresh/pagination.py)
+PAGINATION_COUNT_CACHE_TTL = env.int("PAGINATION_COUNT_CACHE_TTL", default=60)
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = env.int("PAGINATION_COUNT_ESTIMATE_THRESHOLD", default=1_000_000)
+
+# DRF response cache (see farmfresh/cache.py): seconds fresh, then seconds served stale while one request refreshes
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=60)
+RESPONSE_CACHE_STALE_SECONDS = env.int("RESPONSE_CACHE_STALE_SECONDS", default=300)
+
+# CacheManager.get_or_set (see farmfresh/cache.py): stampede protection and counters
+CACHE_STALE_SECONDS = env.int("CACHE_STALE_SECONDS", default=60)
+CACHE_LOCK_SECONDS = env.int("CACHE_LOCK_SECONDS", default=10)
+CACHE_LOCK_WAIT_SECONDS = env.float("CACHE_LOCK_WAIT_SECONDS", default=2.0)
+CACHE_EARLY_EXPIRY_BETA = env.float("CACHE_EARLY_EXPIRY_BETA", default=1.0)
+CACHE_STATS_FLUSH_SECONDS = env.int("CACHE_STATS_FLUSH_SECONDS", default=10)
+
+# In-process cache tier for reference data (see LocalCache in farmfresh/cache.py)
+LOCAL_CACHE_MAX_ENTRIES = env.int("LOCAL_CACHE_MAX_ENTRIES", default=256)
+LOCAL_CACHE_TIMEOUT = env.int("LOCAL_CACHE_TIMEOUT", default=300)
+LOCAL_CACHE_VERSION_CHECK_SECONDS = env.float("LOCAL_CACHE_VERSION_CHECK_SECONDS", default=1.0)
+
+# "Produce available again" notifications (see farmers/availability.py): one announcement per produce per window
+PRODUCE_AVAILABLE_COOLDOWN_SECONDS = env.int("PRODUCE_AVAILABLE_COOLDOWN_SECONDS", default=6 * 60 * 60)
+
+# Wishlist back-in-stock alerts (see consumers/wishlist.py): immediate alerts within this window share a message
+WISHLIST_ALERT_DEBOUNCE_SECONDS = env.int("WISHLIST_ALERT_DEBOUNCE_SECONDS", default=120)
+
+# Materialized consumer analytics (see consumers/analytics.py): refreshes within the delay share one job of up to BATCH_SIZE consumers
+CONSUMER_ANALYTICS_DELAY_SECONDS = env.int("CONSUMER_ANALYTICS_DELAY_SECONDS", default=60)
+CONSUMER_ANALYTICS_BATCH_SIZE = env.int("CONSUMER_ANALYTICS_BATCH_SIZE", default=200)
+
+# Business invoice PDFs (see business/invoices.py); processes in the render pool
+INVOICE_PDF_WORKERS = env.int("INVOICE_PDF_WORKERS", default=2)
+
 # Sentry (optional)
 SENTRY_DSN = env("SENTRY_DSN", default="")
 SENTRY_TRACES_SAMPLE_RATE = env.float("SENTRY_TRACES_SAMPLE_RATE", default=0.0)
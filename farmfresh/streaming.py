@@ -0,0 +1,131 @@
+import re
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_BATCH_ROWS = 2000
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UnsatisfiableRange(ValueError):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Return the inclusive ``(start, end)`` of a single-range ``Range`` header.
+
+    Headers that are malformed or ask for several ranges return ``None``, and
+    the whole file is served. Ranges outside the file raise
+    :class:`UnsatisfiableRange`.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        suffix = int(last)
+        if not suffix:
+            raise UnsatisfiableRange(header)
+        start, end = max(size - suffix, 0), size - 1
+    if start > end or start >= size:
+        raise UnsatisfiableRange(header)
+    return start, end
+
+
+def _read_chunks(fileobj: IO[bytes], start: int, length: int) -> Iterator[bytes]:
+    try:
+        fileobj.seek(start)
+        while length > 0:
+            chunk = fileobj.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def stream_file(request, fileobj: IO[bytes], size: int, etag: str, content_type: str,
+                filename: Optional[str] = None) -> HttpResponse:
+    """Stream ``fileobj`` in chunks, honouring ``If-None-Match``, ``Range`` and ``If-Range``.
+
+    ``etag`` must identify the file content; it is sent quoted. The file is
+    closed once the response has been consumed (or immediately when no body
+    is sent).
+    """
+    etag = f'"{etag}"'
+    if etag_matches(request.META.get("HTTP_IF_NONE_MATCH", ""), etag):
+        fileobj.close()
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    byte_range = None
+    range_header = request.META.get("HTTP_RANGE")
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except UnsatisfiableRange:
+            fileobj.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(_read_chunks(fileobj, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+    else:
+        response = StreamingHttpResponse(_read_chunks(fileobj, 0, size), content_type=content_type)
+        response["Content-Length"] = str(size)
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def keyset_batches(queryset, fields: List[str], batch_size: Optional[int] = None) -> Iterator[List[dict]]:
+    """Yield ``queryset.values(*fields)`` in primary-key order, one bounded query per batch.
+
+    ``fields`` must include ``"id"``. Unlike ``QuerySet.iterator()``, which
+    only streams on PostgreSQL, memory stays flat on every backend and no
+    cursor is held open between batches.
+    """
+    batch_size = batch_size or STREAM_BATCH_ROWS
+    last_id = None
+    while True:
+        page = queryset.order_by("id")
+        if last_id is not None:
+            page = page.filter(id__gt=last_id)
+        rows = list(page.values(*fields)[:batch_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def ndjson_response(lines: Iterable[dict]) -> StreamingHttpResponse:
+    """Stream ``lines`` as newline-delimited JSON, encoding each one as it is produced."""
+    encoder = JSONEncoder(separators=(",", ":"))
+    response = StreamingHttpResponse(
+        (encoder.encode(line) + "\n" for line in lines), content_type="application/x-ndjson"
+    )
+    # Ask nginx not to buffer the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
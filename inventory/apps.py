@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'inventory'
\ No newline at end of file
+    name = 'inventory'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+        return super().ready()
@@ -0,0 +1,5 @@
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .models import Category, Product, ProductImage, ProductVariant
+
+for model in (Category, Product, ProductVariant, ProductImage):
+    invalidate_on_change(model, lambda instance: [CacheTags.CATALOG])
@@ -1,10 +1,15 @@
 from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+
+from farmfresh.cache import CachedResponseMixin, CacheTags
 from .models import Category, Product, ProductVariant
 from .serializers import CategorySerializer, ProductSerializer, ProductVariantSerializer
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_tags = [CacheTags.CATALOG]
+    cache_scope = "public"
+    cache_local = True
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -12,7 +17,9 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["name", "id"]
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_tags = [CacheTags.CATALOG]
+    cache_scope = "public"
     queryset = Product.objects.filter(is_active=True).select_related("category").prefetch_related("variants", "images")
     serializer_class = ProductSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -21,7 +28,9 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ["name", "id", "created_at"]
 
 
-class ProductVariantViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductVariantViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_tags = [CacheTags.CATALOG]
+    cache_scope = "public"
     queryset = ProductVariant.objects.filter(is_active=True).select_related("product")
     serializer_class = ProductVariantSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
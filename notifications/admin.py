@@ -1,11 +1,23 @@
 from django.contrib import admin
-from .models import Notification
+from farmfresh.pagination import CachedCountPaginator
+from .models import Notification, NotificationOutbox
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     list_display = ("user", "title", "is_read", "created_at")
     list_filter = ("is_read",)
     search_fields = ("user__username", "title", "message")
 
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ("notification", "status", "send_email", "send_sms", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    search_fields = ("notification__user__username", "notification__title")
+    raw_id_fields = ("notification",)
+    readonly_fields = ("claim_token", "claimed_at", "next_attempt_at", "email_sent_at", "sms_sent_at", "last_error")
+
 # Register your models here.
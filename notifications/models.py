@@ -9,7 +9,49 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
+
     def __str__(self) -> str:
         return f"Notification({self.user.username}, {self.title})"
 
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    SENDING = "SENDING", "Sending"
+    SENT = "SENT", "Sent"
+    FAILED = "FAILED", "Failed"
+
+
+class NotificationOutbox(models.Model):
+    """Email/SMS delivery queued in the same transaction as its notification.
+
+    Rows are drained after commit by ``notifications.tasks.dispatch_outbox_task``.
+    """
+    notification = models.OneToOneField(Notification, on_delete=models.CASCADE, related_name="outbox")
+    send_email = models.BooleanField(default=True)
+    send_sms = models.BooleanField(default=True)
+    status = models.CharField(max_length=20, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, help_text="Not retried before this time")
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    sms_sent_at = models.DateTimeField(null=True, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"]),
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["claim_token"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Outbox({self.notification_id}, {self.status})"
+
 # Create your models here.
@@ -1,7 +1,7 @@
 from celery import shared_task
 from django.utils import timezone
 
-from .utils import notify_user
+from .utils import dispatch_outbox, notify_user
 from .models import Notification
 from django.contrib.auth.models import User
 from orders.models import Order
@@ -25,4 +25,13 @@ def send_digest_task(days: int = 1):
         notify_user(user, title="Your FarmFresh digest", message="\n".join(msg_lines), sms=False)
 
 
-
+@shared_task
+def dispatch_outbox_task(max_batches: int = 50):
+    """Drain the notification outbox, one batch (one mail connection) at a time."""
+    processed = 0
+    for _ in range(max_batches):
+        count = dispatch_outbox()
+        processed += count
+        if not count:
+            break
+    return processed
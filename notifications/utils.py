@@ -1,39 +1,210 @@
-from typing import Optional
+import logging
+import uuid
+from datetime import timedelta
+from typing import Any, Iterable, List, Optional, Tuple
 
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 
-from .models import Notification
+from .models import Notification, NotificationOutbox, OutboxStatus
 
+logger = logging.getLogger(__name__)
 
-def _send_sms(phone_number: Optional[str], body: str) -> None:
-    if not phone_number:
-        return
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+# A failed row waits OUTBOX_RETRY_DELAY, doubled after every further failure, up to OUTBOX_MAX_RETRY_DELAY.
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+# Rows left in SENDING longer than this belonged to a worker that died mid-batch.
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def _sms_client() -> Optional[Any]:
+    """Return a Twilio client, or None when SMS is not configured."""
     account_sid = getattr(settings, "TWILIO_ACCOUNT_SID", None)
     auth_token = getattr(settings, "TWILIO_AUTH_TOKEN", None)
     from_number = getattr(settings, "TWILIO_FROM_NUMBER", None)
     if not (account_sid and auth_token and from_number):
-        return
+        return None
     try:
         from twilio.rest import Client  # type: ignore
 
-        client = Client(account_sid, auth_token)
-        client.messages.create(
-            body=body,
-            from_=from_number,
-            to=phone_number,
-        )
+        return Client(account_sid, auth_token)
     except Exception:
         # Fail silently in dev
-        pass
+        return None
+
+
+def _send_sms(client: Any, phone_number: Optional[str], body: str) -> None:
+    if not (client and phone_number):
+        return
+    client.messages.create(
+        body=body,
+        from_=settings.TWILIO_FROM_NUMBER,
+        to=phone_number,
+    )
+
+
+def _kick_dispatcher() -> None:
+    from .tasks import dispatch_outbox_task
+
+    try:
+        dispatch_outbox_task.delay()
+    except Exception:
+        # The periodic dispatcher picks the rows up if the broker is down.
+        logger.warning("Could not enqueue notification outbox dispatch", exc_info=True)
 
 
 def notify_user(user, title: str, message: str, email: bool = True, sms: bool = True):
-    Notification.objects.create(user=user, title=title, message=message)
-    if email and user.email:
-        send_mail(subject=title, message=message, from_email=None, recipient_list=[user.email])
-    if sms:
+    """Create an in-app notification and queue its email/SMS delivery.
+
+    Nothing is sent inline: the outbox row commits or rolls back with the
+    caller's transaction and is delivered by the outbox dispatcher once the
+    transaction commits.
+    """
+    notification = Notification.objects.create(user=user, title=title, message=message)
+    send_email = bool(email and user.email)
+    if send_email or sms:
+        NotificationOutbox.objects.create(notification=notification, send_email=send_email, send_sms=sms)
+        transaction.on_commit(_kick_dispatcher)
+    return notification
+
+
+def notify_users(messages: Iterable[Tuple[Any, str, str]], email: bool = True, sms: bool = True) -> List[Notification]:
+    """Queue many ``(user, title, message)`` notifications with one dispatcher kick.
+
+    Rows are bulk-inserted where the database returns primary keys from bulk
+    inserts; otherwise (MySQL) they are inserted one by one in the same
+    transaction.
+    """
+    messages = list(messages)
+    if not messages:
+        return []
+    if connection.features.can_return_rows_from_bulk_insert:
+        notifications = Notification.objects.bulk_create([
+            Notification(user=user, title=title, message=message) for user, title, message in messages
+        ])
+    else:
+        notifications = [
+            Notification.objects.create(user=user, title=title, message=message) for user, title, message in messages
+        ]
+    outbox = []
+    for notification, (user, _, _) in zip(notifications, messages):
+        send_email = bool(email and user.email)
+        if send_email or sms:
+            outbox.append(NotificationOutbox(notification=notification, send_email=send_email, send_sms=sms))
+    if outbox:
+        NotificationOutbox.objects.bulk_create(outbox)
+        transaction.on_commit(_kick_dispatcher)
+    return notifications
+
+
+def _claim_outbox_batch(batch_size: int) -> list:
+    """Atomically mark up to ``batch_size`` pending rows as ours and return them."""
+    NotificationOutbox.objects.filter(
+        status=OutboxStatus.SENDING, claimed_at__lt=timezone.now() - OUTBOX_CLAIM_TIMEOUT
+    ).update(status=OutboxStatus.PENDING, claim_token="")
+
+    now = timezone.now()
+    ids = list(
+        NotificationOutbox.objects.filter(status=OutboxStatus.PENDING)
+        .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        .order_by("id")
+        .values_list("id", flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    NotificationOutbox.objects.filter(pk__in=ids, status=OutboxStatus.PENDING).update(
+        status=OutboxStatus.SENDING,
+        claim_token=token,
+        claimed_at=timezone.now(),
+        attempts=F("attempts") + 1,
+    )
+    return list(
+        NotificationOutbox.objects.filter(claim_token=token, status=OutboxStatus.SENDING)
+        .select_related("notification__user__profile")
+    )
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return min(OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0), OUTBOX_MAX_RETRY_DELAY)
+
+
+def _deliver(row: NotificationOutbox, mail_connection: Any, sms_client: Any) -> None:
+    """Send the channels of ``row`` not delivered yet, stamping each one as it succeeds.
+
+    A failing channel does not stop the other one; the first error is raised
+    once both were tried, and a retry only sends what is still unstamped.
+    """
+    notification = row.notification
+    user = notification.user
+    error = None
+    if row.send_email and row.email_sent_at is None and user.email:
+        try:
+            mail_connection.send_messages([
+                EmailMessage(subject=notification.title, body=notification.message, to=[user.email])
+            ])
+            row.email_sent_at = timezone.now()
+        except Exception as exc:
+            error = exc
+    if row.send_sms and row.sms_sent_at is None:
         phone_number = getattr(getattr(user, "profile", None), "phone_number", None)
-        _send_sms(phone_number, f"{title}: {message}")
+        try:
+            _send_sms(sms_client, phone_number, f"{notification.title}: {notification.message}")
+            row.sms_sent_at = timezone.now()
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        raise error
+
 
+def dispatch_outbox(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Deliver one batch of queued notifications; return how many rows were processed.
+
+    The batch shares one SMTP connection and one SMS client. Failed rows go
+    back to PENDING, not to be claimed again before an exponentially growing
+    delay, until ``OUTBOX_MAX_ATTEMPTS`` is reached. Channels that did go
+    out are recorded on the row and not sent again.
+    """
+    rows = _claim_outbox_batch(batch_size)
+    if not rows:
+        return 0
+
+    sent, errors = [], {}
+    sms_client = _sms_client() if any(row.send_sms for row in rows) else None
+    try:
+        with get_connection() as mail_connection:
+            for row in rows:
+                try:
+                    _deliver(row, mail_connection, sms_client)
+                    sent.append(row)
+                except Exception as exc:
+                    errors[row.pk] = str(exc)
+    except Exception as exc:
+        # The mail connection itself failed; retry whatever was not delivered.
+        delivered = {row.pk for row in sent}
+        for row in rows:
+            if row.pk not in delivered:
+                errors.setdefault(row.pk, str(exc))
 
+    now = timezone.now()
+    for row in sent:
+        row.status, row.sent_at, row.last_error, row.next_attempt_at = OutboxStatus.SENT, now, "", None
+    unsent = [row for row in rows if row.pk in errors]
+    for row in unsent:
+        row.last_error = errors[row.pk][:1000]
+        if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+            row.status, row.next_attempt_at = OutboxStatus.FAILED, None
+        else:
+            row.status = OutboxStatus.PENDING
+            row.next_attempt_at = now + _retry_delay(row.attempts)
+    NotificationOutbox.objects.bulk_update(
+        sent + unsent, ["status", "sent_at", "last_error", "next_attempt_at", "email_sent_at", "sms_sent_at"]
+    )
+    if unsent:
+        logger.warning("%d notification outbox rows could not be delivered", len(unsent))
+    return len(rows)
@@ -10,6 +10,7 @@ from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from rest_framework_simplejwt.tokens import AccessToken
 
+from farmfresh.pagination import CursorOrPageNumberPagination
 from .models import Notification
 from .serializers import NotificationSerializer
 
@@ -17,9 +18,10 @@ from .serializers import NotificationSerializer
 class NotificationListView(generics.ListAPIView):
     """List notifications for the authenticated user, newest first."""
     serializer_class = NotificationSerializer
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by("-created_at")
+        return Notification.objects.filter(user=self.request.user).order_by("-created_at", "-id")
 
 
 class NotificationReadUpdateView(generics.UpdateAPIView):
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Cart, CartItem, Order, OrderItem
+from farmfresh.pagination import CachedCountPaginator
+from .models import Cart, CartItem, FarmerOrder, Order, OrderItem
 
 
 @admin.register(Cart)
@@ -14,6 +15,8 @@ class CartItemAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    paginator = CachedCountPaginator
+    show_full_result_count = False
     list_display = ("id", "user", "status", "total_amount", "created_at")
     list_filter = ("status",)
     search_fields = ("id", "user__username")
@@ -23,4 +26,11 @@ class OrderAdmin(admin.ModelAdmin):
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ("order", "product_name", "quantity", "subtotal")
 
+
+@admin.register(FarmerOrder)
+class FarmerOrderAdmin(admin.ModelAdmin):
+    list_display = ("order", "farmer", "status", "subtotal", "created_at")
+    list_filter = ("status",)
+    raw_id_fields = ("order", "farmer")
+
 # Register your models here.
@@ -0,0 +1,99 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from farmers.models import FarmerProfile, Produce
+from orders.models import Cart, CartItem
+from orders.services import CheckoutError, checkout_cart
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark checkout: queries per checkout and throughput of parallel "
+        "checkouts competing for the same produce. Creates throwaway users and "
+        "produce and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=20, help="Cart lines per checkout")
+        parser.add_argument("--checkouts", type=int, default=50, help="Number of parallel checkouts")
+        parser.add_argument("--workers", type=int, default=8, help="Worker threads")
+        parser.add_argument("--stock", type=int, default=None, help="Units per produce (default: half the checkouts)")
+
+    def handle(self, *args, **options):
+        lines = options["lines"]
+        checkouts = options["checkouts"]
+        workers = options["workers"]
+        stock = options["stock"] if options["stock"] is not None else max(1, checkouts // 2)
+        tag = f"bench-{uuid.uuid4().hex[:8]}"
+
+        farmer_user = User.objects.create_user(username=f"{tag}-farmer")
+        farmer = FarmerProfile.objects.create(user=farmer_user, name=tag)
+        produce = Produce.objects.bulk_create([
+            Produce(
+                farmer=farmer,
+                name=f"{tag}-{i}",
+                unit="kg",
+                price_per_unit=Decimal("1.50"),
+                quantity_available=stock,
+            )
+            for i in range(lines)
+        ])
+        buyers = [User.objects.create_user(username=f"{tag}-buyer-{i}") for i in range(checkouts + 1)]
+
+        def fill_cart(user):
+            cart, _ = Cart.objects.get_or_create(user=user)
+            CartItem.objects.bulk_create([CartItem(cart=cart, produce=p, quantity=1) for p in produce])
+
+        try:
+            for user in buyers:
+                fill_cart(user)
+
+            # Queries for a single uncontended checkout
+            with CaptureQueriesContext(connection) as ctx:
+                checkout_cart(buyers[0])
+            self.stdout.write(f"queries per checkout ({lines} lines): {len(ctx.captured_queries)}")
+
+            def run(user):
+                try:
+                    checkout_cart(user)
+                    return "ok"
+                except CheckoutError:
+                    return "rejected"
+                except Exception as exc:
+                    return f"error:{exc.__class__.__name__}"
+                finally:
+                    connection.close()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, buyers[1:]))
+            elapsed = time.perf_counter() - started
+
+            placed = results.count("ok")
+            errors = [r for r in results if r.startswith("error")]
+            remaining = list(Produce.objects.filter(pk__in=[p.pk for p in produce]).values_list("quantity_available", flat=True))
+            sold = stock * lines - sum(remaining)
+            self.stdout.write(
+                f"parallel checkouts: {checkouts} with {workers} workers in {elapsed:.2f}s "
+                f"({checkouts / elapsed:.1f}/s); placed={placed} "
+                f"rejected={results.count('rejected')} errors={len(errors)}"
+            )
+            if errors:
+                # SQLite serialises writers and reports "database is locked"
+                # under contention; run against MySQL for meaningful numbers.
+                self.stdout.write(f"error types: {sorted(set(errors))}")
+            # The uncontended checkout above also took one unit per line.
+            expected_sold = (placed + 1) * lines
+            if sold != expected_sold or min(remaining) < 0:
+                self.stderr.write(self.style.ERROR(f"Stock mismatch: sold={sold} expected={expected_sold}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"No oversell: sold={sold} of {stock * lines} units"))
+        finally:
+            User.objects.filter(username__startswith=tag).delete()
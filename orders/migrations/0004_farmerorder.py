@@ -0,0 +1,55 @@
+# Generated by Django 4.2.23 on 2026-10-18 02:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_farmer_orders(apps, schema_editor):
+    FarmerOrder = apps.get_model("orders", "FarmerOrder")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    rows = (
+        OrderItem.objects.filter(produce__isnull=False)
+        .values("order_id", "order__status", "order__created_at", "produce__farmer_id")
+        .annotate(subtotal=models.Sum("subtotal"))
+        .order_by("order_id")
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(FarmerOrder(
+            farmer_id=row["produce__farmer_id"],
+            order_id=row["order_id"],
+            status=row["order__status"],
+            subtotal=row["subtotal"],
+            created_at=row["order__created_at"],
+        ))
+        if len(batch) >= 2000:
+            FarmerOrder.objects.bulk_create(batch)
+            batch = []
+    FarmerOrder.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farmers', '0005_farmerprofile_total_earnings_and_more'),
+        ('orders', '0003_mixedbox_mixedboxitem_order_delivery_fee_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmerOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('DELIVERED', 'Delivered')], default='PENDING', max_length=20)),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField()),
+                ('farmer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='farmer_orders', to='farmers.farmerprofile')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='farmer_orders', to='orders.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['farmer', 'created_at', 'id'], name='orders_farm_farmer__e2ffdd_idx'), models.Index(fields=['farmer', 'status', 'created_at'], name='orders_farm_farmer__21ae0f_idx'), models.Index(fields=['farmer', 'subtotal'], name='orders_farm_farmer__5adbed_idx')],
+                'unique_together': {('farmer', 'order')},
+            },
+        ),
+        migrations.RunPython(backfill_farmer_orders, migrations.RunPython.noop),
+    ]
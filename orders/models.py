@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from farmers.models import Produce
+from farmers.models import FarmerProfile, Produce
 from django.core.validators import MinValueValidator
 from django.db.models import Q
 
@@ -97,6 +97,7 @@ class Order(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
             models.Index(fields=['user', 'status']),
+            models.Index(fields=['user', 'created_at', 'id']),
         ]
 
     def __str__(self) -> str:
@@ -134,4 +135,29 @@ class OrderItem(models.Model):
             )
         ]
 
+
+class FarmerOrder(models.Model):
+    """One row per (farmer, order): the farmer's slice of an order.
+
+    Denormalizes the order's status and creation time so a farmer's order
+    history is a range scan on this table instead of a join through order
+    items and produce.
+    """
+    farmer = models.ForeignKey(FarmerProfile, on_delete=models.CASCADE, related_name="farmer_orders")
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="farmer_orders")
+    status = models.CharField(max_length=20, choices=OrderStatus.choices, default=OrderStatus.PENDING)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("farmer", "order")
+        indexes = [
+            models.Index(fields=["farmer", "created_at", "id"]),
+            models.Index(fields=["farmer", "status", "created_at"]),
+            models.Index(fields=["farmer", "subtotal"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Order {self.order_id} for farmer {self.farmer_id}"
+
 # Create your models here.
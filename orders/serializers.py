@@ -1,8 +1,10 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, Prefetch
 from rest_framework import serializers
 
 from farmers.models import Produce
 from farmers.serializers import ProduceSerializer
-from .models import Cart, CartItem, Order, OrderItem, OrderStatus, MixedBox, MixedBoxItem
+from .models import Cart, CartItem, FarmerOrder, Order, OrderItem, OrderStatus, MixedBox, MixedBoxItem
 from farmers.serializers import FarmerProfileSerializer
 
 
@@ -60,6 +62,16 @@ class OrderItemSerializer(serializers.ModelSerializer):
         ]
 
 
+def order_items_prefetch(lookup: str = "items") -> Prefetch:
+    """Prefetch ``Order.items`` with each item's farmer id for ``OrderSerializer``.
+
+    With this prefetch in place ``farmer_items`` is filtered in memory instead
+    of running one query per order. Pass ``lookup`` (e.g. ``"order__items"``)
+    when the orders are reached through a relation.
+    """
+    return Prefetch(lookup, queryset=OrderItem.objects.annotate(produce_farmer_id=F("produce__farmer_id")))
+
+
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     status = serializers.ChoiceField(choices=OrderStatus.choices)
@@ -81,15 +93,58 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
 
+    def _request_farmer_profile(self):
+        """Return the requesting user's farmer profile, resolved once per request."""
+        # The context dict is shared by every order in a list, so cache it there.
+        if "farmer_profile" not in self.context:
+            request = self.context.get("request")
+            user = getattr(request, "user", None)
+            farmer_profile = None
+            if user is not None and user.is_authenticated:
+                try:
+                    farmer_profile = user.farmer_profile
+                except ObjectDoesNotExist:
+                    pass
+            self.context["farmer_profile"] = farmer_profile
+        return self.context["farmer_profile"]
+
     def get_farmer_items(self, obj):
-        user = self.context.get("request").user if self.context.get("request") else None
-        if not user or not hasattr(user, "farmer_profile"):
+        farmer_profile = self._request_farmer_profile()
+        if farmer_profile is None:
             return []
-        farmer_profile = user.farmer_profile
-        items = obj.items.filter(produce__farmer=farmer_profile)
+        prefetched = getattr(obj, "_prefetched_objects_cache", {}).get("items")
+        if prefetched is not None and all(hasattr(item, "produce_farmer_id") for item in prefetched):
+            items = [item for item in prefetched if item.produce_farmer_id == farmer_profile.pk]
+        else:
+            items = obj.items.filter(produce__farmer=farmer_profile)
         return OrderItemSerializer(items, many=True).data
 
 
+class OrderStatusTransitionSerializer(serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000
+    )
+    status = serializers.ChoiceField(choices=[OrderStatus.CONFIRMED, OrderStatus.DELIVERED])
+
+
+class FarmerOrderSerializer(serializers.ModelSerializer):
+    """A ``FarmerOrder`` row rendered as its order, in ``OrderSerializer``'s shape.
+
+    Adds the farmer's own ``farmer_subtotal`` and ``farmer_status``.
+    """
+    farmer_subtotal = serializers.DecimalField(source="subtotal", max_digits=12, decimal_places=2, read_only=True)
+    farmer_status = serializers.CharField(source="status", read_only=True)
+
+    class Meta:
+        model = FarmerOrder
+        fields = ["farmer_subtotal", "farmer_status"]
+
+    def to_representation(self, instance):
+        data = OrderSerializer(instance.order, context=self.context).data
+        data.update(super().to_representation(instance))
+        return data
+
+
 class MixedBoxItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = MixedBoxItem
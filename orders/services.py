@@ -0,0 +1,352 @@
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from audit.models import AuditLog
+from consumers.analytics import queue_consumer_analytics
+from consumers.wishlist import queue_wishlist_stock_sync
+from business.rollups import record_business_rollups, record_status_changes
+from farmers.models import FarmerEarnings, FarmerProfile, Produce
+from farmfresh.cache import CacheTags, bump_tags_on_commit
+from notifications.utils import notify_user, notify_users
+from deliveries.models import Delivery
+from .models import Cart, FarmerOrder, Order, OrderItem, OrderStatus
+
+
+class CheckoutError(Exception):
+    """Raised when an order cannot be placed; ``payload`` is the 400 response body."""
+
+    def __init__(self, payload: dict) -> None:
+        super().__init__(payload)
+        self.payload = payload
+
+
+class OrderLine(NamedTuple):
+    """A priced request for ``quantity`` units of one produce."""
+    produce: Produce
+    quantity: int
+    unit: str
+    unit_price: Decimal
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.unit_price * Decimal(self.quantity)
+
+
+def _requested_quantities(lines: Iterable[OrderLine]) -> Dict[int, int]:
+    """Sum requested quantities per produce so each row is reserved once."""
+    requested: Dict[int, int] = {}
+    for line in lines:
+        requested[line.produce.id] = requested.get(line.produce.id, 0) + line.quantity
+    return requested
+
+
+def validate_lines(lines: List[OrderLine]) -> List[dict]:
+    """Check lines against the loaded stock snapshot without taking any locks.
+
+    This only fast-fails obviously bad carts; the authoritative check is the
+    guarded UPDATE in :func:`reserve_stock`.
+    """
+    errors = []
+    requested = _requested_quantities(lines)
+    for line in lines:
+        produce = line.produce
+        if line.quantity <= 0:
+            errors.append({
+                "produce_id": produce.id,
+                "name": produce.name,
+                "detail": "Quantity must be greater than zero.",
+            })
+        elif produce.quantity_available < requested[produce.id]:
+            errors.append({
+                "produce_id": produce.id,
+                "name": produce.name,
+                "available": produce.quantity_available,
+                "requested": requested[produce.id],
+                "detail": "Insufficient stock",
+            })
+    return errors
+
+
+def reserve_stock(lines: List[OrderLine]) -> None:
+    """Decrement stock for every line with one conditional UPDATE per produce.
+
+    Each UPDATE only matches while ``quantity_available >= requested``, so two
+    concurrent checkouts can never take the same units. Rows are touched in
+    primary-key order to keep lock acquisition deadlock-free. Must run inside
+    a transaction; raises :class:`CheckoutError` listing every line that could
+    not be reserved.
+    """
+    requested = _requested_quantities(lines)
+    failed = []
+    for produce_id in sorted(requested):
+        quantity = requested[produce_id]
+        # ``available`` is assigned before ``quantity_available`` so backends
+        # that evaluate SET clauses left to right (MySQL) still compare
+        # against the pre-update stock.
+        updated = Produce.objects.filter(
+            pk=produce_id, quantity_available__gte=quantity
+        ).update(
+            available=Case(
+                When(quantity_available__lte=quantity, then=Value(False)),
+                default=F("available"),
+            ),
+            quantity_available=F("quantity_available") - quantity,
+        )
+        if not updated:
+            failed.append(produce_id)
+
+    if failed:
+        current = dict(
+            Produce.objects.filter(pk__in=failed).values_list("id", "quantity_available")
+        )
+        names = {line.produce.id: line.produce.name for line in lines}
+        raise CheckoutError({
+            "errors": [
+                {
+                    "produce_id": produce_id,
+                    "name": names[produce_id],
+                    "available": current.get(produce_id, 0),
+                    "requested": requested[produce_id],
+                    "detail": "Insufficient stock",
+                }
+                for produce_id in failed
+            ]
+        })
+    # Conditional updates send no post_save, so the cached catalog is bumped here.
+    bump_tags_on_commit(CacheTags.PRODUCE, *{CacheTags.farmer(line.produce.farmer_id) for line in lines})
+    # Sold-out produce flips its wishlist rows, so that a restock can alert them.
+    queue_wishlist_stock_sync(requested)
+
+
+def record_farmer_orders(order: Order, items: Iterable[OrderItem]) -> List[FarmerOrder]:
+    """Write one :class:`FarmerOrder` row per farmer with produce in ``order``."""
+    subtotals: Dict[int, Decimal] = {}
+    for item in items:
+        if item.produce is not None:
+            farmer_id = item.produce.farmer_id
+            subtotals[farmer_id] = subtotals.get(farmer_id, Decimal("0")) + item.subtotal
+    return FarmerOrder.objects.bulk_create([
+        FarmerOrder(
+            farmer_id=farmer_id,
+            order=order,
+            status=order.status,
+            subtotal=subtotal,
+            created_at=order.created_at,
+        )
+        for farmer_id, subtotal in subtotals.items()
+    ])
+
+
+@transaction.atomic
+def place_order(user: User, lines: List[OrderLine], status: str = OrderStatus.PENDING) -> Order:
+    """Reserve stock and write the order, its items and farmer earnings.
+
+    The query count is fixed apart from the one UPDATE per distinct produce:
+    order items, farmer order rows and earnings are bulk-created and the order
+    total is known before the order row is inserted. A failed reservation
+    rolls back to the savepoint taken here, leaving any outer transaction
+    untouched.
+    """
+    reserve_stock(lines)
+    return write_order(user, lines, status)
+
+
+def write_order(user: User, lines: List[OrderLine], status: str = OrderStatus.PENDING) -> Order:
+    """Insert the order, its items, farmer order rows, earnings and delivery.
+
+    Business buyers' daily rollups are updated in the same transaction. Stock
+    must already be reserved by the caller, inside the same transaction.
+    """
+    total = sum((line.subtotal for line in lines), Decimal("0"))
+    order = Order.objects.create(user=user, status=status, total_amount=total)
+    items = OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            produce=line.produce,
+            product_name=line.produce.name,
+            unit=line.unit,
+            price_per_unit=line.unit_price,
+            quantity=line.quantity,
+            subtotal=line.subtotal,
+        )
+        for line in lines
+    ])
+    record_farmer_orders(order, items)
+    record_business_rollups(order, items)
+    FarmerEarnings.objects.bulk_create([
+        FarmerEarnings(
+            farmer_id=line.produce.farmer_id,
+            order=order,
+            produce=line.produce,
+            quantity=line.quantity,
+            unit_price=line.unit_price,
+            total_amount=line.subtotal,
+            status='PENDING',
+        )
+        for line in lines
+    ])
+    # Delivery placeholder; scheduled date is set when staff confirms.
+    Delivery.objects.create(order=order)
+    return order
+
+
+@transaction.atomic
+def checkout_cart(user: User) -> Order:
+    """Turn the user's cart into an order priced at the current produce prices."""
+    cart, _ = Cart.objects.get_or_create(user=user)
+    items = list(cart.items.select_related("produce__farmer__user"))
+    if not items:
+        raise CheckoutError({"detail": "Cart is empty."})
+
+    lines = [
+        OrderLine(
+            produce=item.produce,
+            quantity=item.quantity,
+            unit=item.produce.unit,
+            unit_price=item.produce.price_per_unit,
+        )
+        for item in items
+    ]
+    errors = validate_lines(lines)
+    if errors:
+        raise CheckoutError({"errors": errors})
+
+    order = place_order(user, lines)
+    cart.items.all().delete()
+
+    # Update consumer analytics if user is a consumer
+    if hasattr(user, 'consumer_profile'):
+        consumer_profile = user.consumer_profile
+        consumer_profile.update_spending_analytics(order.total_amount)
+        consumer_profile.last_order_date = timezone.now()
+        consumer_profile.save(update_fields=['last_order_date'])
+
+    # Notify each farmer once per order
+    notified_farmers = set()
+    for line in lines:
+        farmer_user = line.produce.farmer.user
+        if farmer_user.id not in notified_farmers:
+            notify_user(
+                farmer_user,
+                title="New order placed",
+                message=f"An order containing your produce has been placed. Order #{order.id}.",
+            )
+            notified_farmers.add(farmer_user.id)
+
+    return order
+
+
+# Allowed order status changes: current status -> next status.
+STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: OrderStatus.CONFIRMED,
+    OrderStatus.CONFIRMED: OrderStatus.DELIVERED,
+}
+
+
+class OrderTransitionError(Exception):
+    """Raised when a bulk status change is rejected; ``payload`` is the 400 response body."""
+
+    def __init__(self, payload: dict) -> None:
+        super().__init__(payload)
+        self.payload = payload
+
+
+def _increment_by_pk(model, field: str, amounts: Dict[int, object], output_field) -> None:
+    """Add ``amounts[pk]`` to ``field`` on each row in one UPDATE."""
+    if not amounts:
+        return
+    delta = Case(
+        *[When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()],
+        output_field=output_field,
+    )
+    model.objects.filter(pk__in=list(amounts)).update(**{field: F(field) + delta})
+
+
+def confirm_earnings(order_ids: Iterable[int]) -> int:
+    """Confirm the pending earnings of ``order_ids`` and roll them into farmer and produce totals.
+
+    One UPDATE confirms the earnings and one grouped UPDATE each adjusts the
+    farmer and produce totals, whatever the number of orders. Earnings that
+    are already confirmed are left alone, so repeating a call is harmless.
+    """
+    pending = FarmerEarnings.objects.filter(order_id__in=list(order_ids), status='PENDING')
+    per_farmer = list(
+        pending.values("farmer_id").annotate(amount=Sum("total_amount"), orders=Count("order_id", distinct=True))
+    )
+    per_produce = list(
+        pending.values("produce_id").annotate(quantity=Sum("quantity"), revenue=Sum("total_amount"))
+    )
+    confirmed = pending.update(status='CONFIRMED', updated_at=timezone.now())
+    if not confirmed:
+        return 0
+
+    money = DecimalField(max_digits=12, decimal_places=2)
+    _increment_by_pk(FarmerProfile, "total_earnings", {row["farmer_id"]: row["amount"] for row in per_farmer}, money)
+    _increment_by_pk(FarmerProfile, "total_orders", {row["farmer_id"]: row["orders"] for row in per_farmer}, IntegerField())
+    _increment_by_pk(Produce, "total_sold", {row["produce_id"]: row["quantity"] for row in per_produce}, IntegerField())
+    _increment_by_pk(Produce, "total_revenue", {row["produce_id"]: row["revenue"] for row in per_produce}, money)
+    # Grouped updates send no post_save, so the cached catalog is bumped here.
+    bump_tags_on_commit(CacheTags.PRODUCE, *{CacheTags.farmer(row["farmer_id"]) for row in per_farmer})
+    return confirmed
+
+
+@transaction.atomic
+def transition_orders(order_ids: Iterable[int], new_status: str) -> List[Order]:
+    """Move every order in ``order_ids`` to ``new_status`` or none of them.
+
+    Each order must currently be in the status that precedes ``new_status``
+    in :data:`STATUS_TRANSITIONS`. The orders are locked in primary key order,
+    written with one UPDATE, and their customers are notified in one batch.
+    """
+    order_ids = sorted(set(order_ids))
+    orders = list(Order.objects.select_for_update().filter(pk__in=order_ids).order_by("pk"))
+    found = {order.pk for order in orders}
+    errors = [{"order_id": pk, "detail": "Order not found."} for pk in order_ids if pk not in found]
+    errors += [
+        {
+            "order_id": order.pk,
+            "status": order.status,
+            "detail": f"Cannot change status from {order.status} to {new_status}.",
+        }
+        for order in orders
+        if STATUS_TRANSITIONS.get(order.status) != new_status
+    ]
+    if errors:
+        raise OrderTransitionError({"errors": errors})
+
+    now = timezone.now()
+    Order.objects.filter(pk__in=order_ids).update(status=new_status, updated_at=now)
+    FarmerOrder.objects.filter(order_id__in=order_ids).update(status=new_status)
+    record_status_changes((order, order.status, new_status) for order in orders)
+    queue_consumer_analytics(order.user_id for order in orders)
+    if new_status == OrderStatus.CONFIRMED:
+        confirm_earnings(order_ids)
+
+    users = User.objects.in_bulk({order.user_id for order in orders})
+    AuditLog.objects.bulk_create([
+        AuditLog(
+            user_id=order.user_id,
+            action='order.status.changed',
+            object_type='Order',
+            object_id=str(order.pk),
+            metadata={'status': new_status},
+        )
+        for order in orders
+    ])
+    notify_users(
+        (
+            users[order.user_id],
+            f"Order #{order.pk} status updated",
+            f"Your order status has been updated to {new_status}.",
+        )
+        for order in orders
+    )
+    for order in orders:
+        order.status = new_status
+        order.updated_at = now
+    return orders
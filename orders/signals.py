@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .models import FarmerOrder, MixedBox, MixedBoxItem, Order
+
+invalidate_on_change(MixedBox, lambda box: [CacheTags.MIXED_BOXES])
+invalidate_on_change(MixedBoxItem, lambda item: [CacheTags.MIXED_BOXES])
+
+
+@receiver(post_save, sender=Order)
+def sync_farmer_order_status(sender, instance: Order, created: bool, update_fields=None, **kwargs):
+    # Keep the denormalized status on the farmer order rows in step with the order
+    if created or (update_fields is not None and "status" not in update_fields):
+        return
+    FarmerOrder.objects.filter(order=instance).exclude(status=instance.status).update(status=instance.status)
@@ -6,6 +6,7 @@ from .views import (
     CartItemListCreateView,
     CartItemDetailView,
     checkout,
+    bulk_update_order_status,
     OrderListView,
     OrderDetailUpdateStatusView,
     FarmerOrderHistoryView,
@@ -21,6 +22,7 @@ urlpatterns = [
     path("cart/items/<int:pk>/", CartItemDetailView.as_view(), name="cart-item-detail"),
     path("checkout/", checkout, name="checkout"),
     path("orders/", OrderListView.as_view(), name="orders"),
+    path("orders/bulk-status/", bulk_update_order_status, name="orders-bulk-status"),
     path("orders/<int:pk>/", OrderDetailUpdateStatusView.as_view(), name="order-detail"),
     path("farmer/orders/", FarmerOrderHistoryView.as_view(), name="farmer-orders"),
     path("", include(router.urls)),
@@ -1,21 +1,28 @@
-from decimal import Decimal
 from typing import Any
 
 from django.db import transaction
-from django.db.models import F
 from django.contrib.auth.models import User
-from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework import viewsets
 
-from .models import Cart, CartItem, Order, OrderItem, OrderStatus, MixedBox
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, MixedBoxSerializer
+from api.idempotency import idempotent
+from farmfresh.cache import CachedResponseMixin, CacheTags
+from farmfresh.pagination import CursorOrPageNumberPagination
+from .models import Cart, CartItem, FarmerOrder, Order, OrderStatus, MixedBox
+from .serializers import (
+    CartSerializer,
+    CartItemSerializer,
+    FarmerOrderSerializer,
+    OrderSerializer,
+    OrderStatusTransitionSerializer,
+    MixedBoxSerializer,
+    order_items_prefetch,
+)
+from .services import CheckoutError, OrderTransitionError, checkout_cart, confirm_earnings, transition_orders
 from notifications.utils import notify_user
-from deliveries.models import Delivery, DeliveryStatus
-from farmers.models import FarmerEarnings
 
 
 def get_or_create_cart(user: User) -> Cart:
@@ -78,135 +85,52 @@ class CartItemDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 @transaction.atomic
 def checkout(request: Request) -> Response:
     """Create an order from the user's cart.
 
-    Steps:
+    Steps (see ``orders.services.checkout_cart``):
     - Validate cart has items and quantities are in stock
-    - Create order and order items
-    - Decrement stock atomically; mark produce unavailable at zero
-    - Create FarmerEarnings records for each produce
+    - Reserve stock with one guarded UPDATE per produce; mark produce
+      unavailable at zero in the same statement
+    - Bulk-create order items and FarmerEarnings records
     - Notify farmers per order
     - Clear cart and create a delivery placeholder
     """
-    cart = get_or_create_cart(request.user)  # type: ignore[arg-type]
-    items = list(cart.items.select_related("produce"))
-    if not items:
-        return Response({"detail": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Validate stock
-    stock_errors = []
-    for item in items:
-        available_qty = item.produce.quantity_available
-        if item.quantity <= 0:
-            stock_errors.append({
-                "produce_id": item.produce_id,
-                "name": item.produce.name,
-                "detail": "Quantity must be greater than zero."
-            })
-        elif available_qty < item.quantity:
-            stock_errors.append({
-                "produce_id": item.produce_id,
-                "name": item.produce.name,
-                "available": available_qty,
-                "requested": item.quantity,
-                "detail": "Insufficient stock",
-            })
-    if stock_errors:
-        return Response({"errors": stock_errors}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Create order and reserve stock
-    order = Order.objects.create(user=request.user, status=OrderStatus.PENDING)
-    total = Decimal("0")
-
-    for item in items:
-        produce = item.produce
-        price = produce.price_per_unit
-        subtotal = price * item.quantity
-        
-        # Create order item
-        OrderItem.objects.create(
-            order=order,
-            produce=produce,
-            product_name=produce.name,
-            unit=produce.unit,
-            price_per_unit=price,
-            quantity=item.quantity,
-            subtotal=subtotal,
-        )
-        
-        # Create FarmerEarnings record
-        FarmerEarnings.objects.create(
-            farmer=produce.farmer,
-            order=order,
-            produce=produce,
-            quantity=item.quantity,
-            unit_price=price,
-            total_amount=subtotal,
-            status='PENDING'
-        )
-        
-        # decrement stock
-        produce.quantity_available = F("quantity_available") - item.quantity
-        produce.save(update_fields=["quantity_available"]) 
-        # if stock reaches 0, mark unavailable
-        produce.refresh_from_db(fields=["quantity_available", "available"])
-        if produce.quantity_available <= 0 and produce.available:
-            produce.available = False
-            produce.save(update_fields=["available"])
-        total += subtotal
-
-    order.total_amount = total
-    order.save(update_fields=["total_amount"])
-    cart.items.all().delete()
-
-    # Update consumer analytics if user is a consumer
-    if hasattr(request.user, 'consumer_profile'):
-        consumer_profile = request.user.consumer_profile
-        consumer_profile.update_spending_analytics(total)
-        consumer_profile.last_order_date = timezone.now()
-        consumer_profile.save(update_fields=['last_order_date'])
-
-    # notify farmers per order item
-    notified_farmers = set()
-    for order_item in order.items.select_related("produce__farmer__user"):
-        farmer_user = order_item.produce.farmer.user if order_item.produce and order_item.produce.farmer else None
-        if farmer_user and farmer_user.id not in notified_farmers:
-            notify_user(
-                farmer_user,
-                title="New order placed",
-                message=f"An order containing your produce has been placed. Order #{order.id}.",
-            )
-            notified_farmers.add(farmer_user.id)
-
-    # create delivery placeholder (scheduled date optional; set when staff confirms)
-    Delivery.objects.get_or_create(order=order)
-
+    try:
+        order = checkout_cart(request.user)  # type: ignore[arg-type]
+    except CheckoutError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
     return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
 
 class OrderListView(generics.ListAPIView):
     """List the current user's orders with eager-loaded order items."""
     serializer_class = OrderSerializer
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).prefetch_related("items")
+        return Order.objects.filter(user=self.request.user).prefetch_related(order_items_prefetch())
 
 
 class OrderViewSet(viewsets.ModelViewSet):
     """CRUD for orders scoped to the authenticated user."""
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorOrPageNumberPagination
 
     def get_queryset(self):
-        return Order.objects.select_related('user').prefetch_related('items', 'items__produce', 'items__produce__farmer').filter(user=self.request.user)
+        return Order.objects.select_related('user').prefetch_related(order_items_prefetch()).filter(user=self.request.user)
 
 
-class MixedBoxViewSet(viewsets.ModelViewSet):
+class MixedBoxViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """CRUD for MixedBox (staff only for create/update/delete; read for all)."""
     serializer_class = MixedBoxSerializer
     queryset = MixedBox.objects.prefetch_related('items')
+    cache_tags = [CacheTags.MIXED_BOXES]
+    cache_scope = "public"
+    cache_local = True
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -220,7 +144,7 @@ class OrderDetailUpdateStatusView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.select_related('user').prefetch_related('items').filter(user=self.request.user)
+        return Order.objects.select_related('user').prefetch_related(order_items_prefetch()).filter(user=self.request.user)
 
     def perform_update(self, serializer):
         """Update order status and notify user of changes."""
@@ -241,32 +165,48 @@ class OrderDetailUpdateStatusView(generics.RetrieveUpdateAPIView):
             
             # If order is confirmed, update farmer earnings
             if new_status == OrderStatus.CONFIRMED:
-                from farmers.models import FarmerEarnings
-                earnings_records = FarmerEarnings.objects.filter(order=order)
-                for earning in earnings_records:
-                    earning.status = 'CONFIRMED'
-                    earning.save()
-                    
-                    # Update farmer profile earnings
-                    earning.farmer.update_earnings(earning.total_amount)
-                    
-                    # Update produce sales stats
-                    earning.produce.update_sales_stats(earning.quantity, earning.total_amount)
+                confirm_earnings([order.id])
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAdminUser])
+@idempotent
+def bulk_update_order_status(request: Request) -> Response:
+    """Move many orders to the next status in one transaction (staff only)."""
+    serializer = OrderStatusTransitionSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        orders = transition_orders(serializer.validated_data["order_ids"], serializer.validated_data["status"])
+    except OrderTransitionError as exc:
+        return Response(exc.payload, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "status": serializer.validated_data["status"],
+        "updated": len(orders),
+        "order_ids": [order.id for order in orders],
+    })
 
 
 class FarmerOrderHistoryView(generics.ListAPIView):
-    """List orders that include items from the requesting farmer."""
-    serializer_class = OrderSerializer
+    """List orders that include items from the requesting farmer, newest first.
+
+    Reads the ``FarmerOrder`` index rather than joining through order items.
+    Supports ``?status=`` and ``?ordering=`` on ``created_at`` or ``subtotal``
+    (the farmer's own share), and keyset pages on ``?cursor=``.
+    """
+    serializer_class = FarmerOrderSerializer
+    pagination_class = CursorOrPageNumberPagination
+    filterset_fields = ["status"]
+    ordering_fields = ["created_at", "subtotal"]
+    ordering = ["-created_at", "-id"]
 
     def get_queryset(self):
         user = self.request.user
         if not user.is_authenticated or not hasattr(user, "farmer_profile"):
-            return Order.objects.none()
-        farmer_profile = user.farmer_profile
+            return FarmerOrder.objects.none()
         return (
-            Order.objects.filter(items__produce__farmer=farmer_profile)
-            .distinct()
-            .prefetch_related("items")
+            FarmerOrder.objects.filter(farmer=user.farmer_profile)
+            .select_related("order")
+            .prefetch_related(order_items_prefetch("order__items"))
         )
 
 # Create your views here.
\ No newline at end of file
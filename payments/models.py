@@ -61,6 +61,7 @@ class WalletTransaction(models.Model):
         indexes = [
             models.Index(fields=['type']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['wallet', 'created_at', 'id']),
         ]
 
     def __str__(self) -> str:
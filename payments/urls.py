@@ -3,6 +3,7 @@ from .views import (
     create_checkout_session,
     stripe_webhook,
     wallet_detail,
+    WalletTransactionListView,
     wallet_deposit_view,
     pay_order_with_wallet,
 )
@@ -11,6 +12,7 @@ urlpatterns = [
     path('payments/checkout-session/', create_checkout_session, name='payments-checkout'),
     path('payments/stripe/webhook/', stripe_webhook, name='payments-webhook'),
     path('payments/wallet/', wallet_detail, name='wallet-detail'),
+    path('payments/wallet/transactions/', WalletTransactionListView.as_view(), name='wallet-transactions'),
     path('payments/wallet/deposit/', wallet_deposit_view, name='wallet-deposit'),
     path('payments/wallet/pay/', pay_order_with_wallet, name='wallet-pay-order'),
 ]
\ No newline at end of file
@@ -1,16 +1,21 @@
 import stripe
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework import permissions, status
+from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from api.idempotency import idempotent
+from business.invoices import queue_invoice_pdfs
+from business.models import BusinessInvoice
+from farmfresh.pagination import CreatedAtCursorPagination
 from orders.models import Order
 from .models import Payment, PaymentStatus
-from .models import Wallet
+from .models import Wallet, WalletTransaction
 from .serializers import (
     WalletSerializer,
     WalletDepositSerializer,
+    WalletTransactionSerializer,
     PaymentSerializer,
 )
 from .services import wallet_deposit, pay_order_from_wallet, ensure_wallet
@@ -76,13 +81,8 @@ def stripe_webhook(request):
         except Order.DoesNotExist:
             return Response(status=200)
         Payment.objects.filter(order=order).update(status=PaymentStatus.SUCCEEDED, provider_payment_id=provider_payment_id)
-        # generate invoice PDF (temporarily disabled)
-        # html = HTML(string=f"<h1>Invoice</h1><p>Order #{order.id} - Amount: {order.total_amount}</p>")
-        # pdf_io = io.BytesIO()
-        # html.write_pdf(pdf_io)
-        # pdf_io.seek(0)
-        # invoice = Invoice.objects.create(user=order.user, order=order)
-        # invoice.file.save(f"invoice_{order.id}.pdf", pdf_io)
+        # Business invoice PDFs are rendered in the background, never inline.
+        queue_invoice_pdfs(BusinessInvoice.objects.filter(order=order).values_list("id", flat=True))
     return Response(status=200)
 
 
@@ -93,6 +93,18 @@ def wallet_detail(request):
     return Response(WalletSerializer(wallet).data)
 
 
+class WalletTransactionListView(generics.ListAPIView):
+    """The user's wallet history, newest first, with keyset pagination."""
+    serializer_class = WalletTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+    filterset_fields = ["type"]
+    ordering_fields = ["created_at"]
+
+    def get_queryset(self):
+        return WalletTransaction.objects.filter(wallet__user=self.request.user)
+
+
 @api_view(["POST"]) 
 @permission_classes([permissions.IsAuthenticated])
 def wallet_deposit_view(request):
@@ -107,6 +119,7 @@ def wallet_deposit_view(request):
 
 @api_view(["POST"]) 
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def pay_order_with_wallet(request):
     order_id = request.data.get("order_id")
     if not order_id:
@@ -0,0 +1,4 @@
+from farmfresh.cache import CacheTags, invalidate_on_change
+from .models import SubscriptionPlan
+
+invalidate_on_change(SubscriptionPlan, lambda plan: [CacheTags.SUBSCRIPTION_PLANS])
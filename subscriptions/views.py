@@ -6,13 +6,17 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 
+from farmfresh.cache import CachedResponseMixin, CacheTags
 from orders.models import OrderItem
 from .models import SubscriptionPlan, Subscription, BillingPeriod
 from .serializers import SubscriptionPlanSerializer, SubscriptionSerializer
 
 
-class SubscriptionPlanListView(generics.ListAPIView):
+class SubscriptionPlanListView(CachedResponseMixin, generics.ListAPIView):
     permission_classes = [permissions.AllowAny]
+    cache_tags = [CacheTags.SUBSCRIPTION_PLANS]
+    cache_scope = "public"
+    cache_local = True
     serializer_class = SubscriptionPlanSerializer
     queryset = SubscriptionPlan.objects.filter(is_active=True)
 
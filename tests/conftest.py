@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+from farmfresh.cache import clear_local_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The locmem cache outlives each test's database rollback.
+    cache.clear()
+    clear_local_cache()
+    yield
+    cache.clear()
+    clear_local_cache()
@@ -0,0 +1,174 @@
+from decimal import Decimal
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from business import tasks, uploads
+from business.models import BulkOrderUpload, BulkOrderUploadStatus, BusinessPricingTier, BusinessProfile
+from farmers.models import FarmerProfile, Produce
+from orders.models import Order
+from userprofiles.models import UserType
+
+UPLOAD_URL = "/api/v1/business/bulk-orders/upload/"
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def business():
+    user = User.objects.create_user(username="canteen")
+    user.profile.role = UserType.BUSINESS
+    user.profile.save()
+    return BusinessProfile.objects.create(user=user, name="Canteen")
+
+
+@pytest.fixture
+def client(business):
+    client = APIClient()
+    client.force_authenticate(user=business.user)
+    return client
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    return {
+        name: Produce.objects.create(
+            farmer=farmer, name=name, unit="kg", price_per_unit=Decimal("2.00"), quantity_available=stock,
+        )
+        for name, stock in (("Kale", 100), ("Leek", 5), ("Beet", 50))
+    }
+
+
+def csv_file(text, name="order.csv"):
+    return SimpleUploadedFile(name, text.encode(), content_type="text/csv")
+
+
+def post(client, file):
+    return client.post(UPLOAD_URL, {"file": file}, format="multipart")
+
+
+@pytest.mark.django_db
+class TestInlineUploads:
+
+    def test_places_order_by_id_and_name(self, client, produce):
+        kale, leek = produce["Kale"], produce["Leek"]
+        BusinessPricingTier.objects.create(produce=kale, min_quantity=1, unit="crate", unit_price=Decimal("15.00"))
+        text = f"\ufeffProduce ID,Produce,Quantity,Unit\n{kale.id},,10,\n\n,Leek,5,kg\n{kale.id},,2,crate\n"
+
+        response = post(client, csv_file(text))
+
+        assert response.status_code == 201
+        assert response.data["status"] == BulkOrderUploadStatus.COMPLETED
+        assert response.data["line_count"] == 3
+        order = Order.objects.get(pk=response.data["order"]["id"])
+        assert order.total_amount == Decimal("20.00") + Decimal("10.00") + Decimal("30.00")
+        leek.refresh_from_db()
+        assert leek.quantity_available == 0
+
+    def test_reports_every_failing_line(self, client, produce):
+        kale = produce["Kale"]
+        text = (
+            "produce_id,name,quantity,unit\n"
+            f"{kale.id},,1,kg\n"
+            "999999,,1,kg\n"
+            ",Leek,3,kg\n"
+            ",Leek,3,kg\n"
+            ",Beet,two,kg\n"
+            f"{kale.id},,1,sack\n"
+            ",,4,kg\n"
+        )
+
+        response = post(client, csv_file(text))
+
+        assert response.status_code == 400
+        assert [(e["line"], e["detail"]) for e in response.data["errors"]] == [
+            (3, "Produce not found."),
+            (4, "Insufficient stock"),
+            (5, "Insufficient stock"),
+            (6, "Quantity must be a whole number above zero."),
+            (7, "No price per sack at this quantity; Kale is sold per kg."),
+            (8, "Missing produce."),
+        ]
+        assert response.data["errors"][1]["requested"] == 6
+        assert not Order.objects.exists()
+        assert Produce.objects.get(pk=kale.pk).quantity_available == 100
+
+    def test_ambiguous_names_list_the_candidates(self, client, produce):
+        other = Produce.objects.create(
+            farmer=produce["Kale"].farmer, name="Kale", unit="kg", price_per_unit=Decimal("3.00"),
+        )
+
+        response = post(client, csv_file("produce,quantity\nKale,1\n"))
+
+        assert response.data["errors"][0]["produce_ids"] == [produce["Kale"].id, other.id]
+
+    def test_produce_is_resolved_in_one_query(self, business, produce):
+        rows = "".join(f",{name},1,kg\n" for name in ("Kale", "Beet") * 20)
+        lines, errors = uploads.parse_upload(BytesIO(f"produce_id,produce,quantity,unit\n{rows}".encode()), "a.csv")
+        assert not errors
+
+        with CaptureQueriesContext(connection) as ctx:
+            items, errors = uploads.validate_upload_lines(business.user, lines)
+
+        assert len(items) == 40 and not errors
+        assert sum("farmers_produce" in q["sql"] for q in ctx.captured_queries) == 1
+
+    def test_rejects_bad_files(self, client, produce):
+        assert post(client, csv_file("a,b\n1,2\n", name="order.txt")).status_code == 400
+
+        response = post(client, csv_file("name,unit\nKale,kg\n"))
+        assert response.status_code == 400
+        assert "header row" in response.data["errors"][0]["detail"]
+
+        response = post(client, SimpleUploadedFile("order.csv", b"produce,quantity\n\xff\xfe,1\n"))
+        assert response.data["errors"] == [{"detail": "The file is not a valid UTF-8 CSV file."}]
+
+    def test_xlsx_upload(self, client, produce):
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["produce", "quantity"])
+        workbook.active.append(["Beet", 4])
+        content = BytesIO()
+        workbook.save(content)
+
+        response = post(client, SimpleUploadedFile("order.xlsx", content.getvalue()))
+
+        assert response.status_code == 201
+        assert Produce.objects.get(name="Beet").quantity_available == 46
+
+
+@pytest.mark.django_db
+class TestBackgroundUploads:
+
+    def test_large_files_are_processed_by_the_task(self, client, produce, monkeypatch,
+                                                   django_capture_on_commit_callbacks):
+        monkeypatch.setattr(uploads, "BULK_UPLOAD_INLINE_MAX_BYTES", 10)
+        monkeypatch.setattr(tasks.process_bulk_order_upload_task, "delay", tasks.process_bulk_order_upload_task)
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            response = post(client, csv_file("produce,quantity\nKale,3\n"))
+        assert response.status_code == 202
+        assert response.data["status"] == BulkOrderUploadStatus.PENDING
+
+        callbacks[0]()
+        status = client.get(f"/api/v1/business/bulk-orders/uploads/{response.data['id']}/")
+        assert status.data["status"] == BulkOrderUploadStatus.COMPLETED
+        assert status.data["order"] == Order.objects.get().pk
+
+        # A repeated delivery of the task does not place the order again.
+        tasks.process_bulk_order_upload_task(response.data["id"])
+        assert Order.objects.count() == 1
+
+    def test_uploads_are_private(self, client, business, produce):
+        upload = BulkOrderUpload.objects.create(user=User.objects.create_user(username="other"), file_name="x.csv")
+
+        assert client.get(f"/api/v1/business/bulk-orders/uploads/{upload.pk}/").status_code == 404
@@ -0,0 +1,184 @@
+import random
+import threading
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from business import services
+from business.services import place_bulk_order
+from consumers import tasks
+from farmers.models import FarmerEarnings, FarmerProfile, Produce
+from orders.models import Order, OrderItem
+from notifications import utils
+from orders.services import CheckoutError
+
+
+@pytest.fixture
+def farmer():
+    return FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username="bistro")
+
+
+def make_produce(farmer, count, stock=10):
+    return [
+        Produce.objects.create(
+            farmer=farmer, name=f"Produce {i}", unit="kg",
+            price_per_unit=Decimal("2.00"), quantity_available=stock,
+        )
+        for i in range(count)
+    ]
+
+
+def items_for(produce, quantity=1):
+    return [{"produce_id": p.id, "quantity": quantity, "unit": "kg"} for p in produce]
+
+
+@pytest.mark.django_db
+class TestBulkOrderEngine:
+
+    def test_writes_items_earnings_and_stock(self, farmer, buyer):
+        produce = make_produce(farmer, 3, stock=5)
+
+        order = place_bulk_order(buyer, items_for(reversed(produce), quantity=5))
+
+        assert order.total_amount == Decimal("30.00")
+        assert OrderItem.objects.filter(order=order).count() == 3
+        assert FarmerEarnings.objects.filter(order=order).count() == 3
+        for p in produce:
+            p.refresh_from_db()
+            assert (p.quantity_available, p.available) == (0, False)
+
+    def test_refreshes_the_cached_catalog(self, farmer, buyer, monkeypatch,
+                                          django_capture_on_commit_callbacks):
+        monkeypatch.setattr(tasks.sync_wishlist_stock_task, "delay", lambda produce_ids: None)
+        monkeypatch.setattr(utils, "_kick_dispatcher", lambda: None)
+        produce = make_produce(farmer, 1, stock=5)
+        client = APIClient()
+        client.get("/api/v1/farmers/public/produce/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            place_bulk_order(buyer, items_for(produce, quantity=2))
+
+        response = client.get("/api/v1/farmers/public/produce/")
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"][0]["quantity_available"] == 3
+
+    def test_locks_all_rows_in_one_ordered_select(self, farmer, buyer):
+        produce = make_produce(farmer, 20)
+        items = items_for(produce)
+        random.Random(7).shuffle(items)
+
+        with CaptureQueriesContext(connection) as ctx:
+            place_bulk_order(buyer, items)
+
+        reads = [q["sql"] for q in ctx.captured_queries
+                 if q["sql"].startswith("SELECT") and 'FROM "farmers_produce"' in q["sql"]]
+        assert len(reads) == 1
+        assert 'ORDER BY "farmers_produce"."id" ASC' in reads[0]
+
+    def test_query_count_does_not_grow_with_lines(self, farmer):
+        small_buyer = User.objects.create_user(username="small")
+        large_buyer = User.objects.create_user(username="large")
+        small_items = items_for(make_produce(farmer, 2))
+        large_items = items_for(make_produce(farmer, 40))
+        services.global_tier_table()  # warm the tier cache so both runs hit it
+
+        with CaptureQueriesContext(connection) as small:
+            place_bulk_order(small_buyer, small_items)
+        with CaptureQueriesContext(connection) as large:
+            place_bulk_order(large_buyer, large_items)
+
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_all_lines_validated_before_any_write(self, farmer, buyer):
+        ok, short, also_short = make_produce(farmer, 3, stock=2)
+
+        with pytest.raises(CheckoutError) as exc:
+            place_bulk_order(buyer, items_for([ok]) + items_for([short, also_short], quantity=3) + [
+                {"produce_id": 987654, "quantity": 1, "unit": "kg"},
+            ])
+
+        assert [e["produce_id"] for e in exc.value.payload["errors"]] == [987654]
+        with pytest.raises(CheckoutError) as exc:
+            place_bulk_order(buyer, items_for([ok]) + items_for([short, also_short], quantity=3))
+        assert {e["produce_id"] for e in exc.value.payload["errors"]} == {short.id, also_short.id}
+        assert not Order.objects.exists()
+        ok.refresh_from_db()
+        assert ok.quantity_available == 2
+
+    def test_deadlock_is_retried(self, farmer, buyer, monkeypatch):
+        produce = make_produce(farmer, 2)
+        real = services._place_bulk_order
+        calls = []
+
+        def deadlock_once(*args):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return real(*args)
+
+        monkeypatch.setattr(services, "_place_bulk_order", deadlock_once)
+        monkeypatch.setattr(services.time, "sleep", lambda seconds: None)
+        monkeypatch.setattr(services.connection, "in_atomic_block", False)
+
+        order = place_bulk_order(buyer, items_for(produce))
+
+        assert len(calls) == 2
+        assert order.items.count() == 2
+
+    def test_other_database_errors_are_not_retried(self, farmer, buyer, monkeypatch):
+        calls = []
+
+        def broken(*args):
+            calls.append(1)
+            raise OperationalError("no such column")
+
+        items = items_for(make_produce(farmer, 1))
+        monkeypatch.setattr(services, "_place_bulk_order", broken)
+        monkeypatch.setattr(services.connection, "in_atomic_block", False)
+
+        with pytest.raises(OperationalError):
+            place_bulk_order(buyer, items)
+        assert len(calls) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_bulk_orders_neither_deadlock_nor_oversell(farmer):
+    if connection.vendor == "sqlite":
+        pytest.skip("SQLite serialises writers; run against MySQL or PostgreSQL")
+    produce = make_produce(farmer, 8, stock=30)
+    buyers = [User.objects.create_user(username=f"b{i}") for i in range(12)]
+    outcomes = []
+
+    def run(user, seed):
+        items = items_for(produce, quantity=3)
+        random.Random(seed).shuffle(items)  # every thread asks for rows in a different order
+        try:
+            place_bulk_order(user, items)
+            outcomes.append("ok")
+        except CheckoutError:
+            outcomes.append("rejected")
+        except Exception as exc:  # a deadlock that escaped the retries
+            outcomes.append(repr(exc))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(user, i)) for i, user in enumerate(buyers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert set(outcomes) <= {"ok", "rejected"}, outcomes
+    assert outcomes.count("ok") == 10
+    for p in produce:
+        p.refresh_from_db()
+        assert p.quantity_available == 0
@@ -0,0 +1,128 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from business.models import BusinessPricingTier, BusinessProfile
+from business.services import TierPriceIndex, global_tier_table
+from farmers.models import FarmerProfile, Produce
+from userprofiles.models import UserType
+
+QUOTE_URL = "/api/v1/business/bulk-orders/quote/"
+
+
+@pytest.fixture
+def business():
+    user = User.objects.create_user(username="bistro")
+    user.profile.role = UserType.BUSINESS
+    user.profile.save()
+    return BusinessProfile.objects.create(user=user, name="Bistro")
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    return [
+        Produce.objects.create(
+            farmer=farmer, name=f"Produce {i}", unit="kg",
+            price_per_unit=Decimal("10.00"), quantity_available=1000,
+        )
+        for i in range(3)
+    ]
+
+
+def tier(produce, min_quantity, price, business=None, unit="kg"):
+    return BusinessPricingTier.objects.create(
+        business=business, produce=produce, min_quantity=min_quantity, unit=unit, unit_price=Decimal(price)
+    )
+
+
+@pytest.mark.django_db
+class TestTierPricing:
+
+    def test_business_tier_beats_global_and_highest_threshold_wins(self, business, produce):
+        kale, leek, beet = produce
+        tier(kale, 10, "8.00")
+        tier(kale, 50, "7.00")
+        tier(kale, 20, "6.50", business=business)
+        tier(leek, 5, "9.00")
+
+        index = TierPriceIndex(business.user, [p.id for p in produce])
+
+        assert index.resolve(kale, 60, "kg") == (Decimal("6.50"), "business", kale.business_pricing.get(business=business).id)
+        assert index.resolve(kale, 15, "kg").unit_price == Decimal("8.00")
+        assert index.resolve(kale, 5, "kg").source == "list"
+        assert index.resolve(leek, 5, "crate").source == "list"  # tiers are per unit
+        assert index.resolve(beet, 500, "kg").unit_price == Decimal("10.00")
+
+    def test_one_query_for_business_tiers_and_cached_global_tiers(self, business, produce):
+        for p in produce:
+            tier(p, 1, "9.00")
+            tier(p, 1, "8.00", business=business)
+        global_tier_table()  # warm
+
+        with CaptureQueriesContext(connection) as ctx:
+            TierPriceIndex(business.user, [p.id for p in produce])
+
+        assert len(ctx.captured_queries) == 1
+
+    def test_saving_a_tier_invalidates_the_global_cache(self, produce, django_capture_on_commit_callbacks):
+        kale = produce[0]
+        with django_capture_on_commit_callbacks(execute=True):
+            first = tier(kale, 1, "9.00")
+        assert global_tier_table()[(kale.id, "kg")][0][1] == Decimal("9.00")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.unit_price = Decimal("8.50")
+            first.save()
+        assert global_tier_table()[(kale.id, "kg")][0][1] == Decimal("8.50")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            first.delete()
+        assert (kale.id, "kg") not in global_tier_table()
+
+    def test_quote_endpoint_prices_without_ordering(self, business, produce):
+        kale, leek, _ = produce
+        tier(kale, 10, "8.00")
+        client = APIClient()
+        client.force_authenticate(user=business.user)
+
+        response = client.post(QUOTE_URL, {"items": [
+            {"produce_id": kale.id, "quantity": 10, "unit": "kg"},
+            {"produce_id": leek.id, "quantity": 2, "unit": "kg"},
+        ]}, format="json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [line["price_source"] for line in response.data["items"]] == ["global", "list"]
+        assert response.data["total"] == Decimal("100.00")
+        kale.refresh_from_db()
+        assert kale.quantity_available == 1000
+
+    def test_quote_rejects_unknown_produce(self, business):
+        client = APIClient()
+        client.force_authenticate(user=business.user)
+
+        response = client.post(QUOTE_URL, {"items": [{"produce_id": 424242, "quantity": 1, "unit": "kg"}]}, format="json")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["produce_ids"] == [424242]
+
+    def test_bulk_order_uses_tier_prices(self, business, produce):
+        kale = produce[0]
+        tier(kale, 10, "8.00")
+        tier(kale, 10, "7.25", business=business)
+        client = APIClient()
+        client.force_authenticate(user=business.user)
+
+        response = client.post(
+            "/api/v1/business/bulk-orders/",
+            {"items": [{"produce_id": kale.id, "quantity": 12, "unit": "kg"}]},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Decimal(response.data["items"][0]["price_per_unit"]) == Decimal("7.25")
@@ -0,0 +1,164 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from business.models import BusinessDailyRollup, BusinessProfile
+from business.services import place_bulk_order
+from farmers.models import FarmerProfile, Produce
+from orders.models import Cart, CartItem, Order, OrderStatus
+from orders.services import checkout_cart, transition_orders
+from userprofiles.models import UserType
+
+ANALYTICS_URL = "/api/v1/business/analytics/"
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    return [
+        Produce.objects.create(
+            farmer=farmer, name=name, unit="kg", price_per_unit=Decimal("2.00"), quantity_available=1000,
+        )
+        for name in ("Kale", "Leek")
+    ]
+
+
+@pytest.fixture
+def business():
+    user = User.objects.create_user(username="hotel")
+    user.profile.role = UserType.BUSINESS
+    user.profile.save()
+    return BusinessProfile.objects.create(user=user, name="Hotel")
+
+
+def order(business, produce, quantity=1):
+    return place_bulk_order(business.user, [{"produce_id": p.id, "quantity": quantity, "unit": "kg"} for p in produce])
+
+
+def rollup_values():
+    return sorted(
+        BusinessDailyRollup.objects.values_list(
+            "business_id", "day", "produce_id", "orders", "quantity", "amount", "delivered_quantity", "delivered_amount"
+        )
+    )
+
+
+def move_order(order, day):
+    Order.objects.filter(pk=order.pk).update(created_at=timezone.make_aware(datetime.combine(day, time(12))))
+
+
+@pytest.mark.django_db
+class TestRollupMaintenance:
+
+    def test_orders_add_to_the_days_rows(self, business, produce):
+        kale, leek = produce
+        order(business, [kale, leek], quantity=3)
+        order(business, [kale], quantity=2)
+
+        rows = {row.produce_id: row for row in BusinessDailyRollup.objects.all()}
+        assert (rows[kale.id].orders, rows[kale.id].quantity, rows[kale.id].amount) == (2, 5, Decimal("10.00"))
+        assert (rows[leek.id].orders, rows[leek.id].quantity, rows[leek.id].amount) == (1, 3, Decimal("6.00"))
+        assert rows[kale.id].day == timezone.localdate()
+        assert rows[kale.id].product_name == "Kale"
+
+    def test_consumer_orders_are_ignored(self, produce):
+        consumer = User.objects.create_user(username="consumer")
+        cart = Cart.objects.create(user=consumer)
+        CartItem.objects.create(cart=cart, produce=produce[0], quantity=1)
+
+        checkout_cart(consumer)
+
+        assert not BusinessDailyRollup.objects.exists()
+
+    def test_delivery_moves_delivered_totals(self, business, produce):
+        first, second = order(business, produce), order(business, produce)
+        transition_orders([first.pk, second.pk], OrderStatus.CONFIRMED)
+        transition_orders([first.pk], OrderStatus.DELIVERED)
+
+        row = BusinessDailyRollup.objects.get(produce=produce[0])
+        assert (row.delivered_quantity, row.delivered_amount) == (1, Decimal("2.00"))
+
+        second.status = OrderStatus.DELIVERED
+        second.save()
+        first.refresh_from_db()
+        first.status = OrderStatus.CONFIRMED  # corrected by staff
+        first.save(update_fields=["status"])
+
+        row.refresh_from_db()
+        assert (row.delivered_quantity, row.delivered_amount) == (1, Decimal("2.00"))
+        assert row.quantity == 2
+
+    def test_backfill_matches_incremental_rows(self, business, produce):
+        orders = [order(business, produce, quantity=q) for q in (1, 2, 4)]
+        transition_orders([orders[0].pk], OrderStatus.CONFIRMED)
+        transition_orders([orders[0].pk], OrderStatus.DELIVERED)
+        incremental = rollup_values()
+
+        BusinessDailyRollup.objects.all().delete()
+        call_command("backfill_business_rollups", stdout=StringIO())
+
+        assert rollup_values() == incremental
+
+
+@pytest.mark.django_db
+class TestBusinessAnalytics:
+
+    @pytest.fixture
+    def history(self, business, produce):
+        kale, leek = produce
+        for day, items in [
+            (date(2026, 1, 5), [kale]),
+            (date(2026, 1, 7), [kale, leek]),
+            (date(2026, 1, 20), [leek]),
+            (date(2026, 2, 3), [kale]),
+        ]:
+            move_order(order(business, items, quantity=2), day)
+        call_command("backfill_business_rollups", stdout=StringIO())
+
+    @pytest.fixture
+    def client(self, business):
+        client = APIClient()
+        client.force_authenticate(user=business.user)
+        return client
+
+    def test_totals_and_top_items(self, client, history):
+        response = client.get(ANALYTICS_URL)
+
+        assert response.status_code == 200
+        assert response.data["total_spent"] == Decimal("20.00")
+        assert response.data["total_orders"] == 4
+        assert [item["product_name"] for item in response.data["top_items"]] == ["Kale", "Leek"]
+        assert "series" not in response.data
+
+    def test_date_range_and_periods(self, client, history):
+        january = client.get(ANALYTICS_URL, {"start": "2026-01-01", "end": "2026-01-31", "period": "week"})
+        assert january.data["total_orders"] == 3
+        assert january.data["total_spent"] == Decimal("16.00")
+        assert [(row["period_start"], row["spent"]) for row in january.data["series"]] == [
+            (date(2026, 1, 5), Decimal("12.00")),
+            (date(2026, 1, 19), Decimal("4.00")),
+        ]
+
+        monthly = client.get(ANALYTICS_URL, {"period": "month"})
+        assert [(row["period_start"], row["quantity"]) for row in monthly.data["series"]] == [
+            (date(2026, 1, 1), 8),
+            (date(2026, 2, 1), 2),
+        ]
+
+    def test_reads_rollups_not_order_items(self, client, history):
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(ANALYTICS_URL, {"period": "day"})
+
+        assert not any("orders_orderitem" in q["sql"] for q in ctx.captured_queries)
+
+    def test_rejects_bad_ranges(self, client):
+        assert client.get(ANALYTICS_URL, {"start": "2026-02-01", "end": "2026-01-01"}).status_code == 400
+        assert client.get(ANALYTICS_URL, {"period": "year"}).status_code == 400
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from farmfresh.cache import CacheManager, CacheStats
+
+
+@pytest.fixture(autouse=True)
+def stats(settings):
+    settings.CACHE_STATS_FLUSH_SECONDS = 0
+    CacheStats.reset()
+    yield
+    CacheStats.reset()
+
+
+def test_concurrent_misses_rebuild_once():
+    calls, results = [], []
+    start = threading.Barrier(8)
+
+    def rebuild():
+        calls.append(1)
+        time.sleep(0.2)
+        return "plans"
+
+    def worker():
+        start.wait()
+        results.append(CacheManager.get_or_set("plans@1", rebuild, 60))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["plans"] * 8
+    stats = CacheStats.snapshot()["plans"]
+    assert (stats["misses"], stats["rebuilds"], stats["waits"], stats["hits"]) == (1, 1, 7, 7)
+
+
+def test_stale_value_is_served_while_another_caller_rebuilds():
+    CacheManager.get_or_set("tiers", lambda: "old", timeout=0, stale_timeout=60)
+    cache.add("tiers:rebuild", "other-worker", 10)
+
+    assert CacheManager.get_or_set("tiers", lambda: "new", timeout=60) == "old"
+    assert CacheStats.snapshot()["tiers"]["stale"] == 1
+
+    cache.delete("tiers:rebuild")
+    assert CacheManager.get_or_set("tiers", lambda: "new", timeout=60) == "new"
+
+
+def test_entries_near_expiry_may_be_rebuilt_early(monkeypatch):
+    # One second left on a value that took half a second to build.
+    cache.set("catalog", {"value": "v1", "fresh_until": time.time() + 1, "build_seconds": 0.5}, 60)
+
+    monkeypatch.setattr("farmfresh.cache.random.random", lambda: 0.0)
+    assert CacheManager.get_or_set("catalog", lambda: "v2", timeout=60) == "v1"
+
+    monkeypatch.setattr("farmfresh.cache.random.random", lambda: 0.99)
+    assert CacheManager.get_or_set("catalog", lambda: "v2", timeout=60) == "v2"
+
+
+def test_failed_rebuild_releases_the_lock():
+    def broken():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        CacheManager.get_or_set("plans", broken)
+    assert cache.get("plans:rebuild") is None
+    assert CacheManager.get_or_set("plans", lambda: None) is None
+    assert CacheManager.get_or_set("plans", lambda: "rebuilt") is None  # None is cached too
+
+
+@pytest.mark.django_db
+def test_stats_endpoint_is_staff_only():
+    CacheManager.get_or_set("plans", lambda: "plans")
+    CacheManager.get_or_set("plans", lambda: "plans")
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="shopper"))
+    assert client.get("/api/v1/cache-stats/").status_code == 403
+
+    client.force_authenticate(user=User.objects.create_user(username="ops", is_staff=True))
+    stats = client.get("/api/v1/cache-stats/").data["plans"]
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+    assert stats["mean_rebuild_ms"] is not None
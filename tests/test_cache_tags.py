@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from farmers.models import FarmerProfile, Produce
+from farmfresh.cache import (
+    CacheKeys,
+    CacheManager,
+    bump_tags,
+    invalidate_cache_pattern,
+    tag_versions,
+    tagged_key,
+)
+from subscriptions.models import SubscriptionPlan
+
+
+def test_bumping_a_tag_orphans_only_its_keys():
+    cache.set("session:abc", "keep")
+    user_key = CacheManager.get_user_cache_key(5, "dashboard")
+    other_key = CacheManager.get_user_cache_key(6, "dashboard")
+    cache.set(user_key, "stale")
+
+    CacheManager.invalidate_user_cache(5)
+
+    assert CacheManager.get_user_cache_key(5, "dashboard") != user_key
+    assert CacheManager.get_user_cache_key(6, "dashboard") == other_key
+    assert cache.get("session:abc") == "keep"
+
+
+def test_patterns_map_to_tags():
+    key = tagged_key("report", ["user:7"])
+    invalidate_cache_pattern("user:7:*")
+    assert tagged_key("report", ["user:7"]) != key
+
+    key = CacheManager.get_user_cache_key(7, "x")
+    CacheManager.delete_pattern("user:7:*")
+    assert CacheManager.get_user_cache_key(7, "x") != key
+
+
+def test_versions_survive_eviction_without_reviving_old_entries():
+    before = tag_versions(["produce"])["produce"]
+    bump_tags("produce")
+    assert tag_versions(["produce"])["produce"] == before + 1
+
+    cache.delete("cache-tag:produce")  # evicted
+    assert tag_versions(["produce"])["produce"] > before + 1
+
+
+@pytest.mark.django_db
+class TestModelSignals:
+
+    def test_saves_and_deletes_bump_tags_after_commit(self, django_capture_on_commit_callbacks):
+        farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+        produce_key, farmer_key = CacheKeys.public_produce_list({}), CacheKeys.farmer_produce(farmer.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            produce = Produce.objects.create(farmer=farmer, name="Kale", unit="kg", price_per_unit=Decimal("1"))
+            assert CacheKeys.public_produce_list({}) == produce_key  # not before commit
+        assert CacheKeys.public_produce_list({}) != produce_key
+        assert CacheKeys.farmer_produce(farmer.pk) != farmer_key
+
+        plans_key = CacheKeys.subscription_plans()
+        with django_capture_on_commit_callbacks(execute=True):
+            SubscriptionPlan.objects.create(name="Weekly box", price=Decimal("20.00"))
+        assert CacheKeys.subscription_plans() != plans_key
+
+        produce_key = CacheKeys.public_produce_list({})
+        with django_capture_on_commit_callbacks(execute=True):
+            produce.delete()
+        assert CacheKeys.public_produce_list({}) != produce_key
+
+    def test_profile_saves_bump_the_user_tag(self, django_capture_on_commit_callbacks):
+        user = User.objects.create_user(username="shopper")
+        key = CacheKeys.user_profile(user.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.profile.save()
+
+        assert CacheKeys.user_profile(user.pk) != key
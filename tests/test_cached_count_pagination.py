@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from farmers.models import FarmerProfile, Produce
+from farmfresh import pagination
+from orders.models import Order
+
+CATALOG = "/api/v1/farmers/public/produce/"
+
+
+@pytest.fixture
+def catalog():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    for i in range(5):
+        Produce.objects.create(
+            farmer=farmer, name=f"Kale {i}" if i % 2 else f"Leek {i}", unit="kg",
+            price_per_unit=Decimal("1.00"), quantity_available=5,
+        )
+    return farmer
+
+
+def count_queries(ctx):
+    return [q["sql"] for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()]
+
+
+@pytest.mark.django_db
+class TestCachedCountPagination:
+
+    def test_count_is_cached_per_filter_signature(self, catalog):
+        client = APIClient()
+        first = client.get(CATALOG)
+        assert first.data["count"] == 5
+        assert first.data["count_exact"] is True
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = client.get(CATALOG, {"page": 1})
+        assert again.data["count"] == 5
+        assert count_queries(ctx) == []
+
+        with CaptureQueriesContext(connection) as ctx:
+            filtered = client.get(CATALOG, {"search": "Kale"})
+        assert filtered.data["count"] == 2
+        assert len(count_queries(ctx)) == 1
+
+    def test_large_unfiltered_tables_use_estimates(self, catalog, monkeypatch, settings):
+        settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(pagination, "estimated_table_rows", lambda model, using: 2_500_000)
+
+        produce = Produce.objects.all()
+        assert pagination.cached_count(produce) == (2_500_000, False)
+        assert pagination.cached_count(produce.filter(name__startswith="Kale")) == (2, True)
+
+    def test_small_tables_are_counted_exactly(self, catalog, monkeypatch, settings):
+        settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(pagination, "estimated_table_rows", lambda model, using: 10)
+
+        assert pagination.cached_count(Produce.objects.all()) == (5, True)
+
+    def test_admin_changelist_reuses_cached_count(self):
+        staff = User.objects.create_superuser(username="admin", password="pw", email="admin@example.com")
+        Order.objects.create(user=staff)
+        client = APIClient()
+        client.force_login(staff)
+
+        assert client.get("/admin/orders/order/").status_code == 200
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get("/admin/orders/order/")
+
+        assert response.status_code == 200
+        assert not [sql for sql in count_queries(ctx) if "orders_order" in sql]
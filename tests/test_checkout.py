@@ -0,0 +1,177 @@
+import threading
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from consumers import tasks
+from farmers.models import FarmerEarnings, FarmerProfile, Produce
+from notifications import utils
+from orders.models import Cart, CartItem, Order, OrderItem
+from orders.services import CheckoutError, checkout_cart, confirm_earnings
+
+
+@pytest.fixture
+def farmer():
+    user = User.objects.create_user(username="grower", email="grower@example.com")
+    return FarmerProfile.objects.create(user=user, name="Grower")
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username="buyer", password="testpass123")
+
+
+def make_produce(farmer, count, stock=10):
+    return [
+        Produce.objects.create(
+            farmer=farmer,
+            name=f"Produce {i}",
+            unit="kg",
+            price_per_unit=Decimal("2.00"),
+            quantity_available=stock,
+        )
+        for i in range(count)
+    ]
+
+
+def fill_cart(user, produce, quantity=1):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    for p in produce:
+        CartItem.objects.create(cart=cart, produce=p, quantity=quantity)
+    return cart
+
+
+@pytest.mark.django_db
+class TestCheckoutEngine:
+
+    def test_checkout_writes_items_earnings_and_stock(self, buyer, farmer):
+        produce = make_produce(farmer, 3, stock=5)
+        fill_cart(buyer, produce, quantity=2)
+
+        order = checkout_cart(buyer)
+
+        assert order.total_amount == Decimal("12.00")
+        assert OrderItem.objects.filter(order=order).count() == 3
+        assert FarmerEarnings.objects.filter(order=order, farmer=farmer).count() == 3
+        assert set(Produce.objects.values_list("quantity_available", flat=True)) == {3}
+        assert not CartItem.objects.filter(cart__user=buyer).exists()
+
+    def test_last_unit_marks_produce_unavailable(self, buyer, farmer):
+        (produce,) = make_produce(farmer, 1, stock=2)
+        fill_cart(buyer, [produce], quantity=2)
+
+        checkout_cart(buyer)
+
+        produce.refresh_from_db()
+        assert produce.quantity_available == 0
+        assert produce.available is False
+
+    def test_checkout_refreshes_the_cached_catalog(self, buyer, farmer, monkeypatch,
+                                                   django_capture_on_commit_callbacks):
+        monkeypatch.setattr(tasks.sync_wishlist_stock_task, "delay", lambda produce_ids: None)
+        monkeypatch.setattr(utils, "_kick_dispatcher", lambda: None)
+        (produce,) = make_produce(farmer, 1, stock=5)
+        fill_cart(buyer, [produce], quantity=2)
+        client = APIClient()
+        client.get("/api/v1/farmers/public/produce/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            checkout_cart(buyer)
+
+        response = client.get("/api/v1/farmers/public/produce/")
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"][0]["quantity_available"] == 3
+
+    def test_confirmed_earnings_refresh_the_cached_catalog(self, buyer, farmer, monkeypatch,
+                                                           django_capture_on_commit_callbacks):
+        monkeypatch.setattr(tasks.sync_wishlist_stock_task, "delay", lambda produce_ids: None)
+        monkeypatch.setattr(utils, "_kick_dispatcher", lambda: None)
+        (produce,) = make_produce(farmer, 1, stock=5)
+        fill_cart(buyer, [produce], quantity=2)
+        with django_capture_on_commit_callbacks(execute=True):
+            order = checkout_cart(buyer)
+        client = APIClient()
+        client.get("/api/v1/farmers/public/produce/")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            confirm_earnings([order.id])
+
+        response = client.get("/api/v1/farmers/public/produce/")
+        assert response["X-Cache"] == "MISS"
+        assert (response.data["results"][0]["total_sold"], response.data["results"][0]["total_revenue"]) == (2, "4.00")
+
+    def test_query_count_independent_of_cart_size_except_reservations(self, farmer):
+        small_buyer = User.objects.create_user(username="small")
+        large_buyer = User.objects.create_user(username="large")
+        fill_cart(small_buyer, make_produce(farmer, 2))
+        fill_cart(large_buyer, make_produce(farmer, 20))
+
+        with CaptureQueriesContext(connection) as small:
+            checkout_cart(small_buyer)
+        with CaptureQueriesContext(connection) as large:
+            checkout_cart(large_buyer)
+
+        # One guarded UPDATE per extra produce, nothing else grows.
+        assert len(large.captured_queries) - len(small.captured_queries) == 18
+
+    def test_stale_cart_cannot_oversell(self, farmer):
+        (produce,) = make_produce(farmer, 1, stock=3)
+        first = User.objects.create_user(username="first")
+        second = User.objects.create_user(username="second")
+        fill_cart(first, [produce], quantity=2)
+        fill_cart(second, [produce], quantity=2)
+
+        checkout_cart(first)
+        with pytest.raises(CheckoutError) as exc:
+            checkout_cart(second)
+
+        assert exc.value.payload["errors"][0]["available"] == 1
+        produce.refresh_from_db()
+        assert produce.quantity_available == 1
+        assert Order.objects.filter(user=second).count() == 0
+        assert CartItem.objects.filter(cart__user=second).count() == 1
+
+    def test_checkout_endpoint_reports_stock_errors(self, buyer, farmer):
+        (produce,) = make_produce(farmer, 1, stock=1)
+        fill_cart(buyer, [produce], quantity=1)
+        Produce.objects.filter(pk=produce.pk).update(quantity_available=0)
+        client = APIClient()
+        client.force_authenticate(user=buyer)
+
+        response = client.post("/api/v1/checkout/")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["errors"][0]["produce_id"] == produce.id
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_checkouts_do_not_oversell(farmer):
+    if connection.vendor == "sqlite":
+        pytest.skip("SQLite serialises writers; run against MySQL")
+    (produce,) = make_produce(farmer, 1, stock=5)
+    buyers = [User.objects.create_user(username=f"p{i}") for i in range(10)]
+    for user in buyers:
+        fill_cart(user, [produce], quantity=1)
+
+    def run(user):
+        try:
+            checkout_cart(user)
+        except CheckoutError:
+            pass
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(user,)) for user in buyers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    produce.refresh_from_db()
+    assert produce.quantity_available == 0
+    assert Order.objects.count() == 5
@@ -0,0 +1,207 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from consumers import tasks
+from consumers.analytics import materialize_consumer_analytics
+from consumers.models import ConsumerAnalytics, ConsumerProfile
+from deliveries.models import Delivery, DeliveryStatus
+from farmers.models import FarmerProfile, Produce
+from farmfresh.aggregation import bucket_starts
+from notifications import utils
+from orders.models import Order, OrderStatus
+from orders.services import OrderLine, place_order, transition_orders
+
+MATERIALIZED = [
+    "monthly_spending", "yearly_spending", "weekly_orders", "order_frequency", "average_order_size",
+    "top_produce_categories", "seasonal_preferences", "preferred_delivery_days", "delivery_success_rate",
+]
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Hill Farm")
+    return {
+        name: Produce.objects.create(
+            farmer=farmer, name=name, unit="kg", price_per_unit=Decimal("2.00"), quantity_available=1000,
+        )
+        for name in ("Kale", "Leek", "Plum")
+    }
+
+
+@pytest.fixture
+def scheduled(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.refresh_consumer_analytics_task, "apply_async", lambda args, **kwargs: calls.append(args[0]))
+    monkeypatch.setattr(tasks.sync_wishlist_stock_task, "delay", lambda produce_ids: None)
+    monkeypatch.setattr(utils, "_kick_dispatcher", lambda: None)
+    return calls
+
+
+def consumer(username):
+    user = User.objects.create_user(username=username)
+    ConsumerProfile.objects.create(user=user)
+    return user
+
+
+def buy(user, *lines):
+    return place_order(user, [
+        OrderLine(produce=produce, quantity=quantity, unit="kg", unit_price=Decimal("2.00"))
+        for produce, quantity in lines
+    ])
+
+
+def move(order, when):
+    Order.objects.filter(pk=order.pk).update(created_at=when)
+
+
+def analytics_of(user):
+    return ConsumerAnalytics.objects.get(consumer__user=user)
+
+
+@pytest.mark.django_db
+class TestMaterialization:
+
+    def test_fields_are_computed_from_orders_and_deliveries(self, produce):
+        ann = consumer("ann")
+        this_month, previous_month = bucket_starts("month", 2)
+        first = buy(ann, (produce["Kale"], 3), (produce["Leek"], 1))
+        move(first, previous_month + timedelta(days=1))
+        second = buy(ann, (produce["Kale"], 2))
+        late = buy(ann, (produce["Plum"], 1))
+        Order.objects.filter(pk=late.pk).update(status=OrderStatus.CONFIRMED)
+        now = timezone.now()
+        Delivery.objects.filter(order=late).update(scheduled_date=now - timedelta(days=3))
+        delivered_at = timezone.make_aware(datetime.combine(datetime(2026, 6, 3), time(12)))  # a Wednesday
+        Delivery.objects.filter(order__in=[first, second]).update(
+            status=DeliveryStatus.DELIVERED, delivered_at=delivered_at
+        )
+
+        assert materialize_consumer_analytics([ann.pk, produce["Kale"].farmer.user_id], now=now) == 1
+
+        analytics = analytics_of(ann)
+        assert analytics.monthly_spending[this_month.strftime("%Y-%m")] == 6.0
+        assert analytics.monthly_spending[previous_month.strftime("%Y-%m")] == 8.0
+        assert sum(analytics.yearly_spending.values()) == 14.0
+        assert analytics.average_order_size == Decimal("4.67")
+        assert analytics.order_frequency == Decimal("1.50")
+        assert analytics.top_produce_categories == ["Kale", "Leek", "Plum"]
+        assert analytics.preferred_delivery_days == ["Wednesday"]
+        assert analytics.delivery_success_rate == Decimal("66.67")
+        assert analytics.materialized_at == now
+        profile = ConsumerProfile.objects.get(user=ann)
+        assert (profile.total_orders, profile.total_spent) == (3, Decimal("14.00"))
+        assert profile.last_order_date == Order.objects.get(pk=late.pk).created_at
+
+    def test_batches_run_a_fixed_number_of_queries(self, produce):
+        ann, bob = consumer("ann"), consumer("bob")
+        buy(ann, (produce["Kale"], 1))
+        with CaptureQueriesContext(connection) as one:
+            materialize_consumer_analytics([ann.pk])
+        for index in range(3):
+            buy(ann, (produce["Leek"], 1), (produce["Plum"], index + 1))
+            buy(bob, (produce["Kale"], 2))
+
+        with CaptureQueriesContext(connection) as many:
+            assert materialize_consumer_analytics([ann.pk, bob.pk]) == 2
+
+        assert len(many.captured_queries) == len(one.captured_queries)
+
+    def test_rebuild_command_matches_materialization(self, produce):
+        users = [consumer(f"buyer{index}") for index in range(5)]
+        for index, user in enumerate(users):
+            buy(user, (produce["Kale"], index + 1))
+        materialize_consumer_analytics([user.pk for user in users])
+        expected = list(ConsumerAnalytics.objects.order_by("pk").values_list(*MATERIALIZED))
+        ConsumerAnalytics.objects.update(monthly_spending={}, top_produce_categories=[], materialized_at=None)
+
+        out = StringIO()
+        call_command("rebuild_consumer_analytics", "--batch-size", "2", stdout=out)
+
+        assert "Rebuilt analytics of 5 consumers" in out.getvalue()
+        assert list(ConsumerAnalytics.objects.order_by("pk").values_list(*MATERIALIZED)) == expected
+        assert not ConsumerAnalytics.objects.filter(materialized_at=None).exists()
+
+
+@pytest.mark.django_db
+class TestRefreshEvents:
+
+    def test_order_events_schedule_one_refresh_per_window(self, produce, scheduled,
+                                                          django_capture_on_commit_callbacks):
+        ann = consumer("ann")
+        with django_capture_on_commit_callbacks(execute=True):
+            order = buy(ann, (produce["Kale"], 1))
+        with django_capture_on_commit_callbacks(execute=True):
+            buy(ann, (produce["Leek"], 1))
+            transition_orders([order.pk], OrderStatus.CONFIRMED)
+        assert scheduled == [[ann.pk]]
+
+        tasks.refresh_consumer_analytics_task(scheduled.pop())
+        assert analytics_of(ann).monthly_spending[bucket_starts("month", 1)[0].strftime("%Y-%m")] == 4.0
+
+        delivery = Delivery.objects.get(order=order)
+        delivery.status = DeliveryStatus.DELIVERED
+        with django_capture_on_commit_callbacks(execute=True):
+            delivery.save(update_fields=["status"])
+            delivery.save(update_fields=["notes"])
+        assert scheduled == [[ann.pk]]
+
+    def test_bulk_transitions_batch_their_consumers(self, produce, scheduled, settings,
+                                                    django_capture_on_commit_callbacks):
+        settings.CONSUMER_ANALYTICS_BATCH_SIZE = 2
+        users = [consumer(f"buyer{index}") for index in range(3)]
+        orders = [buy(user, (produce["Kale"], 1)) for user in users]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            transition_orders([order.pk for order in orders], OrderStatus.CONFIRMED)
+
+        assert scheduled == [[users[0].pk, users[1].pk], [users[2].pk]]
+
+
+@pytest.mark.django_db
+class TestMaterializedReads:
+
+    @pytest.fixture
+    def client(self):
+        user = User.objects.create_user(username="ann", is_staff=True)
+        ConsumerProfile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client, user
+
+    def test_dashboard_reads_the_materialized_row(self, client, produce):
+        client, user = client
+        for _ in range(3):
+            buy(user, (produce["Plum"], 2), (produce["Kale"], 1))
+        materialize_consumer_analytics([user.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/consumers/dashboard/")
+
+        assert response.status_code == 200
+        chart = response.data["monthly_spending_chart"]
+        assert list(chart) == [start.strftime("%Y-%m") for start in bucket_starts("month", 6)]
+        assert list(chart.values()) == [18.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+        assert list(response.data["order_frequency_trend"].values())[0] == 3
+        assert response.data["top_produce_categories"] == ["Plum", "Kale"]
+        assert response.data["profile"]["total_orders"] == 3
+        assert not [query for query in queries.captured_queries if "GROUP BY" in query["sql"]]
+
+    def test_analytics_are_computed_on_first_read(self, client, produce):
+        client, user = client
+        buy(user, (produce["Leek"], 4))
+
+        response = client.get("/api/v1/consumers/analytics/")
+
+        assert response.status_code == 200
+        assert response.data["top_produce_categories"] == ["Leek"]
+        assert response.data["average_order_size"] == "8.00"
+        assert response.data["materialized_at"] is not None
@@ -0,0 +1,180 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from business import services, tasks
+from business.models import (
+    BusinessProfile,
+    ContractFrequency,
+    ContractOrder,
+    ContractOrderItem,
+    ContractRun,
+    ContractRunItemStatus,
+    ContractRunStatus,
+)
+from farmers.models import FarmerProfile, Produce
+from orders.models import FarmerOrder, Order
+
+RUN_URL = "/api/v1/business/contracts/run-cycle/"
+
+
+@pytest.fixture
+def staff_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="staff", is_staff=True))
+    return client
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Run the tasks inline instead of sending them to the broker."""
+    monkeypatch.setattr(services, "CONTRACT_RUN_CHUNK_SIZE", 2)
+    monkeypatch.setattr(tasks.process_contract_run_task, "delay", tasks.process_contract_run_task)
+    monkeypatch.setattr(tasks.process_contract_chunk_task, "delay", tasks.process_contract_chunk_task)
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    return [
+        Produce.objects.create(
+            farmer=farmer, name=f"Produce {i}", unit="kg",
+            price_per_unit=Decimal("5.00"), quantity_available=100,
+        )
+        for i in range(2)
+    ]
+
+
+def make_contracts(produce, count, quantity=2, frequency=ContractFrequency.WEEKLY, prefix="buyer"):
+    contracts = []
+    for i in range(count):
+        business = BusinessProfile.objects.create(user=User.objects.create_user(username=f"{prefix}{i}"), name=f"Buyer {i}")
+        contract = ContractOrder.objects.create(
+            business=business, name="Weekly veg", frequency=frequency, next_delivery_date=date.today(),
+        )
+        for p in produce:
+            ContractOrderItem.objects.create(
+                contract=contract, produce=p, quantity=quantity, unit="kg", agreed_unit_price=Decimal("4.00"),
+            )
+        contracts.append(contract)
+    return contracts
+
+
+def start_run(django_capture_on_commit_callbacks, user=None):
+    with django_capture_on_commit_callbacks(execute=True):
+        run, _ = services.start_contract_run(user)
+    run.refresh_from_db()
+    return run
+
+
+@pytest.mark.django_db
+class TestContractRuns:
+
+    def test_run_creates_one_order_per_due_contract(self, produce, workers, django_capture_on_commit_callbacks):
+        contracts = make_contracts(produce, 5)
+
+        run = start_run(django_capture_on_commit_callbacks)
+
+        assert run.status == ContractRunStatus.COMPLETED
+        assert run.total_contracts == 5
+        assert run.items.filter(status=ContractRunItemStatus.DONE).count() == 5
+        orders = Order.objects.filter(contract_run_item__run=run)
+        assert orders.count() == 5
+        assert {o.total_amount for o in orders} == {Decimal("16.00")}
+        assert FarmerOrder.objects.filter(order__in=orders).count() == 5
+        for contract in contracts:
+            contract.refresh_from_db()
+            assert contract.next_delivery_date == date.today() + timedelta(days=7)
+        produce[0].refresh_from_db()
+        assert produce[0].quantity_available == 90
+
+    def test_lines_without_stock_are_skipped(self, produce, workers, django_capture_on_commit_callbacks):
+        Produce.objects.filter(pk=produce[1].pk).update(quantity_available=1)
+        make_contracts(produce, 1)
+        make_contracts([produce[1]], 1, frequency=ContractFrequency.MONTHLY, prefix="monthly")
+
+        run = start_run(django_capture_on_commit_callbacks)
+
+        done = run.items.get(status=ContractRunItemStatus.DONE)
+        assert done.skipped_lines == 1
+        assert done.order.items.count() == 1
+        skipped = run.items.get(status=ContractRunItemStatus.SKIPPED)
+        assert skipped.order is None
+        assert Order.objects.count() == 1
+
+    def test_resume_after_crash_finishes_without_duplicates(self, produce, workers, monkeypatch,
+                                                             django_capture_on_commit_callbacks):
+        make_contracts(produce, 5)
+        # The first worker processes one chunk and dies before the rest run.
+        calls = []
+
+        def crashing_delay(run_id, item_ids):
+            if not calls:
+                tasks.process_contract_chunk_task(run_id, item_ids)
+            calls.append(item_ids)
+
+        monkeypatch.setattr(tasks.process_contract_chunk_task, "delay", crashing_delay)
+        run = start_run(django_capture_on_commit_callbacks)
+        assert run.status == ContractRunStatus.RUNNING
+        assert Order.objects.count() == 2
+
+        monkeypatch.setattr(tasks.process_contract_chunk_task, "delay", tasks.process_contract_chunk_task)
+        assert services.resume_contract_run(run)
+        # Replaying an old chunk must not order anything twice.
+        tasks.process_contract_chunk_task(run.pk, calls[0])
+
+        run.refresh_from_db()
+        assert run.status == ContractRunStatus.COMPLETED
+        assert Order.objects.count() == 5
+        assert not services.resume_contract_run(run)
+
+    def test_contract_in_two_runs_is_ordered_once(self, produce, workers, django_capture_on_commit_callbacks):
+        make_contracts(produce, 2)
+        first = start_run(django_capture_on_commit_callbacks)
+        # A second run started for the same day sees no due contracts.
+        second = start_run(django_capture_on_commit_callbacks)
+        assert second.pk != first.pk and second.total_contracts == 0
+
+        # A stale snapshot of an already processed contract is skipped, not re-ordered.
+        stale = ContractRun.objects.create(run_date=date.today())
+        stale.items.create(contract=first.items.first().contract, due_date=date.today())
+        tasks.process_contract_run_task(stale.pk)
+
+        assert stale.items.get().status == ContractRunItemStatus.SKIPPED
+        assert Order.objects.count() == 2
+
+    def test_endpoint_starts_run_and_reports_progress(self, produce, staff_client,
+                                                      django_capture_on_commit_callbacks, monkeypatch):
+        make_contracts(produce, 3)
+        monkeypatch.setattr(tasks.process_contract_run_task, "delay", lambda run_id: None)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = staff_client.post(RUN_URL)
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["status"] == ContractRunStatus.PENDING
+        assert response.data["progress"]["pending"] == 3
+
+        # Starting again while the run is unfinished returns the same run.
+        again = staff_client.post(RUN_URL)
+        assert again.status_code == status.HTTP_200_OK
+        assert again.data["id"] == response.data["id"]
+
+        run_id = response.data["id"]
+        monkeypatch.setattr(tasks.process_contract_run_task, "delay", tasks.process_contract_run_task)
+        monkeypatch.setattr(tasks.process_contract_chunk_task, "delay", tasks.process_contract_chunk_task)
+        resumed = staff_client.post(f"/api/v1/business/contracts/runs/{run_id}/resume/")
+        assert resumed.status_code == status.HTTP_202_ACCEPTED
+        assert resumed.data["progress"] == {"pending": 0, "done": 3, "skipped": 0, "failed": 0}
+
+        listing = staff_client.get("/api/v1/business/contracts/runs/")
+        assert listing.data["results"][0]["status"] == ContractRunStatus.COMPLETED
+
+    def test_requires_staff(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username="buyer"))
+        assert client.post(RUN_URL).status_code == status.HTTP_403_FORBIDDEN
+        assert client.get("/api/v1/business/contracts/runs/").status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from notifications.models import Notification
+from payments.models import WalletTransaction
+from payments.services import wallet_deposit
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="scroller")
+
+
+@pytest.fixture
+def client(user):
+    api_client = APIClient()
+    api_client.force_authenticate(user=user)
+    return api_client
+
+
+def make_notifications(user, count, per_timestamp=2):
+    Notification.objects.bulk_create([
+        Notification(user=user, title=f"n{i}", message="m") for i in range(count)
+    ])
+    # Rows share timestamps (two by default) so the id tiebreaker is exercised.
+    base = timezone.now()
+    for i, pk in enumerate(Notification.objects.filter(user=user).order_by("id").values_list("pk", flat=True)):
+        Notification.objects.filter(pk=pk).update(created_at=base + timedelta(seconds=i // per_timestamp))
+
+
+def scroll(client, url):
+    ids, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.data["results"]]
+        url = response.data["next"]
+        pages += 1
+    return ids, pages
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+
+    def test_page_numbers_remain_the_default(self, client, user):
+        make_notifications(user, 3)
+        response = client.get("/api/v1/notifications/")
+        assert response.data["count"] == 3
+
+    def test_cursor_param_switches_to_keyset_pages(self, client, user):
+        make_notifications(user, 7)
+
+        ids, pages = scroll(client, "/api/v1/notifications/?cursor=&page_size=3")
+
+        expected = list(
+            Notification.objects.filter(user=user).order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        assert ids == expected
+        assert pages == 3
+
+    def test_cursor_pages_do_not_count_or_offset(self, client, user):
+        make_notifications(user, 5, per_timestamp=1)
+        first = client.get("/api/v1/notifications/?cursor=&page_size=2")
+
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(first.data["next"])
+
+        sql = " ".join(q["sql"] for q in ctx.captured_queries if "notifications_notification" in q["sql"])
+        assert "COUNT(" not in sql
+        assert "OFFSET" not in sql
+
+    def test_wallet_transactions_are_cursor_paginated(self, client, user):
+        for amount in ("1.00", "2.00", "3.00"):
+            wallet_deposit(user, Decimal(amount))
+
+        ids, pages = scroll(client, "/api/v1/payments/wallet/transactions/?page_size=2")
+
+        assert ids == list(WalletTransaction.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        assert pages == 2
+
+    def test_farmer_earnings_accept_ordering_with_cursor(self):
+        from farmers.models import FarmerEarnings, FarmerProfile, Produce
+        from orders.models import Order
+
+        farmer_user = User.objects.create_user(username="grower")
+        farmer = FarmerProfile.objects.create(user=farmer_user, name="Grower")
+        produce = Produce.objects.create(farmer=farmer, name="Kale", unit="kg", price_per_unit=Decimal("1.00"))
+        order = Order.objects.create(user=farmer_user)
+        for amount in (5, 1, 3, 4, 2):
+            FarmerEarnings.objects.create(
+                farmer=farmer, order=order, produce=produce, quantity=1,
+                unit_price=Decimal(amount), total_amount=Decimal(amount),
+            )
+        api_client = APIClient()
+        api_client.force_authenticate(user=farmer_user)
+        farmer_user.profile.role = "FARMER"
+        farmer_user.profile.save()
+
+        response = api_client.get("/api/v1/farmers/earnings/?cursor=&ordering=-total_amount&page_size=2")
+        amounts = [Decimal(row["total_amount"]) for row in response.data["results"]]
+        response = api_client.get(response.data["next"])
+        amounts += [Decimal(row["total_amount"]) for row in response.data["results"]]
+
+        assert amounts == [Decimal(5), Decimal(4), Decimal(3), Decimal(2)]
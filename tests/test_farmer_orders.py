@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from business import tasks as business_tasks
+from business.models import BusinessProfile, ContractOrder, ContractOrderItem
+from farmers.models import FarmerProfile, Produce
+from orders.models import Cart, CartItem, FarmerOrder, Order, OrderStatus
+from orders.services import checkout_cart
+from userprofiles.models import UserType
+
+
+@pytest.fixture
+def farmer():
+    user = User.objects.create_user(username="grower")
+    return FarmerProfile.objects.create(user=user, name="Grower")
+
+
+@pytest.fixture
+def other_farmer():
+    user = User.objects.create_user(username="neighbour")
+    return FarmerProfile.objects.create(user=user, name="Neighbour")
+
+
+def make_produce(farmer, price="2.00", stock=100):
+    return Produce.objects.create(
+        farmer=farmer, name=f"Produce of {farmer.name}", unit="kg",
+        price_per_unit=Decimal(price), quantity_available=stock,
+    )
+
+
+def checkout(username, lines):
+    buyer = User.objects.create_user(username=username)
+    cart = Cart.objects.create(user=buyer)
+    for produce, quantity in lines:
+        CartItem.objects.create(cart=cart, produce=produce, quantity=quantity)
+    return checkout_cart(buyer)
+
+
+def farmer_client(farmer):
+    client = APIClient()
+    client.force_authenticate(user=farmer.user)
+    return client
+
+
+@pytest.mark.django_db
+class TestFarmerOrderIndex:
+
+    def test_checkout_writes_one_row_per_farmer(self, farmer, other_farmer):
+        tomatoes, beans = make_produce(farmer), make_produce(farmer, price="3.00")
+        apples = make_produce(other_farmer, price="5.00")
+
+        order = checkout("buyer", [(tomatoes, 2), (beans, 1), (apples, 1)])
+
+        rows = {row.farmer_id: row for row in FarmerOrder.objects.filter(order=order)}
+        assert rows[farmer.id].subtotal == Decimal("7.00")
+        assert rows[other_farmer.id].subtotal == Decimal("5.00")
+        assert rows[farmer.id].created_at == order.created_at
+        assert rows[farmer.id].status == OrderStatus.PENDING
+
+    def test_status_follows_order(self, farmer):
+        order = checkout("buyer", [(make_produce(farmer), 1)])
+
+        order.status = OrderStatus.CONFIRMED
+        order.save()
+
+        assert FarmerOrder.objects.get(order=order).status == OrderStatus.CONFIRMED
+
+    def test_bulk_and_contract_orders_are_indexed(self, farmer, monkeypatch, django_capture_on_commit_callbacks):
+        produce = make_produce(farmer)
+        business_user = User.objects.create_user(username="restaurant")
+        business_user.profile.role = UserType.BUSINESS
+        business_user.profile.save()
+        business = BusinessProfile.objects.create(user=business_user, name="Bistro")
+        client = APIClient()
+        client.force_authenticate(user=business_user)
+
+        response = client.post(
+            "/api/v1/business/bulk-orders/",
+            {"items": [{"produce_id": produce.id, "quantity": 4, "unit": "kg"}]},
+            format="json",
+        )
+        assert response.status_code == 201
+        assert FarmerOrder.objects.get(order_id=response.data["id"]).subtotal == Decimal("8.00")
+
+        contract = ContractOrder.objects.create(
+            business=business, name="Weekly", frequency="WEEKLY", next_delivery_date="2000-01-01"
+        )
+        ContractOrderItem.objects.create(
+            contract=contract, produce=produce, quantity=3, unit="kg", agreed_unit_price=Decimal("1.50")
+        )
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        client.force_authenticate(user=staff)
+        monkeypatch.setattr(business_tasks.process_contract_run_task, "delay", business_tasks.process_contract_run_task)
+        monkeypatch.setattr(business_tasks.process_contract_chunk_task, "delay", business_tasks.process_contract_chunk_task)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post("/api/v1/business/contracts/run-cycle/")
+
+        contract_order = Order.objects.filter(user=business_user).latest("id")
+        assert FarmerOrder.objects.get(order=contract_order).subtotal == Decimal("4.50")
+
+    def test_history_keyset_pages_filter_and_sort(self, farmer, other_farmer):
+        produce = make_produce(farmer)
+        for i in range(5):
+            checkout(f"buyer{i}", [(produce, i + 1), (make_produce(other_farmer), 1)])
+        FarmerOrder.objects.filter(farmer=farmer, subtotal=Decimal("4.00")).update(status=OrderStatus.DELIVERED)
+        client = farmer_client(farmer)
+
+        first = client.get("/api/v1/farmer/orders/", {"cursor": "", "page_size": 2})
+        second = client.get(first.data["next"])
+        ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+        assert ids == sorted(ids, reverse=True)[:4]
+        assert "cursor=" in first.data["next"]
+
+        delivered = client.get("/api/v1/farmer/orders/", {"status": OrderStatus.DELIVERED})
+        assert [row["farmer_subtotal"] for row in delivered.data["results"]] == ["4.00"]
+        assert delivered.data["count"] == 1
+
+        by_subtotal = client.get("/api/v1/farmer/orders/", {"ordering": "-subtotal"})
+        subtotals = [Decimal(row["farmer_subtotal"]) for row in by_subtotal.data["results"]]
+        assert subtotals == sorted(subtotals, reverse=True)
+        assert len(subtotals) == 5
+
+    def test_history_keeps_the_order_shape(self, farmer, other_farmer):
+        order = checkout("buyer", [(make_produce(farmer), 2), (make_produce(other_farmer), 1)])
+
+        (row,) = farmer_client(farmer).get("/api/v1/farmer/orders/").data["results"]
+
+        assert row["id"] == order.id
+        assert row["total_amount"] == "6.00"
+        assert len(row["items"]) == 2 and len(row["farmer_items"]) == 1
+        assert (row["farmer_subtotal"], row["farmer_status"]) == ("4.00", OrderStatus.PENDING)
+
+    def test_history_does_not_join_order_items(self, farmer):
+        checkout("buyer", [(make_produce(farmer), 1)])
+        client = farmer_client(farmer)
+
+        with CaptureQueriesContext(connection) as ctx:
+            client.get("/api/v1/farmer/orders/")
+
+        listing = [q["sql"] for q in ctx.captured_queries if 'FROM "orders_farmerorder"' in q["sql"]]
+        assert listing and all("orders_orderitem" not in sql and "DISTINCT" not in sql for sql in listing)
@@ -0,0 +1,153 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api import idempotency
+from api.models import IdempotencyKey
+from farmers.models import FarmerProfile, Produce
+from orders.models import Cart, CartItem, Order
+from payments.models import WalletTransaction
+from payments.services import wallet_deposit
+
+
+@pytest.fixture
+def buyer():
+    return User.objects.create_user(username="buyer", password="testpass123")
+
+
+@pytest.fixture
+def client(buyer):
+    api_client = APIClient()
+    api_client.force_authenticate(user=buyer)
+    return api_client
+
+
+@pytest.fixture
+def produce():
+    farmer_user = User.objects.create_user(username="grower")
+    farmer = FarmerProfile.objects.create(user=farmer_user, name="Grower")
+    return Produce.objects.create(
+        farmer=farmer, name="Kale", unit="bunch", price_per_unit=Decimal("1.50"), quantity_available=10
+    )
+
+
+def fill_cart(user, produce, quantity=2):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    CartItem.objects.create(cart=cart, produce=produce, quantity=quantity)
+
+
+@pytest.mark.django_db
+class TestIdempotencyKeys:
+
+    def test_checkout_replay_returns_original_order(self, client, buyer, produce):
+        fill_cart(buyer, produce)
+
+        first = client.post("/api/v1/checkout/", HTTP_IDEMPOTENCY_KEY="abc-1")
+        fill_cart(buyer, produce)  # a replay must not check out the new cart
+        second = client.post("/api/v1/checkout/", HTTP_IDEMPOTENCY_KEY="abc-1")
+
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_201_CREATED
+        assert second["Idempotent-Replayed"] == "true"
+        assert second.data["id"] == first.data["id"]
+        assert Order.objects.filter(user=buyer).count() == 1
+        assert CartItem.objects.filter(cart__user=buyer).count() == 1
+
+    def test_requests_without_key_are_not_recorded(self, client, buyer, produce):
+        fill_cart(buyer, produce)
+        client.post("/api/v1/checkout/")
+        assert not IdempotencyKey.objects.exists()
+
+    def test_key_reused_for_different_payload_is_rejected(self, client, buyer):
+        wallet_deposit(buyer, Decimal("100.00"))
+        client.post("/api/v1/payments/wallet/pay/", {"order_id": 999}, HTTP_IDEMPOTENCY_KEY="k")
+        response = client.post("/api/v1/payments/wallet/pay/", {"order_id": 1000}, HTTP_IDEMPOTENCY_KEY="k")
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_wallet_payment_replay_charges_once(self, client, buyer):
+        wallet_deposit(buyer, Decimal("100.00"))
+        order = Order.objects.create(user=buyer, total_amount=Decimal("40.00"))
+
+        for _ in range(3):
+            response = client.post(
+                "/api/v1/payments/wallet/pay/", {"order_id": order.id}, HTTP_IDEMPOTENCY_KEY="pay-1"
+            )
+            assert response.status_code == status.HTTP_200_OK
+
+        assert WalletTransaction.objects.filter(wallet__user=buyer, type="PAYMENT").count() == 1
+        buyer.wallet.refresh_from_db()
+        assert buyer.wallet.balance == Decimal("60.00")
+
+    def test_concurrent_request_waits_for_first_result(self, client, buyer, monkeypatch):
+        order = Order.objects.create(user=buyer, total_amount=Decimal("0.00"))
+        body = b'{"order_id": %d}' % order.id
+        in_flight = IdempotencyKey.objects.create(
+            user=buyer,
+            key="slow",
+            method="POST",
+            path="/api/v1/payments/wallet/pay/",
+            request_hash="",
+        )
+        polls = []
+
+        def finish_first_request(_seconds):
+            # The first request completes while the retry is polling.
+            polls.append(1)
+            IdempotencyKey.objects.filter(pk=in_flight.pk).update(
+                status_code=200, response_body={"id": 42}, completed_at=in_flight.created_at
+            )
+
+        monkeypatch.setattr(idempotency.time, "sleep", finish_first_request)
+        monkeypatch.setattr(idempotency, "_request_hash", lambda request: "")
+
+        response = client.post(
+            "/api/v1/payments/wallet/pay/", body, content_type="application/json", HTTP_IDEMPOTENCY_KEY="slow"
+        )
+
+        assert polls == [1]
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {"id": 42}
+        assert not WalletTransaction.objects.exists()
+
+    def test_client_errors_are_replayed(self, client, buyer, produce):
+        response = client.post("/api/v1/checkout/", HTTP_IDEMPOTENCY_KEY="empty")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        fill_cart(buyer, produce)
+        replay = client.post("/api/v1/checkout/", HTTP_IDEMPOTENCY_KEY="empty")
+        assert replay.status_code == status.HTTP_400_BAD_REQUEST
+        assert replay["Idempotent-Replayed"] == "true"
+
+    def test_raised_client_errors_are_replayed(self, client, buyer):
+        buyer.is_staff = True
+        buyer.save()
+        body = {"order_ids": [], "status": "CONFIRMED"}
+
+        first = client.post("/api/v1/orders/bulk-status/", body, format="json", HTTP_IDEMPOTENCY_KEY="bad")
+        replay = client.post("/api/v1/orders/bulk-status/", body, format="json", HTTP_IDEMPOTENCY_KEY="bad")
+
+        assert first.status_code == replay.status_code == status.HTTP_400_BAD_REQUEST
+        assert replay["Idempotent-Replayed"] == "true"
+        assert replay.data["order_ids"] == first.data["order_ids"]
+        assert IdempotencyKey.objects.get(key="bad").status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_in_flight_key_gets_409_with_retry_after(self, client, buyer, settings, monkeypatch):
+        settings.IDEMPOTENCY_WAIT_TIMEOUT = 0
+        monkeypatch.setattr(idempotency, "_request_hash", lambda request: "")
+        IdempotencyKey.objects.create(
+            user=buyer, key="busy", method="POST", path="/api/v1/payments/wallet/pay/", request_hash="",
+        )
+
+        response = client.post("/api/v1/payments/wallet/pay/", {"order_id": 1}, HTTP_IDEMPOTENCY_KEY="busy")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response["Retry-After"] == "1"
+
+    def test_server_error_releases_key(self, client, buyer):
+        order = Order.objects.create(user=buyer, total_amount=Decimal("40.00"))
+        response = client.post("/api/v1/payments/wallet/pay/", {"order_id": order.id}, HTTP_IDEMPOTENCY_KEY="broke")
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR  # insufficient balance
+        assert not IdempotencyKey.objects.filter(key="broke").exists()
@@ -0,0 +1,225 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from business import invoices, tasks
+from business.invoices import render_invoices
+from business.models import BusinessInvoice, BusinessProfile, InvoiceStatus
+from farmers.models import FarmerProfile, Produce
+from farmfresh.celery import app
+from farmfresh.streaming import UnsatisfiableRange, parse_range
+from orders.models import Order, OrderItem
+from userprofiles.models import UserType
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def business(produce):
+    user = User.objects.create_user(username="bistro")
+    user.profile.role = UserType.BUSINESS
+    user.profile.save()
+    return BusinessProfile.objects.create(user=user, name="Bistro", company="Bistro Ltd")
+
+
+@pytest.fixture
+def render_inline(monkeypatch):
+    monkeypatch.setattr(tasks.render_invoice_pdfs_task, "delay", tasks.render_invoice_pdfs_task)
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Grower")
+    return Produce.objects.create(farmer=farmer, name="Kale", unit="kg", price_per_unit=Decimal("3.00"))
+
+
+def make_invoice(business, status=InvoiceStatus.DRAFT, lines=3):
+    produce = Produce.objects.get()
+    order = Order.objects.create(user=business.user, total_amount=Decimal("6.00") * lines)
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order, produce=produce, product_name=f"Item {i}", unit="kg", price_per_unit=Decimal("3.00"),
+            quantity=2, subtotal=Decimal("6.00"),
+        )
+        for i in range(lines)
+    ])
+    return BusinessInvoice.objects.create(
+        business=business, order=order, due_date=date(2030, 1, 31), status=status, total_amount=order.total_amount,
+    )
+
+
+@pytest.mark.django_db
+class TestInvoiceRendering:
+
+    def test_unchanged_invoices_are_skipped(self, business, media_root):
+        invoice = make_invoice(business)
+
+        assert render_invoices(BusinessInvoice.objects.all()) == {"rendered": 1, "skipped": 0, "failed": 0}
+        invoice.refresh_from_db()
+        pdf = (media_root / invoice.pdf_path).read_bytes()
+        assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+        assert b"Bistro Ltd" in pdf
+
+        assert render_invoices(BusinessInvoice.objects.all()) == {"rendered": 0, "skipped": 1, "failed": 0}
+
+        BusinessInvoice.objects.filter(pk=invoice.pk).update(status=InvoiceStatus.PAID)
+        render_invoices(BusinessInvoice.objects.all())
+        first_path = invoice.pdf_path
+        invoice.refresh_from_db()
+        assert invoice.pdf_path != first_path
+
+    def test_names_outside_latin_1_are_transliterated(self, business, media_root):
+        business.company = "Ọlá Ṣẹ́gun Foods – Ìbàdàn"
+        business.save()
+        invoice = make_invoice(business)
+
+        render_invoices(BusinessInvoice.objects.all())
+
+        invoice.refresh_from_db()
+        pdf = (media_root / invoice.pdf_path).read_bytes()
+        assert "Olá Segun Foods – Ìbàdàn".encode("cp1252") in pdf
+        assert b"?" not in pdf.split(b"stream", 1)[1]
+
+    def test_text_without_a_latin_form_is_not_rendered(self, business, caplog):
+        business.company = "北京农场"
+        business.save()
+        invoice = make_invoice(business)
+
+        assert render_invoices(BusinessInvoice.objects.all()) == {"rendered": 0, "skipped": 0, "failed": 1}
+
+        invoice.refresh_from_db()
+        assert invoice.pdf_path == ""
+        assert f"invoice {invoice.pk}" in caplog.text and "U+5317" in caplog.text
+
+    def test_process_pool_renders_the_same_bytes(self, business, media_root):
+        invoices = [make_invoice(business, lines=n) for n in (1, 60, 2)]
+
+        assert render_invoices(BusinessInvoice.objects.all(), workers=2)["rendered"] == 3
+        pooled = {i.pk: (media_root / i.pdf_path).read_bytes() for i in BusinessInvoice.objects.all()}
+        BusinessInvoice.objects.update(pdf_path="")
+        for path in media_root.rglob("*.pdf"):
+            path.unlink()
+        render_invoices(BusinessInvoice.objects.all(), workers=1)
+
+        for invoice in invoices:
+            invoice.refresh_from_db()
+            assert (media_root / invoice.pdf_path).read_bytes() == pooled[invoice.pk]
+        assert b"/Count 2" in pooled[invoices[1].pk]  # long invoices span pages
+
+    def test_daemonic_workers_render_inline_and_say_so(self, business, monkeypatch, caplog):
+        make_invoice(business)
+        monkeypatch.setattr(invoices.multiprocessing, "current_process", lambda: type("Child", (), {"daemon": True}))
+
+        assert render_invoices(BusinessInvoice.objects.all(), workers=2)["rendered"] == 1
+        assert "--pool=solo" in caplog.text
+
+    def test_render_tasks_use_the_invoices_queue(self):
+        for task in (tasks.render_invoice_pdfs_task, tasks.render_outstanding_invoices_task):
+            assert app.amqp.router.route({}, task.name)["queue"].name == "invoices"
+
+    def test_issuing_an_invoice_renders_it_after_commit(self, business, render_inline,
+                                                         django_capture_on_commit_callbacks):
+        invoice = make_invoice(business)
+        assert invoice.pdf_path == ""
+
+        with django_capture_on_commit_callbacks(execute=True):
+            invoice.status = InvoiceStatus.ISSUED
+            invoice.save()
+
+        invoice.refresh_from_db()
+        assert invoice.pdf_path.endswith(".pdf")
+
+
+@pytest.mark.django_db
+class TestInvoiceDownload:
+
+    @pytest.fixture
+    def client(self, business):
+        client = APIClient()
+        client.force_authenticate(user=business.user)
+        return client
+
+    @pytest.fixture
+    def invoice(self, business):
+        invoice = make_invoice(business, status=InvoiceStatus.ISSUED)
+        render_invoices(BusinessInvoice.objects.filter(pk=invoice.pk))
+        invoice.refresh_from_db()
+        return invoice
+
+    def url(self, invoice):
+        return f"/api/v1/business/invoices/{invoice.pk}/pdf/"
+
+    def test_streams_whole_file_with_etag(self, client, invoice, media_root):
+        response = client.get(self.url(invoice))
+
+        assert response.status_code == 200
+        assert response.streaming
+        body = b"".join(response.streaming_content)
+        assert body == (media_root / invoice.pdf_path).read_bytes()
+        assert response["Content-Length"] == str(len(body))
+        assert response["Accept-Ranges"] == "bytes"
+        assert response["Content-Type"] == "application/pdf"
+
+        again = client.get(self.url(invoice), HTTP_IF_NONE_MATCH=response["ETag"])
+        assert again.status_code == 304
+
+    def test_range_requests(self, client, invoice, media_root):
+        pdf = (media_root / invoice.pdf_path).read_bytes()
+
+        head = client.get(self.url(invoice), HTTP_RANGE="bytes=0-7")
+        assert head.status_code == 206
+        assert b"".join(head.streaming_content) == b"%PDF-1.4"
+        assert head["Content-Range"] == f"bytes 0-7/{len(pdf)}"
+
+        tail = client.get(self.url(invoice), HTTP_RANGE="bytes=-6")
+        assert b"".join(tail.streaming_content) == pdf[-6:]
+
+        stale = client.get(self.url(invoice), HTTP_RANGE="bytes=0-7", HTTP_IF_RANGE='"outdated"')
+        assert stale.status_code == 200
+
+        beyond = client.get(self.url(invoice), HTTP_RANGE=f"bytes={len(pdf)}-")
+        assert beyond.status_code == 416
+        assert beyond["Content-Range"] == f"bytes */{len(pdf)}"
+
+    def test_missing_pdf_is_queued(self, client, business, render_inline, django_capture_on_commit_callbacks):
+        invoice = make_invoice(business)
+        BusinessInvoice.objects.filter(pk=invoice.pk).update(status=InvoiceStatus.ISSUED)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.get(self.url(invoice))
+        assert response.status_code == 202
+        assert client.get(self.url(invoice)).status_code == 200
+
+    def test_drafts_and_other_businesses_get_404(self, client, business):
+        assert client.get(self.url(make_invoice(business))).status_code == 404
+
+        other = User.objects.create_user(username="other")
+        other.profile.role = UserType.BUSINESS
+        other.profile.save()
+        client.force_authenticate(user=other)
+        assert client.get(self.url(make_invoice(business, status=InvoiceStatus.ISSUED))).status_code == 404
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-9", (0, 9)),
+    ("bytes=90-", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=95-200", (95, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=9-3", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(UnsatisfiableRange):
+        parse_range(header, 100)
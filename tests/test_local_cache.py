@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from farmfresh.cache import CacheManager, CacheStats, LocalCache, local_cache, tagged_key
+from subscriptions.models import SubscriptionPlan
+
+
+@pytest.fixture(autouse=True)
+def stats(settings):
+    settings.CACHE_STATS_FLUSH_SECONDS = 0
+    CacheStats.reset()
+    yield
+    CacheStats.reset()
+
+
+def tiers(loads):
+    def load():
+        loads.append(1)
+        return f"tiers v{len(loads)}"
+    return CacheManager.get_or_set(tagged_key("tiers", ["pricing-tiers"], local=True), load, 60, local=True)
+
+
+def test_lru_is_bounded_and_entries_expire(settings):
+    settings.LOCAL_CACHE_MAX_ENTRIES = 2
+    lru = LocalCache()
+    lru.set("a", 1, 60)
+    lru.set("b", 2, 60)
+    lru.get("a")
+    lru.set("c", 3, 60)
+    assert lru.get("b") is LocalCache.MISSING  # least recently used
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+    lru.set("d", None, 0)
+    assert lru.get("d") is LocalCache.MISSING
+
+
+def test_local_tier_answers_without_the_shared_cache(settings, monkeypatch):
+    loads = []
+    assert tiers(loads) == "tiers v1"
+
+    settings.CACHE_STATS_FLUSH_SECONDS = 60
+    with monkeypatch.context() as patch:
+        patch.setattr(cache, "get", lambda *args, **kwargs: pytest.fail("shared cache read"))
+        patch.setattr(cache, "get_many", lambda *args, **kwargs: pytest.fail("shared cache read"))
+        assert tiers(loads) == "tiers v1"
+    assert CacheStats.snapshot()["tiers"]["local_hits"] == 1
+
+
+def test_bumps_from_other_workers_are_seen_after_the_version_check(settings):
+    loads = []
+    tiers(loads)
+    cache.incr("cache-tag:pricing-tiers")  # another process bumps the tag
+
+    assert tiers(loads) == "tiers v1"  # generations were read under a second ago
+
+    settings.LOCAL_CACHE_VERSION_CHECK_SECONDS = 0
+    assert tiers(loads) == "tiers v2"
+
+
+@pytest.mark.django_db
+def test_reference_endpoints_use_the_local_tier(django_capture_on_commit_callbacks):
+    SubscriptionPlan.objects.create(name="Weekly box", price=Decimal("20.00"))
+    client = APIClient()
+    client.get("/api/v1/plans/")
+    assert client.get("/api/v1/plans/")["X-Cache"] == "HIT"
+    assert len(local_cache._entries) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        SubscriptionPlan.objects.create(name="Monthly box", price=Decimal("70.00"))
+    assert len(client.get("/api/v1/plans/").data["results"]) == 2
+
+    stats = CacheStats.snapshot()["response:SubscriptionPlanListView"]
+    assert (stats["local_hits"], stats["misses"], stats["local_hit_ratio"]) == (1, 2, round(1 / 3, 4))
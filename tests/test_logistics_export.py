@@ -0,0 +1,89 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from deliveries.models import Delivery
+from farmfresh import streaming
+from orders.models import Order
+from userprofiles.models import UserType
+
+URL = "/api/v1/business/logistics/"
+
+
+@pytest.fixture
+def buyer():
+    user = User.objects.create_user(username="supermarket")
+    user.profile.role = UserType.BUSINESS
+    user.profile.save()
+    return user
+
+
+@pytest.fixture
+def client(buyer):
+    client = APIClient()
+    client.force_authenticate(user=buyer)
+    return client
+
+
+@pytest.fixture
+def history(buyer):
+    orders = []
+    for day in range(1, 6):
+        order = Order.objects.create(user=buyer, total_amount=Decimal("10.00"))
+        Order.objects.filter(pk=order.pk).update(
+            created_at=timezone.make_aware(datetime.combine(date(2026, 3, day), time(9)))
+        )
+        Delivery.objects.create(order=order, notes=f"dock {day}")
+        orders.append(order)
+    Order.objects.create(user=User.objects.create_user(username="someone-else"))
+    return orders
+
+
+def lines(response):
+    assert response["Content-Type"] == "application/x-ndjson"
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+
+@pytest.mark.django_db
+class TestLogisticsExport:
+
+    def test_json_is_unchanged_by_default(self, client, history):
+        response = client.get(URL)
+
+        assert response.status_code == 200
+        assert [row["id"] for row in response.data["orders"]] == [order.id for order in history]
+        assert len(response.data["deliveries"]) == 5
+
+    def test_ndjson_streams_rows_in_range(self, client, history):
+        response = client.get(URL, {"output": "ndjson", "start": "2026-03-02", "end": "2026-03-04"})
+
+        assert response.streaming
+        rows = lines(response)
+        assert [row["type"] for row in rows] == ["order"] * 3 + ["delivery"] * 3 + ["end"]
+        assert [row["id"] for row in rows[:3]] == [order.id for order in history[1:4]]
+        assert rows[3]["notes"] == "dock 2"
+        assert rows[-1] == {"type": "end", "counts": {"order": 3, "delivery": 3}}
+
+    def test_columns_layout_in_bounded_batches(self, client, history, monkeypatch):
+        monkeypatch.setattr(streaming, "STREAM_BATCH_ROWS", 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            rows = lines(client.get(URL, {"output": "ndjson", "layout": "columns"}))
+
+        orders = [row for row in rows if row["type"] == "order"]
+        assert [len(row["columns"]["id"]) for row in orders] == [2, 2, 1]
+        assert [pk for row in orders for pk in row["columns"]["id"]] == [order.id for order in history]
+        assert set(orders[0]["columns"]) == {"id", "status", "created_at"}
+        batches = [q["sql"] for q in ctx.captured_queries if "LIMIT 2" in q["sql"]]
+        assert len(batches) == 6  # three order batches, three delivery batches
+
+    def test_rejects_unknown_output(self, client):
+        assert client.get(URL, {"output": "xml"}).status_code == 400
+        assert client.get(URL, {"start": "2026-03-05", "end": "2026-03-01"}).status_code == 400
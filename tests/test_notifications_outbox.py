@@ -0,0 +1,110 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import transaction
+from django.utils import timezone
+
+from notifications import utils
+from notifications.models import Notification, NotificationOutbox, OutboxStatus
+from notifications.tasks import dispatch_outbox_task
+from notifications.utils import dispatch_outbox, notify_user
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="alice", email="alice@example.com")
+
+
+@pytest.fixture(autouse=True)
+def no_broker(monkeypatch):
+    kicks = []
+    monkeypatch.setattr(utils, "_kick_dispatcher", lambda: kicks.append(1))
+    return kicks
+
+
+@pytest.mark.django_db
+class TestNotificationOutbox:
+
+    def test_notify_user_queues_instead_of_sending(self, user, no_broker, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            notification = notify_user(user, "Hello", "World")
+
+        row = NotificationOutbox.objects.get(notification=notification)
+        assert row.status == OutboxStatus.PENDING
+        assert row.send_email is True
+        assert mail.outbox == []
+        assert no_broker == [1]
+
+    def test_rolled_back_transaction_leaves_nothing_to_send(self, user):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                notify_user(user, "Hello", "World")
+                raise RuntimeError("checkout failed")
+
+        assert not Notification.objects.exists()
+        assert not NotificationOutbox.objects.exists()
+
+    def test_dispatch_sends_batch_and_marks_sent(self, user):
+        other = User.objects.create_user(username="bob", email="bob@example.com")
+        for recipient in (user, other, user):
+            notify_user(recipient, "Order update", "Shipped")
+
+        assert dispatch_outbox_task() == 3
+
+        assert len(mail.outbox) == 3
+        assert sorted(m.to[0] for m in mail.outbox) == ["alice@example.com", "alice@example.com", "bob@example.com"]
+        assert set(NotificationOutbox.objects.values_list("status", flat=True)) == {OutboxStatus.SENT}
+        assert dispatch_outbox() == 0
+
+    def test_users_without_email_skip_the_mail(self):
+        no_email = User.objects.create_user(username="noemail")
+        notify_user(no_email, "Hi", "There", sms=False)
+        assert not NotificationOutbox.objects.exists()
+
+    def test_failures_are_retried_with_backoff_then_marked_failed(self, user, monkeypatch):
+        notify_user(user, "Hello", "World")
+
+        def broken(row, mail_connection, sms_client):
+            raise ConnectionError("smtp down")
+
+        monkeypatch.setattr(utils, "_deliver", broken)
+        delays = []
+        for _ in range(utils.OUTBOX_MAX_ATTEMPTS):
+            assert dispatch_outbox() == 1
+            assert dispatch_outbox() == 0  # not due yet
+            row = NotificationOutbox.objects.get()
+            if row.next_attempt_at:
+                delays.append(row.next_attempt_at - timezone.now())
+                NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+
+        row = NotificationOutbox.objects.get()
+        assert row.status == OutboxStatus.FAILED
+        assert row.attempts == utils.OUTBOX_MAX_ATTEMPTS
+        assert row.last_error == "smtp down"
+        assert len(delays) == utils.OUTBOX_MAX_ATTEMPTS - 1
+        assert all(later > earlier for earlier, later in zip(delays, delays[1:]))
+        assert dispatch_outbox() == 0
+
+    def test_retry_only_resends_the_failed_channel(self, user, monkeypatch):
+        notify_user(user, "Hello", "World")
+        texts = []
+
+        def flaky_sms(client, phone_number, body):
+            texts.append(body)
+            if len(texts) == 1:
+                raise ConnectionError("sms down")
+
+        monkeypatch.setattr(utils, "_send_sms", flaky_sms)
+        assert dispatch_outbox() == 1
+        row = NotificationOutbox.objects.get()
+        assert (row.status, row.last_error) == (OutboxStatus.PENDING, "sms down")
+        assert row.email_sent_at is not None and row.sms_sent_at is None
+
+        NotificationOutbox.objects.update(next_attempt_at=timezone.now())
+        assert dispatch_outbox() == 1
+
+        row = NotificationOutbox.objects.get()
+        assert row.status == OutboxStatus.SENT
+        assert row.sms_sent_at is not None
+        assert len(mail.outbox) == 1
+        assert len(texts) == 2
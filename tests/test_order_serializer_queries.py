@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from farmers.models import FarmerProfile, Produce
+from orders.models import Order, OrderItem
+from orders.services import record_farmer_orders
+
+
+@pytest.fixture
+def farmer():
+    user = User.objects.create_user(username="grower")
+    return FarmerProfile.objects.create(user=user, name="Grower")
+
+
+@pytest.fixture
+def other_farmer():
+    user = User.objects.create_user(username="neighbour")
+    return FarmerProfile.objects.create(user=user, name="Neighbour")
+
+
+def make_orders(user, count, farmers):
+    produce = [
+        Produce.objects.create(farmer=f, name=f"Produce {f.pk}", unit="kg", price_per_unit=Decimal("2.00"))
+        for f in farmers
+    ]
+    for _ in range(count):
+        order = Order.objects.create(user=user, total_amount=Decimal("4.00"))
+        items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, produce=p, product_name=p.name, unit="kg",
+                      price_per_unit=Decimal("2.00"), quantity=1, subtotal=Decimal("2.00"))
+            for p in produce
+        ])
+        record_farmer_orders(order, items)
+
+
+def count_queries(user, url):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    client.get(url)  # warm per-process caches so only the view's own queries are counted
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries), response.data
+
+
+@pytest.mark.django_db
+class TestOrderSerializerQueries:
+
+    def test_farmer_history_query_count_is_constant(self, farmer, other_farmer):
+        make_orders(User.objects.create_user(username="buyer"), 2, [farmer, other_farmer])
+        small, _ = count_queries(farmer.user, "/api/v1/farmer/orders/")
+
+        make_orders(User.objects.create_user(username="buyer2"), 10, [farmer, other_farmer])
+        large, data = count_queries(farmer.user, "/api/v1/farmer/orders/")
+
+        assert large == small
+        assert data["count"] == 12
+        for order in data["results"]:
+            assert len(order["items"]) == 2
+            assert len(order["farmer_items"]) == 1
+
+    def test_farmer_items_only_contain_requesting_farmers_produce(self, farmer, other_farmer):
+        make_orders(User.objects.create_user(username="buyer"), 1, [farmer, other_farmer])
+        _, data = count_queries(farmer.user, "/api/v1/farmer/orders/")
+
+        (item,) = data["results"][0]["farmer_items"]
+        assert Produce.objects.get(pk=item["produce"]).farmer == farmer
+
+    def test_consumer_order_list_query_count_is_constant(self, farmer):
+        buyer = User.objects.create_user(username="buyer")
+        make_orders(buyer, 2, [farmer])
+        small, _ = count_queries(buyer, "/api/v1/orders/")
+
+        make_orders(buyer, 10, [farmer])
+        large, data = count_queries(buyer, "/api/v1/orders/")
+
+        assert large == small
+        assert all(order["farmer_items"] == [] for order in data["results"])
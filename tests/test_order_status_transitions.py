@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from audit.models import AuditLog
+from farmers.models import FarmerEarnings, FarmerProfile, Produce
+from notifications.models import Notification
+from orders.models import Cart, CartItem, FarmerOrder, Order, OrderStatus
+from orders.services import OrderTransitionError, checkout_cart, transition_orders
+
+URL = "/api/v1/orders/bulk-status/"
+
+
+@pytest.fixture
+def farmers():
+    return [
+        FarmerProfile.objects.create(user=User.objects.create_user(username=f"grower{i}"), name=f"Grower {i}")
+        for i in range(2)
+    ]
+
+
+@pytest.fixture
+def staff_client():
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username="staff", is_staff=True))
+    return client
+
+
+def place_orders(farmers, count):
+    produce = [
+        Produce.objects.create(
+            farmer=farmer, name=f"Produce {farmer.pk}", unit="kg",
+            price_per_unit=Decimal("2.00"), quantity_available=1000,
+        )
+        for farmer in farmers
+    ]
+    orders = []
+    for i in range(count):
+        buyer = User.objects.create_user(username=f"buyer{Order.objects.count()}", email=f"b{i}@example.com")
+        cart = Cart.objects.create(user=buyer)
+        for p in produce:
+            CartItem.objects.create(cart=cart, produce=p, quantity=2)
+        orders.append(checkout_cart(buyer))
+    return orders
+
+
+@pytest.mark.django_db
+class TestBulkOrderTransitions:
+
+    def test_confirm_updates_orders_earnings_and_totals(self, farmers, staff_client):
+        orders = place_orders(farmers, 3)
+        Notification.objects.all().delete()
+
+        response = staff_client.post(
+            URL, {"order_ids": [o.id for o in orders], "status": OrderStatus.CONFIRMED}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["updated"] == 3
+        assert set(Order.objects.values_list("status", flat=True)) == {OrderStatus.CONFIRMED}
+        assert set(FarmerOrder.objects.values_list("status", flat=True)) == {OrderStatus.CONFIRMED}
+        assert set(FarmerEarnings.objects.values_list("status", flat=True)) == {"CONFIRMED"}
+        for farmer in farmers:
+            farmer.refresh_from_db()
+            assert farmer.total_earnings == Decimal("12.00")
+            assert farmer.total_orders == 3
+        for produce in Produce.objects.all():
+            assert produce.total_sold == 6
+            assert produce.total_revenue == Decimal("12.00")
+        assert Notification.objects.count() == 3
+        assert AuditLog.objects.filter(action="order.status.changed").count() == 3
+
+    def test_query_count_does_not_grow_with_batch_size(self, farmers):
+        small = [o.id for o in place_orders(farmers, 2)]
+        large = [o.id for o in place_orders(farmers, 10)]
+
+        with CaptureQueriesContext(connection) as small_ctx:
+            transition_orders(small, OrderStatus.CONFIRMED)
+        with CaptureQueriesContext(connection) as large_ctx:
+            transition_orders(large, OrderStatus.CONFIRMED)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            assert len(large_ctx.captured_queries) == len(small_ctx.captured_queries)
+
+    def test_invalid_transition_rejects_whole_batch(self, farmers, staff_client):
+        pending, delivered = place_orders(farmers, 2)
+        Order.objects.filter(pk=delivered.pk).update(status=OrderStatus.DELIVERED)
+
+        response = staff_client.post(
+            URL, {"order_ids": [pending.id, delivered.id, 999999], "status": OrderStatus.CONFIRMED}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert {e["order_id"] for e in response.data["errors"]} == {delivered.id, 999999}
+        pending.refresh_from_db()
+        assert pending.status == OrderStatus.PENDING
+        assert not FarmerEarnings.objects.filter(status="CONFIRMED").exists()
+
+    def test_states_must_be_followed_in_order(self, farmers):
+        (order,) = place_orders(farmers, 1)
+
+        with pytest.raises(OrderTransitionError):
+            transition_orders([order.id], OrderStatus.DELIVERED)
+        transition_orders([order.id], OrderStatus.CONFIRMED)
+        transition_orders([order.id], OrderStatus.DELIVERED)
+
+        order.refresh_from_db()
+        assert order.status == OrderStatus.DELIVERED
+        farmers[0].refresh_from_db()
+        assert farmers[0].total_orders == 1
+
+    def test_requires_staff(self, farmers):
+        (order,) = place_orders(farmers, 1)
+        client = APIClient()
+        client.force_authenticate(user=order.user)
+
+        response = client.post(URL, {"order_ids": [order.id], "status": OrderStatus.CONFIRMED}, format="json")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+
+from consumers import tasks as consumer_tasks
+from farmers import availability, tasks
+from farmers.models import FarmerProfile, Produce
+from notifications.models import Notification, NotificationOutbox
+from orders.models import Order, OrderItem
+
+
+@pytest.fixture
+def fan_outs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks.fan_out_produce_available_task, "delay", calls.append)
+    monkeypatch.setattr(consumer_tasks.sync_wishlist_stock_task, "delay", lambda produce_ids: None)
+    return calls
+
+
+@pytest.fixture
+def produce():
+    farmer = FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Hill Farm")
+    return Produce.objects.create(
+        farmer=farmer, name="Asparagus", unit="bunch", price_per_unit=Decimal("3.00"), available=False,
+    )
+
+
+def buy(produce, username):
+    user, _ = User.objects.get_or_create(username=username, defaults={"email": f"{username}@example.com"})
+    order = Order.objects.create(user=user)
+    OrderItem.objects.create(
+        order=order, produce=produce, product_name=produce.name, unit=produce.unit,
+        price_per_unit=produce.price_per_unit, quantity=1, subtotal=produce.price_per_unit,
+    )
+
+
+@pytest.mark.django_db
+class TestAvailabilityTransitions:
+
+    def test_only_the_transition_to_available_is_announced(self, produce, fan_outs, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            produce.quantity_available = 10
+            produce.save(update_fields=["quantity_available"])
+            produce.update_sales_stats(1, Decimal("3.00"))
+        assert fan_outs == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            produce.available = True
+            produce.save()
+            produce.save()  # still available: no second announcement
+        assert fan_outs == [produce.pk]
+
+    def test_flapping_produce_is_announced_once_per_cooldown(self, produce, fan_outs,
+                                                             django_capture_on_commit_callbacks):
+        for available in (True, False, True):
+            with django_capture_on_commit_callbacks(execute=True):
+                produce.available = available
+                produce.save(update_fields=["available"])
+
+        assert fan_outs == [produce.pk]
+
+
+@pytest.mark.django_db
+def test_fan_out_notifies_buyers_in_bulk_chunks(produce, monkeypatch, django_assert_max_num_queries):
+    for username in ("ann", "bob", "cat", "ann"):
+        buy(produce, username)
+    buy(Produce.objects.create(farmer=produce.farmer, name="Leeks", unit="kg", price_per_unit=Decimal("2")), "dan")
+    produce.available = True
+    produce.save(update_fields=["available"])
+    Notification.objects.all().delete()
+
+    chunks = []
+    monkeypatch.setattr(availability, "FAN_OUT_CHUNK_SIZE", 2)
+    monkeypatch.setattr(tasks.notify_produce_buyers_task, "delay", lambda *args: chunks.append(args))
+    assert tasks.fan_out_produce_available_task(produce.pk) == 2
+
+    for produce_id, user_ids in chunks:
+        with django_assert_max_num_queries(5):
+            tasks.notify_produce_buyers_task(produce_id, user_ids)
+
+    buyers = Notification.objects.filter(title="Fresh harvest available")
+    assert sorted(buyers.values_list("user__username", flat=True)) == ["ann", "bob", "cat"]
+    assert Notification.objects.filter(title="Produce available", user=produce.farmer.user).count() == 1
+    assert NotificationOutbox.objects.filter(notification__in=buyers, send_email=True).count() == 3
@@ -0,0 +1,147 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from farmers.models import FarmerProfile, Produce, ProduceSearchDocument
+from farmers.search import search_produce
+
+URL = "/api/v1/farmers/public/produce/"
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = settings.RESPONSE_CACHE_STALE_SECONDS = 0
+
+
+@pytest.fixture
+def farmer():
+    return FarmerProfile.objects.create(
+        user=User.objects.create_user(username="hillside"), name="Hillside Farm", crops="garlic, shallots",
+    )
+
+
+@pytest.fixture
+def other_farmer():
+    return FarmerProfile.objects.create(
+        user=User.objects.create_user(username="valley"), name="Valley Farm", crops="tulips",
+    )
+
+
+def make(farmer, name, variety="", description="", **fields):
+    return Produce.objects.create(
+        farmer=farmer, name=name, variety=variety, description=description, unit="kg",
+        price_per_unit=Decimal("1.00"), **fields,
+    )
+
+
+def search(query, **params):
+    response = APIClient().get(URL, {"search": query, **params})
+    assert response.status_code == 200
+    return [row["name"] for row in response.data["results"]]
+
+
+def crops(value):
+    response = APIClient().get(URL, {"crops": value})
+    assert response.status_code == 200
+    return [row["name"] for row in response.data["results"]]
+
+
+@pytest.mark.django_db
+class TestProduceSearch:
+
+    def test_ranks_name_matches_first(self, farmer):
+        make(farmer, "Salad mix", description="with a few cherry tomatoes")
+        make(farmer, "Cherry tomatoes", variety="Sungold")
+        make(farmer, "Plum tomatoes")
+
+        results = search("tomato")
+        assert sorted(results[:2]) == ["Cherry tomatoes", "Plum tomatoes"]
+        assert results[2] == "Salad mix"
+        assert search("cherry tom") == ["Cherry tomatoes", "Salad mix"]
+        assert search("sungold cherry") == ["Cherry tomatoes"]
+
+    def test_matches_farmer_fields_and_honours_filters(self, farmer):
+        make(farmer, "Bulbs")
+        make(farmer, "Cloves", available=False)
+
+        assert search("hillside") == ["Bulbs"]
+        assert search("shallots") == ["Bulbs"]
+        assert search("bulbs", ordering="-price_per_unit") == ["Bulbs"]
+
+    def test_documents_follow_produce_and_farmer_saves(self, farmer):
+        produce = make(farmer, "Kale")
+        assert search("kale") == ["Kale"]
+
+        produce.name = "Chard"
+        produce.save()
+        assert search("kale") == []
+        assert search("chard") == ["Chard"]
+
+        farmer.name = "Valley Farm"
+        farmer.save()
+        assert search("valley") == ["Chard"]
+
+        produce.delete()
+        assert not ProduceSearchDocument.objects.exists()
+        assert search("chard") == []
+
+    def test_rebuild_indexes_bulk_created_produce(self, farmer):
+        Produce.objects.bulk_create([
+            Produce(farmer=farmer, name=f"Squash {i}", unit="kg", price_per_unit=Decimal("1.00")) for i in range(3)
+        ])
+        assert search("squash") == []
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        cache.clear()  # the page count of the first search is cached
+
+        assert len(search("squash")) == 3
+
+    def test_query_api_composes_with_querysets(self, farmer):
+        make(farmer, "Red onions")
+        make(farmer, "Red peppers", quantity_available=5)
+
+        results = search_produce(Produce.objects.filter(quantity_available__gt=0), "red")
+
+        assert [p.name for p in results] == ["Red peppers"]
+        assert results[0].search_rank > 0
+        assert search_produce(Produce.objects.all(), "  !! ").count() == 2
+
+    def test_substring_fallback_without_a_fulltext_index(self, farmer, monkeypatch):
+        monkeypatch.setattr("farmers.search._sqlite_fts", lambda: False)
+        make(farmer, "Cherry tomatoes")
+        make(farmer, "Salad mix", description="tomatoes")
+
+        assert search("tomat") == ["Cherry tomatoes", "Salad mix"]
+
+    def test_crops_matches_name_variety_or_farmer_crops(self, farmer, other_farmer):
+        make(farmer, "Bulbs")
+        make(other_farmer, "Garlic scapes")
+        make(other_farmer, "Braid", variety="Purple garlic")
+        make(other_farmer, "Pesto", description="made with garlic")
+
+        assert sorted(crops("garlic")) == ["Braid", "Bulbs", "Garlic scapes"]
+        assert crops("shallots") == ["Bulbs"]
+        assert crops("purple garl") == ["Braid"]
+
+    def test_crops_with_search(self, farmer, other_farmer):
+        make(farmer, "Bulbs")
+        make(farmer, "Seed bulbs", variety="Elephant")
+        make(other_farmer, "Tulip bulbs")
+
+        assert sorted(search("bulbs", crops="garlic")) == ["Bulbs", "Seed bulbs"]
+        assert search("elephant", crops="garlic") == ["Seed bulbs"]
+        assert search("tulip", crops="garlic") == []
+
+    def test_crops_fallback_without_a_fulltext_index(self, farmer, other_farmer, monkeypatch):
+        monkeypatch.setattr("farmers.search._sqlite_fts", lambda: False)
+        make(farmer, "Bulbs")
+        make(other_farmer, "Garlic scapes")
+        make(other_farmer, "Pesto", description="made with garlic")
+
+        assert sorted(crops("garlic")) == ["Bulbs", "Garlic scapes"]
+        assert search("bulbs", crops="garl") == ["Bulbs"]
@@ -0,0 +1,91 @@
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from consumers.models import ConsumerProfile, ConsumerReview, ProduceRatingSummary
+from farmers.models import FarmerProfile, Produce
+
+TOTALS = ["produce_id", "review_count", "rating_sum", "stars_1", "stars_2", "stars_3", "stars_4", "stars_5"]
+
+
+@pytest.fixture
+def farmer():
+    return FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Hill Farm")
+
+
+def make_produce(farmer, name, **fields):
+    return Produce.objects.create(
+        farmer=farmer, name=name, unit="kg", price_per_unit=Decimal("2.00"), quantity_available=5, **fields
+    )
+
+
+def review(produce, username, rating):
+    user, _ = User.objects.get_or_create(username=username)
+    consumer, _ = ConsumerProfile.objects.get_or_create(user=user)
+    return ConsumerReview.objects.create(consumer=consumer, produce=produce, rating=rating, review="Lovely and fresh")
+
+
+def summary_of(produce):
+    return APIClient().get(f"/api/v1/consumers/reviews/summary/{produce.pk}/")
+
+
+@pytest.mark.django_db
+class TestRatingSummaries:
+
+    def test_reviews_keep_the_summary_current(self, farmer):
+        kale, beets = make_produce(farmer, "Kale"), make_produce(farmer, "Beets")
+        ann = review(kale, "ann", 5)
+        review(kale, "bob", 4)
+        cat = review(kale, "cat", 5)
+
+        ann.rating = 2
+        ann.save()
+        cat.review = "Still lovely"
+        cat.save(update_fields=["review"])
+        review(kale, "dan", 1).delete()
+        moved = review(beets, "eve", 3)
+        moved.produce = kale
+        moved.save()
+
+        summary = ProduceRatingSummary.objects.get(produce=kale)
+        assert (summary.review_count, summary.rating_sum, summary.average_rating) == (4, 14, 3.5)
+        assert summary.histogram == {"1": 0, "2": 1, "3": 1, "4": 1, "5": 1}
+        assert ProduceRatingSummary.objects.get(produce=beets).review_count == 0
+
+        counted = list(ProduceRatingSummary.objects.filter(review_count__gt=0).values_list(*TOTALS))
+        call_command("rebuild_rating_summaries", stdout=StringIO())
+        assert list(ProduceRatingSummary.objects.values_list(*TOTALS)) == counted
+
+    def test_summary_endpoint_reads_one_row(self, farmer, django_assert_num_queries):
+        kale = make_produce(farmer, "Kale")
+        review(kale, "ann", 5)
+        review(kale, "bob", 2)
+
+        with django_assert_num_queries(1):
+            response = summary_of(kale)
+        assert response.status_code == 200
+        assert (response.data["review_count"], response.data["average_rating"]) == (2, 3.5)
+        assert response.data["histogram"]["5"] == 1
+
+        unrated = summary_of(make_produce(farmer, "Leeks"))
+        assert (unrated.data["review_count"], unrated.data["average_rating"]) == (0, 0.0)
+        assert APIClient().get("/api/v1/consumers/reviews/summary/999999/").status_code == 404
+
+    def test_recommendations_rank_by_stored_rating(self, farmer):
+        for name, ratings in (("Kale", [3]), ("Beets", [5, 4]), ("Leeks", [])):
+            produce = make_produce(farmer, name)
+            for index, rating in enumerate(ratings):
+                review(produce, f"buyer{index}", rating)
+        staff = User.objects.create_user(username="staff", is_staff=True)
+        ConsumerProfile.objects.get_or_create(user=staff)
+        client = APIClient()
+        client.force_authenticate(user=staff)
+
+        response = client.get("/api/v1/consumers/recommendations/")
+
+        assert response.status_code == 200
+        assert [row["name"] for row in response.data["recommendations"]] == ["Beets", "Kale", "Leeks"]
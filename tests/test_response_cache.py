@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from farmfresh.cache import cache_view
+from subscriptions.models import SubscriptionPlan
+
+PLANS_URL = "/api/v1/plans/"
+factory = APIRequestFactory()
+
+
+@pytest.fixture
+def plan():
+    return SubscriptionPlan.objects.create(name="Weekly box", price=Decimal("20.00"))
+
+
+@pytest.mark.django_db
+class TestCachedViews:
+
+    def test_second_request_is_served_from_rendered_bytes(self, plan, django_assert_num_queries):
+        client = APIClient()
+        first = client.get(PLANS_URL, {"page": 1, "page_size": 10})
+        assert first["X-Cache"] == "MISS"
+
+        with django_assert_num_queries(0):
+            again = client.get(PLANS_URL, {"page_size": 10, "page": 1, "empty": ""})
+        assert again["X-Cache"] == "HIT"
+        assert again.content == first.content
+        assert again["ETag"] == first["ETag"]
+        assert again.data == first.data
+
+        assert client.get(PLANS_URL, {"page": 1, "page_size": 10},
+                          HTTP_IF_NONE_MATCH=first["ETag"]).status_code == 304
+
+    def test_accept_header_is_part_of_the_key(self, plan):
+        client = APIClient()
+        client.get(PLANS_URL)
+        browsable = client.get(PLANS_URL, HTTP_ACCEPT="text/html")
+        assert browsable["Content-Type"].startswith("text/html")
+        assert "X-Cache" not in browsable  # the browsable API is never cached
+
+    def test_model_changes_invalidate_after_commit(self, plan, django_capture_on_commit_callbacks):
+        client = APIClient()
+        client.get(PLANS_URL)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            SubscriptionPlan.objects.create(name="Monthly box", price=Decimal("70.00"))
+
+        response = client.get(PLANS_URL)
+        assert response["X-Cache"] == "MISS"
+        assert len(response.data["results"]) == 2
+
+    def test_catalog_and_delivery_windows_are_cached(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username="shopper"))
+        for url in ("/api/v1/inventory/categories/", "/api/v1/inventory/products/",
+                    "/api/v1/delivery-windows/", "/api/v1/mixed-boxes/"):
+            client.get(url)
+            assert client.get(url)["X-Cache"] == "HIT"
+
+
+@pytest.mark.django_db
+def test_user_scope_keeps_users_apart():
+    @api_view(["GET"])
+    @cache_view(scope="user")
+    def whoami(request):
+        return Response({"user": request.user.username})
+
+    names = []
+    for username in ("ann", "bob", "ann"):
+        request = factory.get("/whoami/")
+        force_authenticate(request, user=User.objects.get_or_create(username=username)[0])
+        names.append(whoami(request).data["user"])
+
+    assert names == ["ann", "bob", "ann"]
+
+
+def test_stale_entries_are_served_while_one_request_revalidates():
+    state = {"calls": 0, "concurrent": None}
+
+    @api_view(["GET"])
+    @permission_classes([AllowAny])
+    @cache_view(timeout=0, stale_timeout=60, scope="public")
+    def counter(request):
+        state["calls"] += 1
+        if state["calls"] == 2:
+            # Another caller arrives while this one holds the refresh lock.
+            state["concurrent"] = counter(factory.get("/counter/"))
+        return Response({"calls": state["calls"]})
+
+    assert counter(factory.get("/counter/"))["X-Cache"] == "MISS"
+    refreshed = counter(factory.get("/counter/"))
+
+    assert (refreshed["X-Cache"], refreshed.data) == ("MISS", {"calls": 2})
+    assert (state["concurrent"]["X-Cache"], state["concurrent"].data) == ("STALE", {"calls": 1})
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from consumers.models import ConsumerProfile
+from farmers.models import FarmerEarnings, FarmerProfile, Produce
+from farmfresh.aggregation import bucket_starts, time_buckets
+from orders.models import Order
+from userprofiles.models import UserType
+
+UTC = ZoneInfo("UTC")
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def place(user, amount, when):
+    order = Order.objects.create(user=user, total_amount=Decimal(amount))
+    Order.objects.filter(pk=order.pk).update(created_at=when)
+    return order
+
+
+def spread_orders(user, months):
+    """One order in the current month and one in each of the ``months - 1`` before it."""
+    now = timezone.now()
+    for index, start in enumerate(bucket_starts("month", months)):
+        place(user, "10.00", now if index == 0 else start + timedelta(days=1))
+
+
+def aggregate_queries(context):
+    return [query["sql"] for query in context.captured_queries if "GROUP BY" in query["sql"]]
+
+
+class TestBucketStarts:
+
+    def test_calendar_months_cross_the_year(self):
+        now = datetime(2026, 2, 15, 9, tzinfo=UTC)
+        assert [start.date().isoformat() for start in bucket_starts("month", 3, now, UTC)] == [
+            "2026-02-01", "2026-01-01", "2025-12-01"
+        ]
+
+    def test_iso_weeks_start_on_monday(self):
+        now = datetime(2026, 1, 1, 9, tzinfo=UTC)  # a Thursday
+        assert [start.date().isoformat() for start in bucket_starts("week", 2, now, UTC)] == [
+            "2025-12-29", "2025-12-22"
+        ]
+
+    def test_starts_are_local_midnights(self):
+        now = datetime(2026, 3, 1, 3, tzinfo=UTC)  # still February in New York
+        start = bucket_starts("month", 1, now, NEW_YORK)[0]
+        assert start == datetime(2026, 2, 1, tzinfo=NEW_YORK)
+
+    def test_unknown_period(self):
+        with pytest.raises(ValueError):
+            bucket_starts("fortnight", 2)
+
+
+@pytest.mark.django_db
+class TestTimeBuckets:
+
+    def test_one_query_with_gaps_filled(self, django_assert_num_queries):
+        user = User.objects.create_user(username="ann")
+        now = datetime(2026, 5, 20, 12, tzinfo=UTC)
+        place(user, "5.00", datetime(2026, 5, 2, tzinfo=UTC))
+        place(user, "7.50", datetime(2026, 5, 19, tzinfo=UTC))
+        place(user, "3.00", datetime(2026, 3, 31, 23, tzinfo=UTC))
+        place(user, "9.00", datetime(2026, 1, 5, tzinfo=UTC))  # before the oldest bucket
+        place(user, "9.00", datetime(2026, 5, 21, tzinfo=UTC))  # after now
+
+        with django_assert_num_queries(1):
+            buckets = time_buckets(
+                Order.objects.filter(user=user), "month", 3, now=now, tz=UTC,
+                total=Sum("total_amount"), count=Count("id"),
+            )
+
+        assert [(b["start"].month, b["total"], b["count"]) for b in buckets] == [
+            (5, Decimal("12.50"), 2), (4, None, None), (3, Decimal("3.00"), 1)
+        ]
+
+    def test_buckets_follow_the_time_zone(self):
+        user = User.objects.create_user(username="ann")
+        place(user, "4.00", datetime(2026, 3, 1, 3, tzinfo=UTC))  # 22:00 on 28 Feb in New York
+        now = datetime(2026, 3, 10, tzinfo=UTC)
+        orders = Order.objects.filter(user=user)
+
+        local = time_buckets(orders, "month", 2, now=now, tz=NEW_YORK, count=Count("id"))
+        utc = time_buckets(orders, "month", 2, now=now, tz=UTC, count=Count("id"))
+
+        assert [b["count"] for b in local] == [None, 1]
+        assert [b["count"] for b in utc] == [1, None]
+
+
+@pytest.mark.django_db
+class TestDashboardQueries:
+
+    @pytest.fixture
+    def consumer(self):
+        user = User.objects.create_user(username="ann", is_staff=True)
+        ConsumerProfile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client, user
+
+    def test_spending_analytics_reads_twelve_months_at_once(self, consumer):
+        client, user = consumer
+        spread_orders(user, 12)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/v1/consumers/spending-analytics/")
+
+        assert response.status_code == 200
+        assert list(response.data["monthly_spending"].values()) == [10.0] * 12
+        assert [row["order_count"] for row in response.data["average_order_trend"]] == [1] * 6
+        assert response.data["total_orders"] == 12
+        # monthly series, spending by produce
+        assert len(aggregate_queries(queries)) == 2
+
+    def test_farmer_dashboard_query_count_does_not_grow_with_history(self, django_assert_max_num_queries):
+        user = User.objects.create_user(username="grower")
+        user.profile.role = UserType.FARMER
+        user.profile.save()
+        farmer = FarmerProfile.objects.create(user=user, name="Hill Farm")
+        kale = Produce.objects.create(
+            farmer=farmer, name="Kale", unit="kg", price_per_unit=Decimal("2.00"), quantity_available=5
+        )
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        def earn(count):
+            now = timezone.now()
+            for index, start in enumerate(bucket_starts("month", count)):
+                earning = FarmerEarnings.objects.create(
+                    farmer=farmer, order=place(User.objects.create_user(username=f"buyer-{count}-{index}"), "4.00", now),
+                    produce=kale, quantity=2, unit_price=Decimal("2.00"), total_amount=Decimal("4.00"),
+                )
+                FarmerEarnings.objects.filter(pk=earning.pk).update(
+                    created_at=now if index == 0 else start + timedelta(days=1)
+                )
+
+        earn(1)
+        with CaptureQueriesContext(connection) as baseline:
+            client.get("/api/v1/farmers/dashboard/")
+        earn(6)
+        with django_assert_max_num_queries(len(baseline.captured_queries)):
+            response = client.get("/api/v1/farmers/dashboard/")
+
+        assert response.status_code == 200
+        earnings = [Decimal(row["earnings"]) for row in response.data["monthly_earnings"]]
+        assert earnings == [Decimal("8.00")] + [Decimal("4.00")] * 5
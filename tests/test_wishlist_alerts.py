@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+
+from consumers import tasks
+from consumers.models import BackInStockAlert, ConsumerProfile, ConsumerWishlist
+from farmers import tasks as farmer_tasks
+from farmers.models import FarmerProfile, Produce
+from notifications.models import Notification
+
+
+@pytest.fixture(autouse=True)
+def inline_tasks(monkeypatch):
+    monkeypatch.setattr(tasks.sync_wishlist_stock_task, "delay", tasks.sync_wishlist_stock_task)
+    monkeypatch.setattr(farmer_tasks.fan_out_produce_available_task, "delay", lambda produce_id: None)
+    sends = []
+    monkeypatch.setattr(tasks.send_back_in_stock_alerts_task, "apply_async", lambda args, **kwargs: sends.append(args))
+    return sends
+
+
+@pytest.fixture
+def farmer():
+    return FarmerProfile.objects.create(user=User.objects.create_user(username="grower"), name="Hill Farm")
+
+
+def consumer(username, frequency="immediate"):
+    profile = ConsumerProfile.objects.create(user=User.objects.create_user(username=username))
+    profile.preferences.notification_frequency = frequency
+    profile.preferences.save()
+    return profile
+
+
+def sold_out(farmer, name):
+    return Produce.objects.create(
+        farmer=farmer, name=name, unit="kg", price_per_unit=Decimal("2.00"), quantity_available=0, available=False,
+    )
+
+
+def restock(produce, quantity=10):
+    produce.quantity_available = quantity
+    produce.available = True
+    produce.save(update_fields=["quantity_available", "available"])
+
+
+def alerts_for(username):
+    return list(Notification.objects.filter(user__username=username, title="Back in stock").values_list(
+        "message", flat=True
+    ))
+
+
+@pytest.mark.django_db
+class TestBackInStockAlerts:
+
+    def test_restocks_flip_wishlists_and_group_alerts_per_consumer(self, farmer, inline_tasks,
+                                                                   django_capture_on_commit_callbacks,
+                                                                   django_assert_max_num_queries):
+        kale, beets = sold_out(farmer, "Kale"), sold_out(farmer, "Beets")
+        ann, bob = consumer("ann"), consumer("bob")
+        for profile, produce in ((ann, kale), (ann, beets), (bob, kale)):
+            ConsumerWishlist.objects.create(consumer=profile, produce=produce, is_available=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            restock(kale)
+        with django_capture_on_commit_callbacks(execute=True):
+            restock(beets)
+
+        assert not ConsumerWishlist.objects.filter(is_available=False).exists()
+        assert inline_tasks == [("immediate",)]  # one delayed send for both restocks
+        with django_assert_max_num_queries(8):
+            assert tasks.send_back_in_stock_alerts_task("immediate") == 2
+
+        assert alerts_for("ann") == ["Beets and Kale from your wishlist are back in stock."]
+        assert alerts_for("bob") == ["Kale from your wishlist is back in stock."]
+        assert tasks.send_back_in_stock_alerts_task("immediate") == 0
+
+    def test_digest_consumers_wait_for_their_frequency(self, farmer, django_capture_on_commit_callbacks):
+        kale = sold_out(farmer, "Kale")
+        ConsumerWishlist.objects.create(consumer=consumer("cat", "daily"), produce=kale, is_available=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            restock(kale)
+
+        assert tasks.send_back_in_stock_alerts_task("immediate") == 0
+        assert tasks.send_back_in_stock_alerts_task("weekly") == 0
+        assert tasks.send_back_in_stock_alerts_task("daily") == 1
+        assert alerts_for("cat") == ["Kale from your wishlist is back in stock."]
+
+    def test_sell_out_resets_the_wishlist_and_drops_pending_alerts(self, farmer, django_capture_on_commit_callbacks):
+        kale = sold_out(farmer, "Kale")
+        ConsumerWishlist.objects.create(consumer=consumer("dan"), produce=kale, is_available=False)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            restock(kale)
+            restock(kale, quantity=20)  # only one pending alert per item
+        with django_capture_on_commit_callbacks(execute=True):
+            restock(kale, quantity=0)
+
+        assert BackInStockAlert.objects.count() == 1
+        assert ConsumerWishlist.objects.get().is_available is False
+        assert tasks.send_back_in_stock_alerts_task("immediate") == 0
+        assert BackInStockAlert.objects.filter(sent_at__isnull=True).count() == 0
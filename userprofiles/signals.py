@@ -2,8 +2,11 @@ from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from farmfresh.cache import CacheTags, invalidate_on_change
 from .models import UserProfile
 
+invalidate_on_change(UserProfile, lambda profile: [CacheTags.user(profile.user_id)])
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance: User, created: bool, **kwargs):